@@ -0,0 +1,291 @@
+"""
+Batch analysis of PGN archives and EPD files across a pool of engine processes.
+
+Games are streamed from the input one at a time (chess.pgn.read_game), so a
+multi-GB archive is analysed in constant memory. At most a few games per
+worker are in flight, and each worker analyses every position of its game
+with engine.analyse(). Results are written as annotated PGN ([%eval] comments,
+the engine's best move and ?!/?/?? for inaccuracies, mistakes and blunders)
+or as JSONL, one line per game.
+
+Results are written in input order. Finished games are checkpointed next to
+the output with their input offset, so an interrupted job picks up where it
+stopped: the output is truncated to the last checkpointed game and the input
+is re-read from the first unfinished one. A game that fails (an unreadable
+game, an engine that keeps crashing) is logged to <output>.errors.jsonl and
+the job moves on; it is retried on the next run.
+"""
+import argparse
+import collections
+import json
+import multiprocessing
+import multiprocessing.util
+import os
+import queue
+import shlex
+import threading
+import time
+
+import chess
+import chess.engine
+import chess.pgn
+
+from checkpoints import read_checkpoint
+from engine_pool import EnginePool
+from game_sources import read_tasks
+from play_chess_v1 import STOCKFISH_PATH
+
+MATE_SCORE = 10_000
+MAX_LOSS = 1_000  # Centipawn loss is capped so a missed mate counts like any other blunder
+# (centipawn loss, NAG): the first threshold reached flags the move
+FLAGS = [(300, chess.pgn.NAG_BLUNDER, "blunder"), (100, chess.pgn.NAG_MISTAKE, "mistake"),
+         (50, chess.pgn.NAG_DUBIOUS_MOVE, "inaccuracy")]
+
+_pool = None
+_limit = None
+
+
+def _init_worker(engine_path, threads, hash_mb, limit):
+    global _pool, _limit
+    _pool = EnginePool(engine_path, size=1, options={"Threads": threads, "Hash": hash_mb})
+    _limit = limit
+    # Pool workers skip atexit handlers, but run multiprocessing finalizers on a clean exit
+    multiprocessing.util.Finalize(None, _pool.close, exitpriority=10)
+
+
+def _score(board, engine):
+    """(eval in centipawns for the side to move, best move) of one position."""
+    if board.is_checkmate():
+        return -MATE_SCORE, None
+    if board.is_game_over():
+        return 0, None
+    info = engine.analyse(board, _limit)
+    pv = info.get("pv") or [None]
+    return info["score"].pov(board.turn).score(mate_score=MATE_SCORE), pv[0]
+
+
+def _analyse_game(task):
+    """Analyse every position of one game; returns the task with a list of per-ply results."""
+    board = chess.Board(task["fen"])
+    plies = []
+    with _pool.lease() as engine:  # Leasing sends ucinewgame and replaces a crashed engine
+        score, best = _score(board, engine)
+        for uci in task["moves"]:
+            move = chess.Move.from_uci(uci)
+            mover = board.turn
+            board.push(move)
+            next_score, next_best = _score(board, engine)
+            loss = min(max(score + next_score, 0), MAX_LOSS)  # Best eval minus the eval after the move played
+            flag = next((name for threshold, _, name in FLAGS if loss >= threshold), None)
+            plies.append({
+                "move": uci,
+                "best": best.uci() if best else None,
+                "eval_cp": -next_score if mover == chess.WHITE else next_score,  # From White's point of view
+                "loss_cp": loss if best is not None and best != move else 0,
+                "flag": flag if best is not None and best != move else None,
+            })
+            score, best = next_score, next_best
+        root_eval = None
+        if not task["moves"]:
+            root_eval = score if board.turn == chess.WHITE else -score
+    return {**task, "plies": plies, "root": {"eval_cp": root_eval, "best": best.uci() if best else None},
+            "positions": len(task["moves"]) + 1}
+
+
+def _analyse_task(task):
+    """_analyse_game, with a failure (a bad game, a dead engine) returned as the task plus its error."""
+    try:
+        return _analyse_game(task)
+    except Exception as error:
+        return {**task, "error": f"{type(error).__name__}: {error}"}
+
+
+def to_pgn(result):
+    """The analysed game as PGN with [%eval] comments, best-move hints and NAGs."""
+    game = chess.pgn.Game()
+    for name, value in result["headers"].items():
+        game.headers[name] = value
+    if result["fen"] != chess.STARTING_FEN:
+        game.setup(chess.Board(result["fen"]))
+    node = game
+    for ply in result["plies"]:
+        board = node.board()
+        node = node.add_variation(chess.Move.from_uci(ply["move"]))
+        node.comment = f"[%eval {ply['eval_cp'] / 100:.2f}]"
+        if ply["flag"]:
+            best = board.san(chess.Move.from_uci(ply["best"]))
+            node.nags.add(next(nag for _, nag, name in FLAGS if name == ply["flag"]))
+            node.comment += f" {ply['flag'].capitalize()}, best was {best} (-{ply['loss_cp']} cp)"
+    return str(game)
+
+
+def to_jsonl(result):
+    record = {"index": result["index"], "headers": result["headers"], "fen": result["fen"], "plies": result["plies"]}
+    if not result["moves"]:
+        record.update(result["root"])
+    return json.dumps(record)
+
+
+class AnalysisLog:
+    """
+    Streams analysed games to the output file and records them in a checkpoint file,
+    like tournament.TournamentLog: one JSON line per game with the output offset
+    after it, written once the game is on disk. On resume the output is truncated
+    back to the last checkpointed offset.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.checkpoint_path = output_path + ".checkpoint"
+        self.errors_path = output_path + ".errors.jsonl"
+        self._errors = None
+        self.completed = {}  # index -> input offset
+        self.positions = 0
+        offset = 0
+        for entry in read_checkpoint(self.checkpoint_path):
+            self.completed[entry["index"]] = entry["input_offset"]
+            self.positions += entry["positions"]
+            offset = max(offset, entry["offset"])
+        with open(self.output_path, "a+") as f:
+            f.truncate(offset)
+        self._output = open(self.output_path, "a")
+        self._checkpoint = open(self.checkpoint_path, "a")
+
+    def resume_point(self):
+        """(input offset, index) of the first game that may still need analysis."""
+        index = 0
+        while index in self.completed:
+            index += 1
+        if index == 0:
+            return 0, 0
+        return self.completed[index - 1], index - 1  # Re-read the last finished game to find the next offset
+
+    def record(self, result, text):
+        self._output.write(text + ("\n\n" if self.output_path.lower().endswith(".pgn") else "\n"))
+        self._output.flush()
+        os.fsync(self._output.fileno())
+        entry = {"index": result["index"], "input_offset": result["offset"], "offset": self._output.tell(),
+                 "positions": result["positions"]}
+        self._checkpoint.write(json.dumps(entry) + "\n")
+        self._checkpoint.flush()
+        os.fsync(self._checkpoint.fileno())
+        self.completed[result["index"]] = result["offset"]
+        self.positions += result["positions"]
+
+    def record_error(self, result):
+        """Log a game that could not be analysed; it is not checkpointed, so a resumed run tries it again."""
+        if self._errors is None:
+            self._errors = open(self.errors_path, "a")
+        self._errors.write(json.dumps({"index": result["index"], "input_offset": result["offset"],
+                                       "headers": result["headers"], "error": result["error"]}) + "\n")
+        self._errors.flush()
+
+    def close(self):
+        self._output.close()
+        self._checkpoint.close()
+        if self._errors is not None:
+            self._errors.close()
+
+
+def run_analysis(input_path, output_path, engine=STOCKFISH_PATH, limit=chess.engine.Limit(depth=12),
+                 threads=1, hash_mb=16, workers=None, progress_every=5.0):
+    """Analyse every game of input_path into output_path (.pgn or .jsonl), resuming from its checkpoint."""
+    if workers is None:
+        workers = max(1, (os.cpu_count() or 1) // threads)
+    if input_path.lower().endswith(".epd") and output_path.lower().endswith(".pgn"):
+        raise ValueError("EPD positions have no moves to annotate; write .jsonl instead")
+    render = to_pgn if output_path.lower().endswith(".pgn") else to_jsonl
+
+    log = AnalysisLog(output_path)
+    offset, index = log.resume_point()
+    if log.completed:
+        print(f"Resuming: {len(log.completed)} games already analysed.")
+
+    finished = queue.Queue()
+    # Results are written in input order: a game that finishes early waits in `ready` for the ones before it.
+    # A slot is freed only once its game is written, so in-flight plus waiting games stay bounded.
+    in_flight = threading.BoundedSemaphore(workers * 4)
+    order = collections.deque()  # Indices submitted and not yet written, in input order
+    ready = {}
+    start = time.perf_counter()
+    positions = games = errors = 0
+    last_report = start
+
+    def drain(block=False):
+        nonlocal positions, games, errors, last_report
+        while True:
+            try:
+                result = finished.get(block=block, timeout=0.1 if block else None)
+            except queue.Empty:
+                return
+            if isinstance(result, BaseException):
+                raise result  # Not a failed game but a failure of the pool itself
+            ready[result["index"]] = result
+            while order and order[0] in ready:
+                result = ready.pop(order.popleft())
+                if "error" in result:
+                    log.record_error(result)
+                    errors += 1
+                    print(f"Game {result['index']} failed: {result['error']}")
+                else:
+                    log.record(result, render(result))
+                    positions += result["positions"]
+                    games += 1
+                in_flight.release()
+            now = time.perf_counter()
+            if now - last_report >= progress_every:
+                last_report = now
+                print(f"{games} games, {positions} positions, {positions / (now - start):.1f} positions/s")
+            block = False
+
+    try:
+        with multiprocessing.Pool(workers, initializer=_init_worker,
+                                  initargs=(engine, threads, hash_mb, limit)) as pool:
+            for task in read_tasks(input_path, offset, index):
+                if task["index"] in log.completed:
+                    continue
+                while not in_flight.acquire(timeout=0.1):
+                    drain()
+                order.append(task["index"])
+                pool.apply_async(_analyse_task, (task,), callback=finished.put, error_callback=finished.put)
+                drain()
+            while order:
+                drain(block=True)
+            pool.close()
+            pool.join()
+    finally:
+        log.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "games": games,
+        "errors": errors,
+        "positions": positions,
+        "total_games": len(log.completed),
+        "elapsed_s": elapsed,
+        "positions_per_second": positions / elapsed if elapsed else 0.0,
+        "workers": workers,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Annotate PGN archives (or EPD positions) with engine evaluations.")
+    parser.add_argument("input", help="PGN or EPD file (streamed, any size)")
+    parser.add_argument("output", help="Annotated .pgn or .jsonl (resumed if it exists)")
+    parser.add_argument("--engine", default=STOCKFISH_PATH, help="UCI engine command")
+    parser.add_argument("--depth", type=int, default=None, help="Search depth per position (default 12)")
+    parser.add_argument("--time", type=float, default=None, help="Seconds per position instead of a depth")
+    parser.add_argument("--nodes", type=int, default=None, help="Nodes per position instead of a depth")
+    parser.add_argument("--threads", type=int, default=1, help="Threads option for every engine")
+    parser.add_argument("--hash", type=int, default=16, help="Hash option (MB) for every engine")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: cores / threads)")
+    args = parser.parse_args()
+
+    if args.time is None and args.nodes is None and args.depth is None:
+        args.depth = 12
+    if args.input.lower().endswith(".epd") and args.output.lower().endswith(".pgn"):
+        parser.error("EPD positions have no moves to annotate; write .jsonl instead")
+    limit = chess.engine.Limit(depth=args.depth, time=args.time, nodes=args.nodes)
+    stats = run_analysis(args.input, args.output, shlex.split(args.engine), limit, args.threads, args.hash,
+                         args.workers)
+    print(json.dumps(stats, indent=2))
@@ -0,0 +1,234 @@
+"""
+Offline benchmarks for the hot paths: engine play (UCI and in-process),
+frame rendering, video encoding, FEN parsing / legal-move generation and LLM
+move translation.
+
+Everything runs locally: the engine is fake_uci_engine.py and the LLM is
+misc/stub_llm_server.py, so results only move when our code does. Each
+benchmark reports milliseconds per operation (the median over --repeat
+rounds) and the suite writes them as JSON:
+
+    python benchmarks.py -o bench.json
+    python benchmarks.py --baseline bench.json      # exits 1 on a regression
+
+A benchmark regresses when it is slower than the baseline by more than its
+threshold (THRESHOLDS, or --threshold for all of them).
+"""
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+import chess
+import chess.engine
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Allowed slowdown against the baseline before a benchmark counts as a regression.
+# Subprocess and HTTP round trips are noisier than pure Python work.
+THRESHOLDS = {
+    "engine_move": 0.25,
+    "lite_engine_move": 0.15,
+    "render_sprite": 0.15,
+    "render_svg": 0.15,
+    "encode_frame": 0.20,
+    "fen_legal_moves": 0.15,
+    "llm_translate": 0.25,
+}
+
+
+def random_positions(plies, seed=0):
+    """Positions from random games (a new game starts whenever one ends), with the move played in each."""
+    rng = random.Random(seed)
+    positions, board = [], chess.Board()
+    while len(positions) < plies:
+        if board.is_game_over():
+            board = chess.Board()
+        move = rng.choice(list(board.legal_moves))
+        positions.append((board.copy(stack=False), move))
+        board.push(move)
+    return positions
+
+
+def bench_engine_move(positions):
+    """One engine.play() round trip to the fake engine per position (no search delay)."""
+    engine = chess.engine.SimpleEngine.popen_uci([sys.executable, os.path.join(HERE, "fake_uci_engine.py")])
+    try:
+        engine.configure({"DepthTime": 0})
+        limit = chess.engine.Limit(depth=8)
+        start = time.perf_counter()
+        for board, _ in positions:
+            engine.play(board, limit)
+        return (time.perf_counter() - start) / len(positions)
+    finally:
+        engine.quit()
+
+
+def bench_lite_engine_move(positions):
+    """LiteEngine.play() at depth 1 per position, in process."""
+    from lite_engine import LiteEngine
+
+    engine = LiteEngine()
+    limit = chess.engine.Limit(depth=1)
+    start = time.perf_counter()
+    for board, _ in positions:
+        engine.play(board, limit)
+    return (time.perf_counter() - start) / len(positions)
+
+
+def bench_render_sprite(positions):
+    from board_renderer import BoardRenderer
+
+    renderer = BoardRenderer(size=800)
+    start = time.perf_counter()
+    for board, move in positions:
+        renderer.render(board, lastmove=move)
+    return (time.perf_counter() - start) / len(positions)
+
+
+def bench_render_svg(positions):
+    """export_svg + svg_to_cv2_image, the SVG path play_chess_v2 used before the sprite renderer."""
+    from board_renderer import export_svg, svg_to_cv2_image
+
+    positions = positions[:max(1, len(positions) // 10)]  # About 100x slower than the sprites
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "board.svg")
+        start = time.perf_counter()
+        for board, move in positions:
+            export_svg(board, path, lastmove=move)
+            svg_to_cv2_image(path)
+        return (time.perf_counter() - start) / len(positions)
+
+
+def bench_encode_frame(positions):
+    """cv2.VideoWriter (mp4v, 800x800) per frame, with the frames rendered beforehand."""
+    import cv2
+    from board_renderer import BoardRenderer
+
+    renderer = BoardRenderer(size=800)
+    frames = [renderer.render(board, lastmove=move) for board, move in positions]
+    with tempfile.TemporaryDirectory() as tmp:
+        writer = cv2.VideoWriter(os.path.join(tmp, "bench.mp4"), cv2.VideoWriter_fourcc(*"mp4v"), 2, (800, 800))
+        start = time.perf_counter()
+        for frame in frames:
+            writer.write(frame)
+        writer.release()
+        return (time.perf_counter() - start) / len(frames)
+
+
+def bench_fen_legal_moves(positions):
+    """What the FEN-message agents do per message: parse the FEN and list the legal moves."""
+    fens = [board.fen() for board, _ in positions]
+    start = time.perf_counter()
+    for fen in fens:
+        [move.uci() for move in chess.Board(fen).legal_moves]
+    return (time.perf_counter() - start) / len(fens)
+
+
+def bench_llm_translate(positions):
+    """CustomAssistant.handle_message against the stub server (no latency), with position prompts."""
+    from stub_llm_server import start_stub_server
+
+    server, os.environ["LLM_BASE_URL"] = start_stub_server(latency_ms=0)
+    try:
+        from position_prompt import PositionPrompt
+        from llm_assistant import CustomAssistant
+
+        positions = positions[:max(1, len(positions) // 4)]
+
+        async def translate():
+            assistant = CustomAssistant(name="Translator", prompt=PositionPrompt())
+            start = time.perf_counter()
+            for board, move in positions:
+                reply = await assistant.handle_message(f"I'd like to play {move.uci()}", board)
+                assert reply == move.uci(), reply
+            return (time.perf_counter() - start) / len(positions)
+
+        return asyncio.run(translate())
+    finally:
+        server.shutdown()
+
+
+BENCHMARKS = {
+    "engine_move": bench_engine_move,
+    "lite_engine_move": bench_lite_engine_move,
+    "render_sprite": bench_render_sprite,
+    "render_svg": bench_render_svg,
+    "encode_frame": bench_encode_frame,
+    "fen_legal_moves": bench_fen_legal_moves,
+    "llm_translate": bench_llm_translate,
+}
+
+
+def run_benchmarks(names=None, plies=200, repeat=3, seed=0):
+    """Run the benchmarks; returns {name: {"ms": median, "runs_ms": [...]}}."""
+    from board_renderer import quiet_stderr
+
+    sys.path.insert(0, os.path.join(HERE, "misc"))
+    positions = random_positions(plies, seed)
+    results = {}
+    for name in names or BENCHMARKS:
+        with quiet_stderr():  # svglib/renderPM (SVG path and sprite setup) are noisy on stderr
+            runs = [BENCHMARKS[name](positions) * 1000 for _ in range(repeat)]
+        results[name] = {"ms": statistics.median(runs), "runs_ms": runs}
+        print(f"{name:>16}: {results[name]['ms']:9.3f} ms/op", flush=True)
+    return results
+
+
+def compare(results, baseline, threshold=None):
+    """Changes against the baseline results; returns a list of (name, baseline_ms, ms, change, regressed)."""
+    rows = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        before = baseline[name]["ms"]
+        change = result["ms"] / before - 1 if before else 0.0
+        limit = threshold if threshold is not None else THRESHOLDS.get(name, 0.15)
+        rows.append((name, before, result["ms"], change, change > limit))
+    return rows
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Offline benchmarks of the engine, render, encode and LLM hot paths.")
+    parser.add_argument("names", nargs="*", help=f"Benchmarks to run (default: all of {', '.join(BENCHMARKS)})")
+    parser.add_argument("-o", "--output", help="Write the results as JSON")
+    parser.add_argument("--baseline", help="JSON from an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, help="Allowed slowdown for every benchmark, e.g. 0.1 for 10%%")
+    parser.add_argument("--plies", type=int, default=200, help="Positions per round")
+    parser.add_argument("--repeat", type=int, default=3, help="Rounds per benchmark (the median is reported)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+    results = run_benchmarks(args.names, plies=args.plies, repeat=args.repeat, seed=args.seed)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "python": platform.python_version(),
+                "chess": chess.__version__,
+                "machine": platform.machine(),
+                "plies": args.plies,
+                "repeat": args.repeat,
+                "results": results,
+            }, f, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        regressions = 0
+        print(f"\nAgainst {args.baseline}:")
+        for name, before, after, change, regressed in compare(results, baseline, args.threshold):
+            regressions += regressed
+            print(f"{name:>16}: {before:9.3f} -> {after:9.3f} ms ({change:+.1%}){'  REGRESSION' if regressed else ''}")
+        if regressions:
+            sys.exit(1)
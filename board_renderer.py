@@ -0,0 +1,179 @@
+import contextlib
+import io
+import os
+import sys
+import time
+
+import chess
+import chess.svg
+import cv2
+import numpy as np
+from svglib.svglib import svg2rlg
+from reportlab.graphics import renderPM
+
+# Square colours match the chess.svg defaults so raster and SVG output look alike
+SQUARE_COLORS = {
+    "light": chess.svg.DEFAULT_COLORS["square light"],
+    "dark": chess.svg.DEFAULT_COLORS["square dark"],
+    "light lastmove": chess.svg.DEFAULT_COLORS["square light lastmove"],
+    "dark lastmove": chess.svg.DEFAULT_COLORS["square dark lastmove"],
+}
+
+
+@contextlib.contextmanager
+def quiet_stderr():
+    """Silence stderr at the file-descriptor level (renderPM's C code prints "colinear!" for some glyphs)."""
+    sys.stderr.flush()
+    saved = os.dup(2)
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 2)
+    try:
+        yield
+    finally:
+        os.dup2(saved, 2)
+        os.close(saved)
+
+
+def hex_to_bgr(color):
+    """Convert an SVG colour such as '#ffce9e' to a BGR tuple."""
+    color = color.lstrip("#")
+    r, g, b = (int(color[i:i + 2], 16) for i in (0, 2, 4))
+    return (b, g, r)
+
+
+def rasterize_piece(piece, size):
+    """
+    Rasterize a single chess.svg piece glyph to a BGR image and an alpha mask.
+
+    renderPM has no alpha channel, so the glyph is drawn once on black and once
+    on white; the difference between the two gives the coverage of every pixel.
+    """
+    svg_data = chess.svg.piece(piece, size=size).encode()
+    on_black = np.array(renderPM.drawToPIL(svg2rlg(io.BytesIO(svg_data)), bg=0x000000), dtype=np.float32)
+    on_white = np.array(renderPM.drawToPIL(svg2rlg(io.BytesIO(svg_data)), bg=0xFFFFFF), dtype=np.float32)
+    alpha = 1.0 - (on_white - on_black).mean(axis=2, keepdims=True) / 255.0
+    alpha = np.clip(alpha, 0.0, 1.0)
+    color = np.where(alpha > 0, on_black / np.maximum(alpha, 1e-6), 0.0)
+    bgr = cv2.cvtColor(np.clip(color, 0, 255).astype(np.float32), cv2.COLOR_RGB2BGR)
+    return bgr, alpha
+
+
+class BoardRenderer:
+    """
+    Renders chess.Board positions straight to BGR frames for OpenCV.
+
+    Every piece glyph is rasterized once when the renderer is created and then
+    composited onto each square colour the first time it is needed, so drawing
+    a frame is only a matter of copying 64 cached square tiles into an array.
+    """
+
+    def __init__(self, size=800):
+        self.size = size
+        self.square_size = size // 8
+        self._glyphs = {}
+        self._tiles = {}
+        self._square_fill = {
+            name: np.full((self.square_size, self.square_size, 3), hex_to_bgr(color), dtype=np.uint8)
+            for name, color in SQUARE_COLORS.items()
+        }
+        for color in chess.COLORS:
+            for piece_type in chess.PIECE_TYPES:
+                piece = chess.Piece(piece_type, color)
+                self._glyphs[piece.symbol()] = rasterize_piece(piece, self.square_size)
+
+    def _tile(self, symbol, fill):
+        """Return the cached square tile for a piece symbol (or None) on a given fill."""
+        key = (symbol, fill)
+        tile = self._tiles.get(key)
+        if tile is None:
+            background = self._square_fill[fill]
+            if symbol is None:
+                tile = background
+            else:
+                bgr, alpha = self._glyphs[symbol]
+                tile = (bgr * alpha + background * (1.0 - alpha)).astype(np.uint8)
+            self._tiles[key] = tile
+        return tile
+
+    def render(self, board, lastmove=None, orientation=chess.WHITE):
+        """Render the board as a (size, size, 3) uint8 BGR frame."""
+        frame = np.empty((self.square_size * 8, self.square_size * 8, 3), dtype=np.uint8)
+        highlighted = (lastmove.from_square, lastmove.to_square) if lastmove else ()
+        step = self.square_size
+        for square in chess.SQUARES:
+            file_index = chess.square_file(square)
+            rank_index = chess.square_rank(square)
+            if orientation == chess.WHITE:
+                col, row = file_index, 7 - rank_index
+            else:
+                col, row = 7 - file_index, rank_index
+            fill = "light" if (file_index + rank_index) % 2 else "dark"
+            if square in highlighted:
+                fill += " lastmove"
+            piece = board.piece_at(square)
+            frame[row * step:(row + 1) * step, col * step:(col + 1) * step] = self._tile(
+                piece.symbol() if piece else None, fill
+            )
+        if frame.shape[0] != self.size:
+            frame = cv2.resize(frame, (self.size, self.size), interpolation=cv2.INTER_NEAREST)
+        return frame
+
+
+def export_svg(board, path, lastmove=None):
+    """Write the board to an SVG file without coordinates/labels (optional export)."""
+    svg_data = chess.svg.board(board, lastmove=lastmove, coordinates=False)
+    with open(path, "w") as f:
+        f.write(svg_data)
+
+
+def svg_to_cv2_image(svg_path):
+    """Rasterize an SVG file with svglib/renderPM into a BGR image (the old per-frame path, kept for benchmarks)."""
+    return cv2.cvtColor(np.array(renderPM.drawToPIL(svg2rlg(svg_path))), cv2.COLOR_RGB2BGR)
+
+
+def benchmark(num_frames=100, size=800):
+    """Compare frames/sec of the sprite renderer against the SVG -> svglib -> renderPM path."""
+    import tempfile
+
+    board = chess.Board()
+    positions = []
+    for move in ["e2e4", "e7e5", "g1f3", "b8c6", "f1b5", "a7a6", "b5a4", "g8f6", "e1g1", "f8e7"]:
+        positions.append((board.copy(stack=False), move))
+        board.push_uci(move)
+
+    start = time.perf_counter()
+    renderer = BoardRenderer(size=size)
+    setup_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(num_frames):
+        position, move = positions[i % len(positions)]
+        renderer.render(position, lastmove=chess.Move.from_uci(move))
+    sprite_fps = num_frames / (time.perf_counter() - start)
+
+    svg_frames = max(1, num_frames // 10)
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.perf_counter()
+        for i in range(svg_frames):
+            position, _ = positions[i % len(positions)]
+            path = os.path.join(tmp, f"board_{i}.svg")
+            export_svg(position, path)
+            png_data = renderPM.drawToPIL(svg2rlg(path))
+            cv2.cvtColor(np.array(png_data), cv2.COLOR_RGB2BGR)
+        svg_fps = svg_frames / (time.perf_counter() - start)
+
+    print(f"Sprite setup: {setup_time * 1000:.1f} ms")
+    print(f"Sprite renderer: {sprite_fps:.1f} frames/sec ({num_frames} frames)")
+    print(f"SVG -> svglib -> renderPM: {svg_fps:.1f} frames/sec ({svg_frames} frames)")
+    print(f"Speed-up: {sprite_fps / svg_fps:.1f}x")
+    return {"sprite_fps": sprite_fps, "svg_fps": svg_fps, "setup_s": setup_time}
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark the sprite board renderer against the SVG path.")
+    parser.add_argument("--frames", type=int, default=100, help="Number of frames to render with the sprite renderer")
+    parser.add_argument("--size", type=int, default=800, help="Frame size in pixels")
+    args = parser.parse_args()
+    benchmark(num_frames=args.frames, size=args.size)
@@ -0,0 +1,30 @@
+"""
+JSON-lines checkpoint files for resumable jobs (tournament.py, batch_analysis.py).
+
+Each finished unit of work appends one line. A crash can leave the last line
+torn; read_checkpoint() drops it and cuts it off the file, so the next entry
+starts on a line of its own instead of being glued onto the fragment.
+"""
+import json
+import os
+
+
+def read_checkpoint(path):
+    """The entries of a checkpoint file (empty if it does not exist), after truncating a torn last line."""
+    entries = []
+    if not os.path.exists(path):
+        return entries
+    valid = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break  # Written without its newline: the crash came mid-line
+            try:
+                entries.append(json.loads(line))
+            except ValueError:
+                break
+            valid += len(line)
+    if valid < os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(valid)
+    return entries
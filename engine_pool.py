@@ -0,0 +1,233 @@
+import asyncio
+import contextlib
+import threading
+import time
+
+import chess
+import chess.engine
+
+from tracing import tracer
+
+
+class _NewGameCommand(chess.engine.BaseCommand[None]):
+    """Send ucinewgame and wait for the engine to acknowledge with readyok."""
+
+    def start(self):
+        self._engine.send_line("ucinewgame")
+        self._engine.send_line("isready")
+
+    def line_received(self, line):
+        if line.strip() == "readyok":
+            self.result.set_result(None)
+            self.set_finished()
+
+
+class EnginePool:
+    """
+    Keeps a fixed number of warm UCI engine processes and leases them out.
+
+    Engines are started once, so games and agents skip the process spawn and
+    UCI handshake. Every returned engine gets ucinewgame before the next lease;
+    an engine that crashed, timed out or failed that reset is restarted. If the
+    restart fails too, its slot stays in the pool and is retried on a later
+    lease, so the pool never shrinks. The pool tracks how long callers wait
+    for an engine and how busy engines are.
+    """
+
+    def __init__(self, command, size=2, options=None, timeout=10.0):
+        self.command = command
+        self.size = size
+        self.options = options or {}
+        self.timeout = timeout
+        self._lock = threading.Condition()
+        self._idle = []
+        self._closed = False
+        self._created = time.perf_counter()
+        self._lease_start = {}
+        self.leases = 0
+        self.restarts = 0
+        self.spawn_failures = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.busy_time = 0.0
+        for _ in range(size):
+            self._idle.append(self._spawn())
+
+    def _spawn(self):
+        engine = chess.engine.SimpleEngine.popen_uci(self.command, timeout=self.timeout)
+        if self.options:
+            engine.configure({name: value for name, value in self.options.items() if name in engine.options})
+        return engine
+
+    def _restart(self, engine):
+        """
+        A fresh engine in place of `engine` (None for an empty slot). Returns None if it cannot be
+        started: the slot then stays in the pool, empty, and the next acquire() tries again.
+        """
+        if engine is not None:
+            with contextlib.suppress(Exception):
+                engine.close()
+        try:
+            replacement = self._spawn()
+        except Exception:
+            with self._lock:
+                self.spawn_failures += 1
+            return None
+        with self._lock:
+            self.restarts += 1
+        tracer.count("retries_total", kind="engine_restart")
+        return replacement
+
+    def _put_back(self, engine):
+        """Return a slot to the idle list; empty slots go to the front, so live engines are leased first."""
+        with self._lock:
+            if self._closed:
+                if engine is not None:
+                    with contextlib.suppress(Exception):
+                        engine.quit()
+                return
+            if engine is None:
+                self._idle.insert(0, None)
+            else:
+                self._idle.append(engine)
+            self._lock.notify()
+
+    def _new_game(self, engine):
+        coro = asyncio.wait_for(engine.protocol.communicate(_NewGameCommand), self.timeout)
+        asyncio.run_coroutine_threadsafe(coro, engine.protocol.loop).result()
+
+    def acquire(self, timeout=None):
+        """Block until an engine is free and return it. Raises TimeoutError if none frees up in time."""
+        start = time.perf_counter()
+        with self._lock:
+            if not self._lock.wait_for(lambda: self._idle or self._closed, timeout):
+                raise TimeoutError("no engine available in the pool")
+            if self._closed:
+                raise RuntimeError("engine pool is closed")
+            engine = self._idle.pop()
+            waited = time.perf_counter() - start
+            self.leases += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+        if engine is None or engine.returncode.done():
+            engine = self._restart(engine)
+            if engine is None:
+                self._put_back(None)
+                raise chess.engine.EngineTerminatedError(f"could not start engine {self.command!r}")
+        with self._lock:
+            self._lease_start[id(engine)] = time.perf_counter()
+        return engine
+
+    def release(self, engine, healthy=True):
+        """Return a leased engine, resetting it for the next game or restarting it if it is broken."""
+        with self._lock:
+            self.busy_time += time.perf_counter() - self._lease_start.pop(id(engine))
+        try:
+            if not healthy or engine.returncode.done():
+                raise chess.engine.EngineTerminatedError("engine marked unhealthy")
+            self._new_game(engine)
+        except Exception:
+            engine = self._restart(engine)
+        self._put_back(engine)
+
+    @contextlib.contextmanager
+    def lease(self, timeout=None):
+        """Context manager around acquire()/release(); a timed-out engine is restarted on release."""
+        engine = self.acquire(timeout)
+        healthy = True
+        try:
+            yield engine
+        except asyncio.TimeoutError:
+            healthy = False  # A hung engine cannot be trusted to answer ucinewgame
+            raise
+        finally:
+            self.release(engine, healthy)
+
+    def health_check(self):
+        """Ping every idle engine and restart the ones that do not answer. Returns the number restarted."""
+        with self._lock:
+            engines, self._idle = self._idle, []
+        restarted = 0
+        checked = []
+        for engine in engines:
+            try:
+                if engine is None:
+                    raise chess.engine.EngineTerminatedError("empty slot")
+                engine.ping()
+            except Exception:
+                engine = self._restart(engine)
+                restarted += engine is not None
+            checked.append(engine)
+        for engine in checked:
+            self._put_back(engine)
+        return restarted
+
+    def stats(self):
+        elapsed = time.perf_counter() - self._created
+        with self._lock:
+            busy = self.busy_time + sum(time.perf_counter() - start for start in self._lease_start.values())
+            return {
+                "size": self.size,
+                "idle": sum(engine is not None for engine in self._idle),
+                "empty_slots": self._idle.count(None),
+                "leases": self.leases,
+                "restarts": self.restarts,
+                "spawn_failures": self.spawn_failures,
+                "avg_wait_ms": self.total_wait / self.leases * 1000 if self.leases else 0.0,
+                "max_wait_ms": self.max_wait * 1000,
+                "utilization": busy / (self.size * elapsed) if elapsed else 0.0,
+            }
+
+    def close(self):
+        """Quit idle engines now; leased engines are quit when they are released."""
+        with self._lock:
+            self._closed = True
+            engines, self._idle = self._idle, []
+            self._lock.notify_all()
+        for engine in engines:
+            if engine is not None:
+                with contextlib.suppress(Exception):
+                    engine.quit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+    from concurrent.futures import ThreadPoolExecutor
+
+    from play_chess_v1 import play_game
+
+    parser = argparse.ArgumentParser(description="Exercise an EnginePool with concurrent games.")
+    parser.add_argument("--engine", default=None, help="UCI engine command (default: the bundled fake engine)")
+    parser.add_argument("--size", type=int, default=4, help="Number of warm engines")
+    parser.add_argument("--games", type=int, default=20, help="Games to play")
+    parser.add_argument("--concurrency", type=int, default=None,
+                        help="Games played at the same time (default: size / 2, each game leases two engines)")
+    parser.add_argument("--time", type=float, default=0.01, help="Seconds per move")
+    parser.add_argument("--crash-rate", type=int, default=0, help="Fake engine: percent chance to crash per search")
+    args = parser.parse_args()
+
+    command = args.engine or [sys.executable, "fake_uci_engine.py"]
+    options = {"CrashRate": args.crash_rate} if args.crash_rate else {}
+
+    def run(_):
+        for _attempt in range(3):
+            try:
+                with pool.lease() as white, pool.lease() as black:
+                    board, _ = play_game(white, black, chess.engine.Limit(time=args.time), verbose=False)
+                    return board.result(claim_draw=True)
+            except (chess.engine.EngineError, chess.engine.EngineTerminatedError, asyncio.TimeoutError):
+                continue
+        return "*"
+
+    with EnginePool(command, size=args.size, options=options) as pool:
+        with ThreadPoolExecutor(args.concurrency or max(1, args.size // 2)) as executor:
+            results = list(executor.map(run, range(args.games)))
+        print(f"Results: {results}")
+        print(f"Pool stats: {pool.stats()}")
@@ -0,0 +1,222 @@
+#!/usr/bin/env python
+"""
+A small scripted UCI engine for tests and benchmarks without Stockfish.
+
+It speaks enough UCI for chess.engine (uci, isready, setoption, ucinewgame,
+position, go, stop, ponderhit, quit). A "search" emits one info line per
+depth every DepthTime ms until the go limits are reached, and the best move
+is a deterministic pick from the legal moves that settles after a few
+depths. CrashRate makes the process exit on "go" to exercise restarts, and
+MissRate makes that share of the expected replies (bestmove ... ponder) wrong.
+"""
+import random
+import sys
+import threading
+import time
+import zlib
+
+import chess
+
+PIECE_VALUES = {chess.PAWN: 100, chess.KNIGHT: 320, chess.BISHOP: 330, chess.ROOK: 500, chess.QUEEN: 900, chess.KING: 0}
+
+OPTIONS = {
+    "Threads": ("spin", 1, "min 1 max 512"),
+    "Hash": ("spin", 16, "min 1 max 33554432"),
+    "Ponder": ("check", "false", ""),
+    "MultiPV": ("spin", 1, "min 1 max 500"),
+    "DepthTime": ("spin", 2, "min 0 max 10000"),
+    "StableDepth": ("spin", 4, "min 1 max 100"),
+    "CrashRate": ("spin", 0, "min 0 max 100"),
+    "MissRate": ("spin", 0, "min 0 max 100"),
+}
+
+_output_lock = threading.Lock()
+
+
+def send(line):
+    with _output_lock:
+        sys.stdout.write(line + "\n")
+        sys.stdout.flush()
+
+
+def evaluate(board):
+    """Material balance from the side to move's point of view."""
+    score = 0
+    for piece in board.piece_map().values():
+        value = PIECE_VALUES[piece.piece_type]
+        score += value if piece.color == board.turn else -value
+    return score
+
+
+def pick_move(board, depth, stable_depth):
+    """Deterministic per position; varies below stable_depth, then stays fixed."""
+    moves = sorted(board.legal_moves, key=lambda move: move.uci())
+    if not moves:
+        return None
+    captures = [move for move in moves if board.is_capture(move)]
+    seed = zlib.crc32(board.fen().encode())
+    final = (captures or moves)[seed % len(captures or moves)]
+    if depth >= stable_depth:
+        return final
+    return moves[(seed + depth) % len(moves)]
+
+
+class FakeEngine:
+    def __init__(self):
+        self.board = chess.Board()
+        self.options = {name: default for name, (_, default, _) in OPTIONS.items()}
+        self.search_thread = None
+        self.stop_event = threading.Event()
+        self.ponderhit_event = threading.Event()
+
+    def handle(self, line):
+        parts = line.split()
+        if not parts:
+            return True
+        command = parts[0]
+        if command == "uci":
+            send("id name FakeUCI")
+            send("id author LLM-Chess-Agent")
+            for name, (kind, default, extra) in OPTIONS.items():
+                send(f"option name {name} type {kind} default {default} {extra}".rstrip())
+            send("uciok")
+        elif command == "isready":
+            send("readyok")
+        elif command == "setoption":
+            self.setoption(parts)
+        elif command == "ucinewgame":
+            self.board = chess.Board()
+        elif command == "position":
+            self.position(parts[1:])
+        elif command == "go":
+            self.go(parts[1:])
+        elif command == "stop":
+            self.stop_event.set()
+            self.wait_search()
+        elif command == "ponderhit":
+            self.ponderhit_event.set()
+        elif command == "quit":
+            self.stop_event.set()
+            self.wait_search()
+            return False
+        return True
+
+    def setoption(self, parts):
+        if "value" in parts:
+            index = parts.index("value")
+            name, value = " ".join(parts[2:index]), " ".join(parts[index + 1:])
+        else:
+            name, value = " ".join(parts[2:]), None
+        if name in self.options:
+            self.options[name] = value
+
+    def position(self, args):
+        if args[0] == "startpos":
+            board, rest = chess.Board(), args[1:]
+        else:
+            board, rest = chess.Board(" ".join(args[1:7])), args[7:]
+        if rest and rest[0] == "moves":
+            for uci in rest[1:]:
+                board.push_uci(uci)
+        self.board = board
+
+    def go(self, args):
+        self.wait_search()
+        if random.randint(1, 100) <= int(self.options["CrashRate"]):
+            sys.exit(1)
+        params = {}
+        flags = set()
+        i = 0
+        while i < len(args):
+            if args[i] in ("infinite", "ponder"):
+                flags.add(args[i])
+                i += 1
+            elif args[i] == "searchmoves":
+                break
+            else:
+                params[args[i]] = int(args[i + 1])
+                i += 2
+        self.stop_event.clear()
+        self.ponderhit_event.clear()
+        self.search_thread = threading.Thread(target=self.search, args=(self.board.copy(), params, flags), daemon=True)
+        self.search_thread.start()
+
+    def wait_search(self):
+        if self.search_thread is not None:
+            self.search_thread.join()
+            self.search_thread = None
+
+    def budget(self, board, params):
+        """Seconds to think for, or None when only depth/nodes/stop end the search."""
+        if "movetime" in params:
+            return params["movetime"] / 1000
+        clock = params.get("wtime" if board.turn == chess.WHITE else "btime")
+        if clock is not None:
+            inc = params.get("winc" if board.turn == chess.WHITE else "binc", 0)
+            return (clock / params.get("movestogo", 30) + inc * 0.8) / 1000
+        return None
+
+    def search(self, board, params, flags):
+        depth_time = int(self.options["DepthTime"]) / 1000
+        stable_depth = int(self.options["StableDepth"])
+        waiting = bool(flags)  # infinite/ponder searches run until stop (or ponderhit)
+        start = time.perf_counter()
+        budget = None if waiting else self.budget(board, params)
+        best = pick_move(board, 1, stable_depth)
+        depth = 0
+        nodes = 0
+        while best is not None:
+            if self.stop_event.is_set():
+                break
+            if waiting and "ponder" in flags and self.ponderhit_event.is_set():
+                waiting = False
+                start = time.perf_counter()
+                budget = self.budget(board, params)
+            if not waiting:
+                if "depth" in params and depth >= params["depth"]:
+                    break
+                if "nodes" in params and nodes >= params["nodes"]:
+                    break
+                if budget is not None and time.perf_counter() - start + depth_time > budget and depth > 0:
+                    break
+            if depth >= 64:
+                if waiting:
+                    self.stop_event.wait(0.01)
+                    continue
+                break
+            depth += 1
+            nodes += 1000 * depth
+            if depth_time:
+                time.sleep(depth_time)
+            best = pick_move(board, depth, stable_depth)
+            elapsed = max(time.perf_counter() - start, 1e-6)
+            pv = best.uci()
+            board.push(best)
+            reply = pick_move(board, depth, stable_depth)
+            score = -evaluate(board)
+            board.pop()
+            if reply is not None:
+                pv += " " + reply.uci()
+            send(f"info depth {depth} seldepth {depth} multipv 1 score cp {score} nodes {nodes} "
+                 f"nps {int(nodes / elapsed)} time {int(elapsed * 1000)} pv {pv}")
+        if best is None:
+            send("info depth 0 score mate 0" if board.is_checkmate() else "info depth 0 score cp 0")
+            send("bestmove (none)")
+            return
+        board.push(best)
+        reply = pick_move(board, depth, stable_depth)
+        if reply is not None and random.randint(1, 100) <= int(self.options["MissRate"]):
+            others = [move for move in board.legal_moves if move != pick_move(board, 64, stable_depth)]
+            reply = random.choice(others) if others else reply
+        send(f"bestmove {best.uci()}" + (f" ponder {reply.uci()}" if reply else ""))
+
+
+def main():
+    engine = FakeEngine()
+    for line in sys.stdin:
+        if not engine.handle(line):
+            break
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,379 @@
+"""
+Asyncio game orchestrator: many games in one process, on one event loop.
+
+play_chess_v1/v2 block in SimpleEngine.play, so a process plays one game and
+sits idle while the engine thinks. Here every engine is driven through the
+async protocol of chess.engine.popen_uci, and each game is a task, so dozens
+of games share one loop and one thread. The loop can also run an autogen
+SingleThreadedAgentRuntime: AgentPlayer asks an agent for its move with
+runtime.send_message, so LLM agents and engines play each other directly.
+
+    pool = await AsyncEnginePool([sys.executable, "fake_uci_engine.py"], size=8).start()
+    orchestrator = GameOrchestrator()
+    orchestrator.submit(EnginePlayer(pool), EnginePlayer(pool), TimeControl(base=60, increment=1))
+    results = await orchestrator.wait()
+    await pool.close()
+"""
+import asyncio
+import contextlib
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import chess
+import chess.engine
+
+from tracing import tracer
+
+# Extra time a player gets over its clock before it loses on time (process and message overhead)
+TIME_GRACE = 0.5
+
+
+@dataclass
+class TimeControl:
+    """Either a clock per side (base seconds plus increment per move) or, with move_time, a fixed time per move."""
+    base: float = 60.0
+    increment: float = 0.0
+    move_time: Optional[float] = None
+
+
+@dataclass
+class GameResult:
+    game_id: str
+    result: str  # "1-0", "0-1", "1/2-1/2" or "*"
+    termination: str  # "checkmate", "stalemate", "time", "illegal move", "max plies", "cancelled", ...
+    moves: List[str] = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+class AsyncEnginePool:
+    """
+    Warm UCI engines shared by all games on the loop, like EnginePool without threads.
+    An engine is leased for a whole game, so its hash and search state stay with that game.
+    """
+
+    def __init__(self, command, size=4, options=None):
+        self.command = command
+        self.size = size
+        self.options = options or {}
+        self._idle: asyncio.Queue = asyncio.Queue()
+        self._engines = []
+        self._spawning = asyncio.Lock()  # Concurrent lazy starts must not spawn more than size engines
+        self.restarts = 0
+
+    async def _spawn(self) -> chess.engine.UciProtocol:
+        _, engine = await chess.engine.popen_uci(self.command)
+        if self.options:
+            await engine.configure(self.options)
+        self._engines.append(engine)
+        return engine
+
+    async def start(self) -> "AsyncEnginePool":
+        """Start every engine up front (otherwise they start on first use)."""
+        async with self._spawning:
+            engines = await asyncio.gather(*(self._spawn() for _ in range(self.size - len(self._engines))))
+        for engine in engines:
+            self._idle.put_nowait(engine)
+        return self
+
+    async def acquire(self) -> chess.engine.UciProtocol:
+        if self._idle.empty():
+            async with self._spawning:
+                if self._idle.empty() and len(self._engines) < self.size:
+                    return await self._spawn()
+        return await self._idle.get()
+
+    async def release(self, engine: chess.engine.UciProtocol) -> None:
+        """Return the engine once it answers isready; replace it if it died or hangs."""
+        try:
+            await asyncio.wait_for(engine.ping(), timeout=5)
+        except (chess.engine.EngineError, asyncio.TimeoutError):
+            async with self._spawning:  # Its slot is free until the replacement is up
+                self._engines.remove(engine)
+                with contextlib.suppress(Exception):
+                    await asyncio.wait_for(engine.quit(), timeout=1)
+                self.restarts += 1
+                tracer.count("retries_total", kind="engine_restart")
+                engine = await self._spawn()
+        self._idle.put_nowait(engine)
+
+    async def close(self) -> None:
+        for engine in self._engines:
+            with contextlib.suppress(Exception):
+                await asyncio.wait_for(engine.quit(), timeout=5)
+        self._engines.clear()
+
+
+class EnginePlayer:
+    """Plays with an engine leased from an AsyncEnginePool for the duration of one game."""
+
+    def __init__(self, pool: AsyncEnginePool, name: str = "engine") -> None:
+        self.pool = pool
+        self.name = name
+        self.engine: Optional[chess.engine.UciProtocol] = None
+        self._game = None
+
+    async def start(self, game_id: str) -> None:
+        self.engine = await self.pool.acquire()
+        self._game = game_id  # A new game key makes python-chess send ucinewgame
+
+    async def choose(self, board: chess.Board, limit: chess.engine.Limit) -> chess.Move:
+        result = await self.engine.play(board, limit, game=self._game)
+        return result.move
+
+    async def finish(self) -> None:
+        if self.engine is not None:
+            engine, self.engine = self.engine, None
+            await self.pool.release(engine)
+
+
+@dataclass
+class MoveRequest:
+    """Asks an agent for its move; the agent replies with a UCI string within time_left seconds."""
+    game_id: str
+    fen: str
+    moves: List[str]
+    time_left: float
+
+
+class AgentPlayer:
+    """Gets its moves from an autogen agent running on the same event loop."""
+
+    def __init__(self, runtime, agent_id, name: str = "agent") -> None:
+        self.runtime = runtime
+        self.agent_id = agent_id
+        self.name = name
+        self.last_error: Optional[Exception] = None
+        self._game = None
+
+    async def start(self, game_id: str) -> None:
+        self._game = game_id
+
+    async def choose(self, board: chess.Board, limit: chess.engine.Limit) -> chess.Move:
+        """
+        The agent's move; a reply that is not a UCI move, or an agent that fails, gives the null move (illegal).
+        Failed calls are counted as agent_errors_total, apart from the illegal replies.
+        """
+        time_left = limit.time if limit.time is not None else (
+            limit.white_clock if board.turn == chess.WHITE else limit.black_clock)
+        try:
+            reply = await self.runtime.send_message(
+                MoveRequest(self._game, board.fen(), [move.uci() for move in board.move_stack], time_left),
+                self.agent_id,
+            )
+        except Exception as error:  # Forfeits this game only, not every game on the loop
+            tracer.count("agent_errors_total", kind=type(error).__name__)
+            self.last_error = error
+            return chess.Move.null()
+        try:
+            return chess.Move.from_uci(reply.strip())
+        except (AttributeError, ValueError) as error:
+            tracer.count("illegal_llm_moves_total")
+            self.last_error = error
+            return chess.Move.null()
+
+    async def finish(self) -> None:
+        pass
+
+
+def _termination(board: chess.Board) -> str:
+    outcome = board.outcome(claim_draw=True)
+    return outcome.termination.name.lower().replace("_", " ")
+
+
+async def play_game(white, black, time_control: Optional[TimeControl] = None, game_id: str = "game",
+                    max_plies: Optional[int] = None, stop: Optional[asyncio.Event] = None) -> GameResult:
+    """
+    Play one game between two players (anything with async start/choose/finish).
+    Clocks are kept here: a player that overruns its clock (plus TIME_GRACE) loses on
+    time, and an illegal move loses the game. Setting `stop` ends the game as "*"
+    before the next move; cancelling the task also interrupts the move being thought.
+    """
+    time_control = time_control or TimeControl()
+    players = {chess.WHITE: white, chess.BLACK: black}
+    clocks = {chess.WHITE: time_control.base, chess.BLACK: time_control.base}
+    board = chess.Board()
+    start = time.perf_counter()
+    result = None
+    try:
+        await asyncio.gather(white.start(game_id), black.start(game_id))
+        while result is None:
+            if stop is not None and stop.is_set():
+                result = GameResult(game_id, "*", "cancelled")
+                break
+            if board.is_game_over(claim_draw=True):
+                result = GameResult(game_id, board.result(claim_draw=True), _termination(board))
+                break
+            if max_plies is not None and len(board.move_stack) >= max_plies:
+                result = GameResult(game_id, "*", "max plies")  # Unfinished, not a draw
+                break
+            turn = board.turn
+            if time_control.move_time is not None:
+                limit = chess.engine.Limit(time=time_control.move_time)
+                budget = time_control.move_time
+            else:
+                limit = chess.engine.Limit(white_clock=clocks[chess.WHITE], black_clock=clocks[chess.BLACK],
+                                           white_inc=time_control.increment, black_inc=time_control.increment)
+                budget = clocks[turn]
+
+            move_start = time.perf_counter()
+            try:
+                with tracer.span("engine_think", game=game_id, ply=len(board.move_stack) + 1,
+                                 player=players[turn].name):
+                    move = await asyncio.wait_for(players[turn].choose(board, limit), timeout=budget + TIME_GRACE)
+            except asyncio.TimeoutError:
+                move = None
+            used = time.perf_counter() - move_start
+            if time_control.move_time is None:
+                clocks[turn] -= used
+            if move is None or used > budget + TIME_GRACE or (time_control.move_time is None and clocks[turn] < 0):
+                result = GameResult(game_id, "0-1" if turn == chess.WHITE else "1-0", "time")
+            elif move not in board.legal_moves:
+                result = GameResult(game_id, "0-1" if turn == chess.WHITE else "1-0", "illegal move")
+            else:
+                board.push(move)
+                if time_control.move_time is None:
+                    clocks[turn] += time_control.increment
+    except asyncio.CancelledError:
+        result = GameResult(game_id, "*", "cancelled")  # Returned with the moves so far instead of raised
+    except chess.engine.EngineError:
+        result = GameResult(game_id, "*", "engine error")  # EnginePool.release() replaces the engine
+    finally:
+        result = result or GameResult(game_id, "*", "error")
+        result.moves = [move.uci() for move in board.move_stack]
+        result.elapsed = time.perf_counter() - start
+        # Return leased engines even when cancelled; shielded so a second cancel cannot leak them
+        await asyncio.shield(asyncio.gather(white.finish(), black.finish(), return_exceptions=True))
+    return result
+
+
+class GameOrchestrator:
+    """
+    Runs games as tasks on the current event loop. submit() starts a game and returns its id;
+    cancel() stops one; wait() returns the results of every game submitted so far.
+    """
+
+    def __init__(self, max_plies: Optional[int] = None) -> None:
+        self.max_plies = max_plies
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self._stops: Dict[str, asyncio.Event] = {}
+        self._ids = itertools.count(1)
+
+    def submit(self, white, black, time_control: Optional[TimeControl] = None, game_id: Optional[str] = None) -> str:
+        game_id = game_id or f"game-{next(self._ids)}"
+        self._stops[game_id] = asyncio.Event()
+        self.tasks[game_id] = asyncio.ensure_future(
+            play_game(white, black, time_control, game_id, max_plies=self.max_plies, stop=self._stops[game_id]))
+        return game_id
+
+    def cancel(self, game_id: str) -> bool:
+        """Stop a game, interrupting the current move; False if it already finished."""
+        task = self.tasks.get(game_id)
+        if task is None or task.done():
+            return False
+        # The event also covers a cancel that lands just as a move completes, which wait_for can swallow
+        self._stops[game_id].set()
+        task.cancel()
+        return True
+
+    async def wait(self) -> List[GameResult]:
+        """
+        Results in submission order. Cancelled games are reported with result "*", and so is a game
+        whose task failed (termination "error"), without affecting the others.
+        """
+        tasks = dict(self.tasks)
+        outcomes = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        results = []
+        for game_id, outcome in zip(tasks, outcomes):
+            if isinstance(outcome, asyncio.CancelledError):  # Cancelled before it started
+                outcome = GameResult(game_id, "*", "cancelled")
+            elif isinstance(outcome, BaseException):
+                outcome = GameResult(game_id, "*", "error")
+            results.append(outcome)
+        return results
+
+
+if __name__ == "__main__":
+    import argparse
+    import random
+    import sys
+
+    from autogen_core import AgentId, MessageContext, RoutedAgent, SingleThreadedAgentRuntime, message_handler
+
+    parser = argparse.ArgumentParser(description="Play many engine and agent games concurrently on one event loop.")
+    parser.add_argument("--engine", default=None, help="UCI engine command (default: the bundled fake engine)")
+    parser.add_argument("--games", type=int, default=24, help="Engine-vs-engine games")
+    parser.add_argument("--agent-games", type=int, default=8, help="Engine-vs-agent games, with the agent on the same loop")
+    parser.add_argument("--engines", type=int, default=None, help="Warm engines (default: enough for every game)")
+    parser.add_argument("--move-time", type=float, default=0.02, help="Seconds per move")
+    parser.add_argument("--max-plies", type=int, default=40)
+    parser.add_argument("--cancel", type=int, default=1, help="Games to cancel midway, to show cancellation")
+    parser.add_argument("--no-sequential", action="store_true", help="Skip the blocking one-game-at-a-time baseline")
+    args = parser.parse_args()
+
+    command = args.engine or [sys.executable, "fake_uci_engine.py"]
+    time_control = TimeControl(move_time=args.move_time)
+
+    class RandomMoveAgent(RoutedAgent):
+        """Stands in for an LLM player: answers MoveRequests with a random legal move."""
+
+        def __init__(self, name: str) -> None:
+            super().__init__(name)
+            self.rng = random.Random(0)
+
+        @message_handler
+        async def handle_move_request(self, message: MoveRequest, ctx: MessageContext) -> str:
+            await asyncio.sleep(args.move_time)  # Thinking time of a remote model
+            return self.rng.choice(list(chess.Board(message.fen).legal_moves)).uci()
+
+    async def main() -> None:
+        runtime = SingleThreadedAgentRuntime()
+        await RandomMoveAgent.register(runtime, "random_player", lambda: RandomMoveAgent("random_player"))
+        runtime.start()
+        pool = await AsyncEnginePool(command, size=args.engines or 2 * args.games + args.agent_games).start()
+        orchestrator = GameOrchestrator(max_plies=args.max_plies)
+        start = time.perf_counter()
+        cpu_start = time.process_time()
+        for _ in range(args.games):
+            orchestrator.submit(EnginePlayer(pool, "engine"), EnginePlayer(pool, "engine"), time_control)
+        for i in range(args.agent_games):
+            agent = AgentPlayer(runtime, AgentId("random_player", f"agent-{i}"), "agent")
+            orchestrator.submit(EnginePlayer(pool, "engine"), agent, time_control)
+        if args.cancel:
+            await asyncio.sleep(args.move_time * args.max_plies / 4)
+            for game_id in list(orchestrator.tasks)[:args.cancel]:
+                orchestrator.cancel(game_id)
+        results = await orchestrator.wait()
+        elapsed = time.perf_counter() - start
+        cpu = time.process_time() - cpu_start
+        await runtime.stop()
+        await pool.close()
+
+        plies = sum(len(result.moves) for result in results)
+        terminations = {}
+        for result in results:
+            terminations[result.termination] = terminations.get(result.termination, 0) + 1
+        print(f"asyncio: {len(results)} games, {plies} plies in {elapsed:.2f}s "
+              f"({plies / elapsed:.0f} plies/s, {cpu:.2f}s CPU in this process)")
+        print(f"  terminations: {terminations}, engine restarts: {pool.restarts}")
+        return plies / elapsed
+
+    async_rate = asyncio.run(main())
+
+    if not args.no_sequential:
+        # The blocking loop of play_chess_v1 on the same engines, limited to a few games to keep it short
+        games = min(4, args.games)
+        engines = [chess.engine.SimpleEngine.popen_uci(command) for _ in range(2)]
+        plies, start = 0, time.perf_counter()
+        for _ in range(games):
+            board = chess.Board()
+            while not board.is_game_over() and len(board.move_stack) < args.max_plies:
+                engine = engines[len(board.move_stack) % 2]
+                board.push(engine.play(board, chess.engine.Limit(time=args.move_time)).move)
+                plies += 1
+        elapsed = time.perf_counter() - start
+        for engine in engines:
+            engine.quit()
+        print(f"blocking SimpleEngine: {games} games, {plies} plies in {elapsed:.2f}s ({plies / elapsed:.0f} plies/s); "
+              f"asyncio is {async_rate / (plies / elapsed):.1f}x")
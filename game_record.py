@@ -0,0 +1,280 @@
+"""
+Compact, append-only record of one game, replacing per-ply SVG snapshots.
+
+File layout: the 4-byte magic b"CGR1", then a stream of 16-bit big-endian words.
+- A word with the top bit clear is a move: from | to << 6 | promotion << 12.
+  The word 0 (a null move) stands for an unknown move, used when migrating
+  snapshots that are not one legal move apart.
+- A word with the top bit set starts a checkpoint: its low 15 bits give the
+  length of the FEN that follows. The FEN is the position after all moves so
+  far. Checkpoints are written every `checkpoint_every` plies and after
+  unknown moves.
+
+Any ply is rebuilt from the nearest checkpoint at or before it. An incomplete
+record at the end of the file (a crash mid-write) is ignored and then
+overwritten by the next append.
+"""
+import bisect
+import glob
+import os
+import re
+import struct
+from array import array
+
+import chess
+import chess.svg
+
+MAGIC = b"CGR1"
+CHECKPOINT_FLAG = 0x8000
+WORD = struct.Struct(">H")
+
+
+def pack_move(move):
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def unpack_move(word):
+    return chess.Move(word & 0x3F, (word >> 6) & 0x3F, (word >> 12) or None)
+
+
+class GameRecord:
+    """
+    Move list plus periodic FEN checkpoints for one game, stored in `path`.
+
+    record.append(move) writes two bytes; record.board(ply) returns the position
+    after `ply` plies (0 is the start), and render_svg/render_png draw any ply on demand.
+    """
+
+    def __init__(self, path, checkpoint_every=32, starting_fen=chess.STARTING_FEN, readonly=False):
+        self.path = path
+        self.checkpoint_every = checkpoint_every
+        self.moves = array("H")
+        self.checkpoints = {}  # ply -> FEN of the position after that many plies
+        self._board = None  # Position after the last ply, kept while appending
+        self._file = None
+
+        valid_size = self._load() if os.path.exists(path) else 0
+        if readonly:
+            return
+        self._file = open(path, "r+b" if valid_size else "wb")
+        self._file.truncate(valid_size)
+        self._file.seek(valid_size)
+        if not valid_size:
+            self._file.write(MAGIC)
+            if starting_fen != chess.STARTING_FEN:
+                self._write_checkpoint(chess.Board(starting_fen))
+
+    def _load(self):
+        """Read moves and checkpoints; returns the size of the valid prefix of the file."""
+        with open(self.path, "rb") as f:
+            data = f.read()
+        if data[:4] != MAGIC:
+            if data:
+                raise ValueError(f"{self.path} is not a game record")
+            return 0
+        offset = valid = 4
+        while offset + 2 <= len(data):
+            (word,) = WORD.unpack_from(data, offset)
+            offset += 2
+            if word & CHECKPOINT_FLAG:
+                length = word & ~CHECKPOINT_FLAG
+                if offset + length > len(data):
+                    break
+                self.checkpoints[len(self.moves)] = data[offset:offset + length].decode("ascii")
+                offset += length
+            else:
+                self.moves.append(word)
+            valid = offset
+        return valid
+
+    def __len__(self):
+        return len(self.moves)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def append(self, move, board_after=None):
+        """
+        Record the next move. Pass the position after it as `board_after` when the caller
+        already has it; otherwise the record keeps its own board for checkpoints.
+        A null move records an unknown move and requires `board_after`.
+        """
+        if self._file is None:
+            raise ValueError(f"{self.path} is open read-only")
+        if not move and board_after is None:
+            raise ValueError("an unknown move needs the position after it")
+        if board_after is None:
+            board_after = self._current_board()
+            board_after.push(move)
+        else:
+            self._board = None  # The caller's board keeps changing; rebuild from the record when needed
+        self.moves.append(pack_move(move))
+        self._file.write(WORD.pack(self.moves[-1]))
+        if not move or len(self.moves) % self.checkpoint_every == 0:
+            self._write_checkpoint(board_after)
+
+    def _current_board(self):
+        if self._board is None:
+            self._board = self.board(len(self.moves))
+        return self._board
+
+    def _write_checkpoint(self, board):
+        fen = board.fen().encode("ascii")
+        self.checkpoints[len(self.moves)] = fen.decode("ascii")
+        self._file.write(WORD.pack(CHECKPOINT_FLAG | len(fen)) + fen)
+
+    def board(self, ply):
+        """The position after `ply` plies (negative counts from the end)."""
+        if ply < 0:
+            ply += len(self.moves) + 1
+        if not 0 <= ply <= len(self.moves):
+            raise IndexError(f"ply {ply} out of range 0..{len(self.moves)}")
+        plies = sorted(self.checkpoints)
+        index = bisect.bisect_right(plies, ply) - 1
+        start = plies[index] if index >= 0 else 0
+        board = chess.Board(self.checkpoints[start]) if index >= 0 else chess.Board()
+        for word in self.moves[start:ply]:
+            board.push(unpack_move(word))
+        return board
+
+    def last_move(self, ply):
+        """The move that led to `ply`, or None at the start or after an unknown move."""
+        if ply < 0:
+            ply += len(self.moves) + 1
+        return unpack_move(self.moves[ply - 1]) if ply > 0 and self.moves[ply - 1] else None
+
+    def render_svg(self, ply, path=None, size=400):
+        svg = chess.svg.board(self.board(ply), lastmove=self.last_move(ply), size=size, coordinates=False)
+        if path:
+            with open(path, "w") as f:
+                f.write(svg)
+        return svg
+
+    def render_png(self, ply, path, size=800):
+        import cv2
+        from board_renderer import BoardRenderer
+
+        frame = BoardRenderer(size=size).render(self.board(ply), lastmove=self.last_move(ply))
+        cv2.imwrite(path, frame)
+
+    def flush(self):
+        if self._file:
+            self._file.flush()
+
+    def close(self):
+        if self._file:
+            self._file.close()
+            self._file = None
+
+
+def _snapshot_placement(path):
+    """Piece placement of a chess.svg snapshot, read from the ASCII board in its <desc>."""
+    with open(path) as f:
+        match = re.search(r"<pre>(.*?)</pre>", f.read(), re.S)
+    if not match:
+        raise ValueError(f"{path} has no board description")
+    board = chess.Board(None)
+    for rank, line in zip(range(7, -1, -1), match.group(1).strip().splitlines()):
+        for file, symbol in enumerate(line.split()):
+            if symbol != ".":
+                board.set_piece_at(chess.square(file, rank), chess.Piece.from_symbol(symbol))
+    return board.board_fen()
+
+
+def migrate(images_dir, output_path, checkpoint_every=32):
+    """
+    Convert an images/board_{n}.svg series into a game record.
+
+    Consecutive snapshots one legal move apart become moves. Repeated snapshots are
+    skipped, and anything else is kept as an unknown move plus a checkpoint.
+    Returns a summary with the sizes before and after.
+    """
+    paths = sorted(glob.glob(os.path.join(images_dir, "board_*.svg")),
+                   key=lambda p: int(re.search(r"board_(\d+)\.svg$", p).group(1)))
+    if not paths:
+        raise ValueError(f"no board_*.svg files in {images_dir}")
+    placements = [_snapshot_placement(path) for path in paths]
+
+    board = chess.Board()
+    if placements[0] != board.board_fen():
+        board = chess.Board(placements[0] + " w - - 0 1")
+    unknown = 0
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    with GameRecord(output_path, checkpoint_every, starting_fen=board.fen()) as record:
+        for placement in placements[1:]:
+            if placement == board.board_fen():
+                continue
+            move = next((m for m in board.legal_moves if _placement_after(board, m) == placement), None)
+            if move is not None:
+                board.push(move)
+                record.append(move, board)
+            else:
+                unknown += 1
+                turn = "b" if board.turn == chess.WHITE else "w"
+                board = chess.Board(f"{placement} {turn} - - 0 {board.fullmove_number}")
+                record.append(chess.Move.null(), board)
+        plies = len(record)
+
+    svg_bytes = sum(os.path.getsize(path) for path in paths)
+    record_bytes = os.path.getsize(output_path)
+    return {
+        "snapshots": len(paths),
+        "plies": plies,
+        "unknown_moves": unknown,
+        "svg_bytes": svg_bytes,
+        "record_bytes": record_bytes,
+        "saving": 1 - record_bytes / svg_bytes,
+    }
+
+
+def _placement_after(board, move):
+    board.push(move)
+    try:
+        return board.board_fen()
+    finally:
+        board.pop()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Inspect, render or migrate compact game records.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = subparsers.add_parser("migrate", help="Convert an images/ directory of SVG snapshots")
+    migrate_parser.add_argument("images", nargs="?", default="images")
+    migrate_parser.add_argument("-o", "--output", default="chess_game.cgr")
+    migrate_parser.add_argument("--delete", action="store_true", help="Remove the SVGs after a lossless migration")
+
+    show_parser = subparsers.add_parser("show", help="Print or render one ply of a record")
+    show_parser.add_argument("record")
+    show_parser.add_argument("--ply", type=int, default=-1, help="Ply to show (default: the last)")
+    show_parser.add_argument("--svg", help="Write the position as SVG")
+    show_parser.add_argument("--png", help="Write the position as PNG")
+    show_parser.add_argument("--size", type=int, default=800)
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        summary = migrate(args.images, args.output)
+        print(f"{summary['snapshots']} snapshots -> {summary['plies']} plies "
+              f"({summary['unknown_moves']} unknown moves) in {args.output}")
+        print(f"{summary['svg_bytes']:,} bytes of SVG -> {summary['record_bytes']:,} bytes "
+              f"({summary['saving']:.2%} smaller)")
+        if args.delete and not summary["unknown_moves"]:
+            for path in glob.glob(os.path.join(args.images, "board_*.svg")):
+                os.remove(path)
+            print(f"Removed the SVG snapshots from {args.images}")
+    else:
+        with GameRecord(args.record, readonly=True) as record:
+            board = record.board(args.ply)
+            print(f"{len(record)} plies, {len(record.checkpoints)} checkpoints")
+            print(board)
+            print(board.fen())
+            if args.svg:
+                record.render_svg(args.ply, args.svg, size=args.size)
+            if args.png:
+                record.render_png(args.ply, args.png, size=args.size)
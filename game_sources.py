@@ -0,0 +1,39 @@
+"""
+Lazy readers for game archives shared by the offline tools (batch_analysis.py, render_farm.py).
+
+Only python-chess is imported here, so a worker process that just needs the
+games does not pull in the engine pool or the interactive players.
+"""
+import chess
+import chess.pgn
+
+
+def read_tasks(path, start_offset=0, start_index=0):
+    """
+    Yield one task per game (PGN) or position (EPD) from `start_offset` on, lazily.
+    A task is a dict with the game's index, input offset, headers, start FEN and moves.
+    """
+    epd = path.lower().endswith(".epd")
+    index = start_index
+    with open(path, encoding="utf-8-sig", errors="replace") as f:
+        f.seek(start_offset)
+        while True:
+            offset = f.tell()
+            if epd:
+                line = f.readline()
+                if not line:
+                    return
+                if not line.strip():
+                    continue
+                board, operations = chess.Board.from_epd(line)
+                headers = {"id": str(operations["id"])} if "id" in operations else {}
+                task = {"fen": board.fen(), "moves": [], "headers": headers}
+            else:
+                game = chess.pgn.read_game(f)
+                if game is None:
+                    return
+                task = {"fen": game.board().fen(), "headers": dict(game.headers),
+                        "moves": [move.uci() for move in game.mainline_moves()]}
+            task.update(index=index, offset=offset)
+            yield task
+            index += 1
@@ -0,0 +1,533 @@
+"""
+A small in-process alpha-beta engine for games that do not need Stockfish.
+
+LiteEngine answers play() and analyse() like chess.engine.SimpleEngine,
+limits included (depth, nodes, time or clock), so it can stand in for a UCI
+engine in play_game, the tournaments or the agents without a subprocess:
+
+    engine = LiteEngine()
+    result = engine.play(board, chess.engine.Limit(nodes=2000))
+
+The search is iterative-deepening negamax with alpha-beta and a quiescence
+search over captures, which skips captures that cannot raise alpha or that
+trade a more valuable attacker for a defended piece. Moves are ordered by the
+transposition-table move, captures by MVV-LVA, two killer moves per ply and a
+history table. The evaluation is material plus piece-square tables, updated incrementally per
+move instead of rescanning the board. The transposition table is a plain dict
+bounded by the Hash option, cleared when full and on every new game.
+"""
+import time
+
+import chess
+import chess.engine
+
+MATE_SCORE = 100_000
+PIECE_VALUES = {chess.PAWN: 100, chess.KNIGHT: 320, chess.BISHOP: 330, chess.ROOK: 500, chess.QUEEN: 900,
+                chess.KING: 0}
+TT_ENTRY_BYTES = 200  # Rough size of one dict entry (key tuple plus value tuple), to turn Hash MB into entries
+EXACT, LOWER, UPPER = 0, 1, 2
+MAX_PLY = 128  # Scores within this many plies of MATE_SCORE are mates
+DELTA_MARGIN = 200  # Positional slack allowed on top of a capture before quiescence skips it
+
+# Piece-square tables for White from a8 to h1 (as printed), from the Simplified Evaluation Function
+_TABLES = {
+    chess.PAWN: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        50, 50, 50, 50, 50, 50, 50, 50,
+        10, 10, 20, 30, 30, 20, 10, 10,
+        5, 5, 10, 25, 25, 10, 5, 5,
+        0, 0, 0, 20, 20, 0, 0, 0,
+        5, -5, -10, 0, 0, -10, -5, 5,
+        5, 10, 10, -20, -20, 10, 10, 5,
+        0, 0, 0, 0, 0, 0, 0, 0],
+    chess.KNIGHT: [
+        -50, -40, -30, -30, -30, -30, -40, -50,
+        -40, -20, 0, 0, 0, 0, -20, -40,
+        -30, 0, 10, 15, 15, 10, 0, -30,
+        -30, 5, 15, 20, 20, 15, 5, -30,
+        -30, 0, 15, 20, 20, 15, 0, -30,
+        -30, 5, 10, 15, 15, 10, 5, -30,
+        -40, -20, 0, 5, 5, 0, -20, -40,
+        -50, -40, -30, -30, -30, -30, -40, -50],
+    chess.BISHOP: [
+        -20, -10, -10, -10, -10, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 10, 10, 5, 0, -10,
+        -10, 5, 5, 10, 10, 5, 5, -10,
+        -10, 0, 10, 10, 10, 10, 0, -10,
+        -10, 10, 10, 10, 10, 10, 10, -10,
+        -10, 5, 0, 0, 0, 0, 5, -10,
+        -20, -10, -10, -10, -10, -10, -10, -20],
+    chess.ROOK: [
+        0, 0, 0, 0, 0, 0, 0, 0,
+        5, 10, 10, 10, 10, 10, 10, 5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        -5, 0, 0, 0, 0, 0, 0, -5,
+        0, 0, 0, 5, 5, 0, 0, 0],
+    chess.QUEEN: [
+        -20, -10, -10, -5, -5, -10, -10, -20,
+        -10, 0, 0, 0, 0, 0, 0, -10,
+        -10, 0, 5, 5, 5, 5, 0, -10,
+        -5, 0, 5, 5, 5, 5, 0, -5,
+        0, 0, 5, 5, 5, 5, 0, -5,
+        -10, 5, 5, 5, 5, 5, 0, -10,
+        -10, 0, 5, 0, 0, 0, 0, -10,
+        -20, -10, -10, -5, -5, -10, -10, -20],
+    chess.KING: [
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -30, -40, -40, -50, -50, -40, -40, -30,
+        -20, -30, -30, -40, -40, -30, -30, -20,
+        -10, -20, -20, -20, -20, -20, -20, -10,
+        20, 20, 0, 0, 0, 0, 20, 20,
+        20, 30, 10, 0, 0, 10, 30, 20],
+}
+
+# PST[color][piece_type][square]: material plus table, signed from White's point of view
+PST = {color: {} for color in chess.COLORS}
+for _piece_type, _table in _TABLES.items():
+    _white = [PIECE_VALUES[_piece_type] + _table[chess.square_mirror(square)] for square in chess.SQUARES]
+    PST[chess.WHITE][_piece_type] = _white
+    PST[chess.BLACK][_piece_type] = [-_white[chess.square_mirror(square)] for square in chess.SQUARES]
+
+
+def evaluate(board):
+    """Material plus piece-square score from White's point of view, computed from scratch."""
+    return sum(PST[piece.color][piece.piece_type][square] for square, piece in board.piece_map().items())
+
+
+def eval_delta(board, move):
+    """How evaluate() changes when `move` is played, without playing it."""
+    piece_type = board.piece_type_at(move.from_square)
+    color = board.turn
+    table = PST[color]
+    delta = table[move.promotion or piece_type][move.to_square] - table[piece_type][move.from_square]
+    if board.is_en_passant(move):
+        delta -= PST[not color][chess.PAWN][move.to_square + (-8 if color == chess.WHITE else 8)]
+    else:
+        captured = board.piece_type_at(move.to_square)
+        if captured and board.color_at(move.to_square) != color:
+            delta -= PST[not color][captured][move.to_square]
+    if piece_type == chess.KING and abs(move.to_square - move.from_square) == 2:
+        rank = chess.square_rank(move.from_square) * 8
+        rook_from, rook_to = (rank + 7, rank + 5) if move.to_square > move.from_square else (rank, rank + 3)
+        delta += table[chess.ROOK][rook_to] - table[chess.ROOK][rook_from]
+    return delta
+
+
+def capture_order(board, move):
+    """MVV-LVA: the most valuable victim first, the least valuable attacker breaking ties; promotions count too."""
+    victim = board.piece_type_at(move.to_square) or (chess.PAWN if board.is_en_passant(move) else None)
+    order = PIECE_VALUES[victim] * 10 - PIECE_VALUES[board.piece_type_at(move.from_square)] // 10 if victim else 0
+    return order + (PIECE_VALUES[move.promotion] * 10 if move.promotion else 0)
+
+
+def losing_capture(board, move):
+    """A cheap stand-in for static exchange evaluation: a defended victim worth less than its attacker."""
+    if move.promotion or board.is_en_passant(move):
+        return False
+    victim = board.piece_type_at(move.to_square)
+    attacker = board.piece_type_at(move.from_square)
+    return (PIECE_VALUES[attacker] > PIECE_VALUES[victim] + 50
+            and board.is_attacked_by(not board.turn, move.to_square))
+
+
+def _to_tt(score, ply):
+    """Mate scores count plies from the root; the table stores them counted from the position itself."""
+    if score >= MATE_SCORE - MAX_PLY:
+        return score + ply
+    if score <= -(MATE_SCORE - MAX_PLY):
+        return score - ply
+    return score
+
+
+def _from_tt(score, ply):
+    if score >= MATE_SCORE - MAX_PLY:
+        return score - ply
+    if score <= -(MATE_SCORE - MAX_PLY):
+        return score + ply
+    return score
+
+
+class _Stop(Exception):
+    pass
+
+
+class LiteAnalysis:
+    """What LiteEngine.analysis() returns: the InfoDict of each completed depth, then wait() for the best move."""
+
+    def __init__(self, iterations):
+        self._iterations = iterations
+        self.info = {}
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        self.info = next(self._iterations)
+        return self.info
+
+    def stop(self):
+        self._iterations.close()
+
+    def wait(self):
+        """Finish the search (unless stopped) and return its BestMove."""
+        for self.info in self._iterations:
+            pass
+        pv = self.info.get("pv", [])
+        return chess.engine.BestMove(pv[0] if pv else None, pv[1] if len(pv) > 1 else None)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class LiteEngine:
+    """
+    In-process engine with the SimpleEngine methods the game loops use: play(), analyse(),
+    analysis(), configure() and quit(). Not thread-safe; give each game or thread its own instance.
+    """
+
+    def __init__(self, hash_mb=16, default_depth=4):
+        self.id = {"name": "LiteEngine"}
+        self.options = {}
+        self.default_depth = default_depth  # Used when a Limit has neither depth, nodes nor time
+        self.configure({"Hash": hash_mb})
+        self._tt = {}
+        self._history = {}  # (color, from, to) -> cutoff bonus for quiet moves
+        self._game = None
+
+    def configure(self, options):
+        self.options.update(options)
+        self.tt_entries = max(1024, int(self.options.get("Hash", 16)) * 1024 * 1024 // TT_ENTRY_BYTES)
+
+    def new_game(self):
+        self._tt.clear()
+        self._history = {}
+
+    def quit(self):
+        self._tt.clear()
+
+    close = quit
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.quit()
+
+    def play(self, board, limit, *, game=None, info=chess.engine.INFO_NONE, ponder=False, root_moves=None,
+             options=None):
+        """Search like SimpleEngine.play; pondering is accepted and ignored (there is no background search)."""
+        result = self.analyse(board, limit, game=game, root_moves=root_moves, options=options)
+        pv = result.get("pv", [])
+        move = pv[0] if pv else None
+        return chess.engine.PlayResult(move, pv[1] if len(pv) > 1 else None, result if info else {})
+
+    def analyse(self, board, limit, *, game=None, info=chess.engine.INFO_ALL, root_moves=None, options=None, **kwargs):
+        """Iterative deepening within the limit; returns an InfoDict with score, pv, depth, nodes, time and nps."""
+        if options:
+            self.configure(options)
+        if game is not self._game:
+            self._game = game
+            self.new_game()
+        return self._search(board.copy(), limit, root_moves)
+
+    def analysis(self, board, limit=None, *, multipv=None, game=None, info=chess.engine.INFO_ALL, root_moves=None,
+                 options=None):
+        """
+        Like SimpleEngine.analysis, for the time manager: iterate the result for one InfoDict per depth.
+        Nothing runs in the background, so the search only advances while the result is iterated.
+        """
+        if options:
+            self.configure(options)
+        if game is not self._game:
+            self._game = game
+            self.new_game()
+        return LiteAnalysis(self._iterate(board.copy(), limit or chess.engine.Limit(), root_moves))
+
+    def _budget(self, board, limit):
+        """Seconds to think: Limit.time, else a share of the clock, else None."""
+        if limit.time is not None:
+            return limit.time
+        clock, increment = ((limit.white_clock, limit.white_inc) if board.turn == chess.WHITE
+                            else (limit.black_clock, limit.black_inc))
+        if clock is not None:
+            moves_to_go = limit.remaining_moves or 30
+            return max(0.005, min(clock / moves_to_go + (increment or 0.0) * 0.8, clock * 0.5))
+        return None
+
+    def _search(self, board, limit, root_moves):
+        result = {}
+        for result in self._iterate(board, limit, root_moves):
+            pass
+        elapsed = time.perf_counter() - self._start  # Count the nodes of an unfinished last depth too
+        result.update(nodes=self._nodes, time=elapsed, nps=int(self._nodes / elapsed) if elapsed else 0)
+        return result
+
+    def _iterate(self, board, limit, root_moves):
+        """Iterative deepening within the limit: yields the InfoDict of every completed depth."""
+        self._start = start = time.perf_counter()
+        budget = self._budget(board, limit)
+        max_depth = limit.depth or (self.default_depth if budget is None and limit.nodes is None else 64)
+        self._deadline = start + budget if budget is not None else None
+        self._max_nodes = limit.nodes
+        self._nodes = 0
+        self._stoppable = False  # Depth 1 always finishes, so there is always a move to play
+        self._killers = [[None, None] for _ in range(MAX_PLY)]
+        # Positions since the last irreversible move count as repetitions (a draw) in the search
+        self._seen = {}
+        replay = board.copy()
+        while True:
+            self._seen[replay._transposition_key()] = 1
+            if not replay.move_stack or not replay.halfmove_clock:
+                break  # Include the position right after the irreversible move, but nothing before it
+            replay.pop()
+
+        turn = board.turn
+        root_length = len(board.move_stack)
+        moves = [move for move in board.legal_moves if root_moves is None or move in root_moves]
+        if len(moves) <= 1:
+            yield self._info(turn, None, moves[:1], 0)  # Forced (or no) move: nothing to search
+            return
+        root_eval = evaluate(board) if turn == chess.WHITE else -evaluate(board)
+        pv = []
+        for depth in range(1, max_depth + 1):
+            try:
+                score, best = self._root(board, depth, root_eval, moves, pv[0] if pv else None)
+            except _Stop:
+                while len(board.move_stack) > root_length:  # Unwind the moves of the abandoned iteration
+                    board.pop()
+                return
+            pv = self._pv(board, best, depth)
+            moves.sort(key=lambda move: move != best)
+            self._stoppable = True
+            yield self._info(turn, score, pv, depth)
+            if abs(score) >= MATE_SCORE - MAX_PLY or self._out_of_budget(soft=True):
+                return
+
+    def _info(self, turn, score, pv, depth):
+        elapsed = time.perf_counter() - self._start
+        info = {"depth": depth, "nodes": self._nodes, "time": elapsed,
+                "nps": int(self._nodes / elapsed) if elapsed else 0, "pv": pv}
+        if score is not None:
+            mate = MATE_SCORE - abs(score)
+            pov = (chess.engine.Mate((mate + 1) // 2 if score > 0 else -((mate + 1) // 2)) if mate < MAX_PLY
+                   else chess.engine.Cp(score))
+            info["score"] = chess.engine.PovScore(pov, turn)
+        return info
+
+    def _out_of_budget(self, soft=False):
+        if self._max_nodes is not None and self._nodes >= self._max_nodes:
+            return True
+        if self._deadline is None:
+            return False
+        now = time.perf_counter()
+        if soft:  # Between iterations: the next depth would most likely not finish in the time left
+            return now - self._start >= (self._deadline - self._start) * 0.5
+        return now >= self._deadline
+
+    def _root(self, board, depth, root_eval, moves, first):
+        alpha, beta = -MATE_SCORE - 1, MATE_SCORE + 1
+        best = first or moves[0]
+        sign = 1 if board.turn == chess.WHITE else -1
+        for move in moves:
+            delta = eval_delta(board, move)
+            board.push(move)
+            score = -self._negamax(board, depth - 1, -beta, -alpha, 1, -(root_eval + sign * delta))
+            board.pop()
+            if score > alpha:
+                alpha, best = score, move
+        self._store(board._transposition_key(), depth, alpha, EXACT, best)
+        return alpha, best
+
+    def _negamax(self, board, depth, alpha, beta, ply, stm_eval):
+        """Score for the side to move; stm_eval is the incremental evaluation from its point of view."""
+        self._nodes += 1
+        if self._stoppable and (not self._nodes & 127 or self._max_nodes is not None) and self._out_of_budget():
+            raise _Stop
+
+        key = board._transposition_key()
+        if board.halfmove_clock >= 100 or key in self._seen:
+            return 0
+        if depth <= 0:
+            if not any(board.generate_legal_moves()):  # Mate or stalemate at the horizon, not a stand-pat score
+                return -(MATE_SCORE - ply) if board.is_check() else 0
+            return self._quiesce(board, alpha, beta, ply, stm_eval)
+
+        entry = self._tt.get(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, entry_score, flag, tt_move = entry
+            if entry_depth >= depth:
+                entry_score = _from_tt(entry_score, ply)
+                if flag == EXACT:
+                    return entry_score
+                if flag == LOWER and entry_score >= beta:
+                    return entry_score
+                if flag == UPPER and entry_score <= alpha:
+                    return entry_score
+
+        original_alpha = alpha
+        best_score, best_move = -MATE_SCORE - 1, None
+        white = board.turn == chess.WHITE
+        self._seen[key] = self._seen.get(key, 0) + 1
+        try:
+            for move in self._ordered(board, tt_move, ply):
+                delta = eval_delta(board, move)
+                board.push(move)
+                score = -self._negamax(board, depth - 1, -beta, -alpha, ply + 1,
+                                       -(stm_eval + (delta if white else -delta)))
+                board.pop()
+                if score > best_score:
+                    best_score, best_move = score, move
+                    if score > alpha:
+                        alpha = score
+                        if alpha >= beta:
+                            if not board.is_capture(move):
+                                killers = self._killers[ply]
+                                if killers[0] != move:
+                                    killers[1], killers[0] = killers[0], move
+                                history_key = (board.turn, move.from_square, move.to_square)
+                                self._history[history_key] = self._history.get(history_key, 0) + depth * depth
+                            break
+        finally:
+            if self._seen[key] == 1:
+                del self._seen[key]
+            else:
+                self._seen[key] -= 1
+
+        if best_move is None:
+            return -(MATE_SCORE - ply) if board.is_check() else 0  # Checkmate or stalemate
+        flag = UPPER if best_score <= original_alpha else LOWER if best_score >= beta else EXACT
+        self._store(key, depth, _to_tt(best_score, ply), flag, best_move)
+        return best_score
+
+    def _quiesce(self, board, alpha, beta, ply, stm_eval):
+        """Captures (and promotions) only, until the position is quiet; stand pat on the static evaluation."""
+        if stm_eval >= beta:
+            return stm_eval
+        alpha = max(alpha, stm_eval)
+        white = board.turn == chess.WHITE
+        captures = sorted(board.generate_legal_captures(), key=lambda move: capture_order(board, move), reverse=True)
+        for move in captures:
+            delta = eval_delta(board, move)
+            if stm_eval + abs(delta) + DELTA_MARGIN <= alpha:
+                continue  # Delta pruning: even winning this piece cannot raise alpha
+            if losing_capture(board, move):
+                continue
+            self._nodes += 1
+            board.push(move)
+            score = -self._quiesce(board, -beta, -alpha, ply + 1, -(stm_eval + (delta if white else -delta)))
+            board.pop()
+            if score >= beta:
+                return score
+            alpha = max(alpha, score)
+        return alpha
+
+    def _ordered(self, board, tt_move, ply):
+        """TT move, then captures by MVV-LVA, then killers, then quiet moves by history."""
+        killers = self._killers[ply] if ply < len(self._killers) else (None, None)
+        history = self._history
+        turn = board.turn
+        scored = []
+        for move in board.generate_legal_moves():
+            if move == tt_move:
+                order = 1 << 30
+            elif board.is_capture(move) or move.promotion:
+                order = (1 << 20) + capture_order(board, move)
+            elif move == killers[0]:
+                order = 1 << 19
+            elif move == killers[1]:
+                order = (1 << 19) - 1
+            else:
+                order = history.get((turn, move.from_square, move.to_square), 0)
+            scored.append((order, move))
+        scored.sort(key=lambda item: item[0], reverse=True)
+        return [move for _, move in scored]
+
+    def _store(self, key, depth, score, flag, move):
+        if len(self._tt) >= self.tt_entries:
+            self._tt.clear()  # Small and simple: start over rather than track replacement
+        self._tt[key] = (depth, score, flag, move)
+
+    def _pv(self, board, best, depth):
+        """The principal variation: the best move, then TT moves while they stay legal."""
+        pv = [best]
+        board = board.copy(stack=False)
+        board.push(best)
+        seen = {board._transposition_key()}
+        while len(pv) < depth:
+            entry = self._tt.get(board._transposition_key())
+            if entry is None or entry[3] is None or not board.is_legal(entry[3]):
+                break
+            board.push(entry[3])
+            key = board._transposition_key()
+            if key in seen:
+                break
+            seen.add(key)
+            pv.append(entry[3])
+        return pv
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import random
+    import sys
+
+    parser = argparse.ArgumentParser(description="Moves/sec and strength of LiteEngine, against a UCI subprocess.")
+    parser.add_argument("--games", type=int, default=4, help="Self-play games per limit")
+    parser.add_argument("--max-plies", type=int, default=200)
+    parser.add_argument("--depths", type=int, nargs="+", default=[1, 2, 3])
+    parser.add_argument("--nodes", type=int, nargs="+", default=[200, 1000])
+    parser.add_argument("--random-games", type=int, default=10, help="Depth-2 games against a random mover")
+    args = parser.parse_args()
+
+    def self_play(limit):
+        """Moves per second of LiteEngine against itself, whole games from the start position."""
+        moves, start = 0, time.perf_counter()
+        for _ in range(args.games):
+            white, black, board = LiteEngine(), LiteEngine(), chess.Board()
+            engines = {chess.WHITE: white, chess.BLACK: black}
+            while not board.is_game_over(claim_draw=True) and board.ply() < args.max_plies:
+                board.push(engines[board.turn].play(board, limit).move)
+                moves += 1
+        return moves / (time.perf_counter() - start)
+
+    for depth in args.depths:
+        print(f"Limit(depth={depth}): {self_play(chess.engine.Limit(depth=depth)):,.0f} moves/s")
+    for nodes in args.nodes:
+        print(f"Limit(nodes={nodes}): {self_play(chess.engine.Limit(nodes=nodes)):,.0f} moves/s")
+
+    # The same positions through a UCI subprocess that does no search at all: the round trip alone
+    fake = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fake_uci_engine.py")
+    rng, board, boards = random.Random(0), chess.Board(), []
+    while len(boards) < 200:
+        boards.append(board.copy())
+        board = chess.Board() if board.is_game_over() else board
+        board.push(rng.choice(list(board.legal_moves)))
+    with chess.engine.SimpleEngine.popen_uci([sys.executable, fake]) as engine:
+        engine.configure({"DepthTime": 0})
+        start = time.perf_counter()
+        for board in boards:
+            engine.play(board, chess.engine.Limit(depth=1))
+        rate = len(boards) / (time.perf_counter() - start)
+    print(f"UCI subprocess round trip (fake_uci_engine, no search): {rate:,.0f} moves/s")
+
+    wins = 0
+    for game in range(args.random_games):
+        board, engine, color = chess.Board(), LiteEngine(), game % 2 == 0
+        while not board.is_game_over(claim_draw=True) and board.ply() < 300:
+            if board.turn == color:
+                board.push(engine.play(board, chess.engine.Limit(depth=2)).move)
+            else:
+                board.push(rng.choice(list(board.legal_moves)))
+        wins += board.result(claim_draw=True) == ("1-0" if color == chess.WHITE else "0-1")
+    print(f"Depth 2 against a random mover: {wins}/{args.random_games} wins")
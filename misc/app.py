@@ -1,3 +1,4 @@
+import os
 from dataclasses import dataclass
 from autogen_core import (
     AgentId,
@@ -15,15 +16,15 @@ from autogen_core.models import (
     SystemMessage,
     UserMessage,
 )
-from autogen_ext.models.openai import OpenAIChatCompletionClient
+from model_clients import PooledChatCompletionClient, shared_model_client
 
 
-def get_model_client() -> OpenAIChatCompletionClient:
-    """Mimic OpenAI API using Local LLM Server."""
-    return OpenAIChatCompletionClient(
+def get_model_client() -> PooledChatCompletionClient:
+    """Mimic OpenAI API using Local LLM Server (one pooled client shared by every agent)."""
+    return shared_model_client(
         model="llama3.2:1b",
         api_key="NotRequiredSinceWeAreLocal",
-        base_url="http://0.0.0.0:4000",
+        base_url=os.environ.get("LLM_BASE_URL", "http://0.0.0.0:4000"),
         model_capabilities={
             "json_output": False,
             "vision": False,
@@ -0,0 +1,209 @@
+import itertools
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import chess
+from autogen_core import MessageContext, RoutedAgent, message_handler
+
+
+# Session messages: open a game once, then send only moves
+@dataclass
+class OpenSessionMessage:
+    fen: str = chess.STARTING_FEN
+
+
+@dataclass
+class SessionMoveMessage:
+    session_id: str
+    move: str
+
+
+@dataclass
+class SessionLegalMovesMessage:
+    session_id: str
+
+
+@dataclass
+class CloseSessionMessage:
+    session_id: str
+
+
+@dataclass
+class SessionOpened:
+    session_id: str
+    fen: str
+
+
+@dataclass
+class SessionMoveResult:
+    session_id: str
+    move: str
+    legal: bool
+    ply: int
+
+
+@dataclass
+class SessionLegalMoves:
+    session_id: str
+    moves: List[str] = field(default_factory=list)
+
+
+class ChessSession:
+    """
+    A live game held by the agent. Moves are pushed onto the board in place, and
+    the legal-move set is generated once per position and dropped on the next push.
+    """
+
+    __slots__ = ("board", "_legal")
+
+    def __init__(self, fen: str = chess.STARTING_FEN) -> None:
+        self.board = chess.Board(fen)
+        self._legal: Optional[Dict[str, chess.Move]] = None
+
+    def legal_moves(self) -> Dict[str, chess.Move]:
+        if self._legal is None:
+            self._legal = {move.uci(): move for move in self.board.legal_moves}
+        return self._legal
+
+    def push(self, uci: str) -> bool:
+        """Play the move if it is legal here; returns whether it was."""
+        move = self.legal_moves().get(uci)
+        if move is None:
+            return False
+        self.board.push(move)
+        self._legal = None
+        return True
+
+
+class SessionChessAgent(RoutedAgent):
+    """
+    Session handlers shared by the ChessAgents: clients open a game handle and then
+    send only moves, instead of a FEN the agent has to parse on every message.
+    """
+
+    def __init__(self, name: str) -> None:
+        super().__init__(name)
+        self.sessions: Dict[str, ChessSession] = {}
+        self._session_ids = itertools.count(1)
+
+    def _session(self, session_id: str) -> ChessSession:
+        session = self.sessions.get(session_id)
+        if session is None:
+            raise KeyError(f"Unknown session {session_id!r}")
+        return session
+
+    @message_handler
+    async def handle_open_session(self, message: OpenSessionMessage, ctx: MessageContext) -> SessionOpened:
+        session_id = f"{self.id.key}-{next(self._session_ids)}"
+        self.sessions[session_id] = ChessSession(message.fen)
+        print(f"Session {session_id} opened at FEN {message.fen}")
+        return SessionOpened(session_id=session_id, fen=message.fen)
+
+    @message_handler
+    async def handle_session_legal_moves(self, message: SessionLegalMovesMessage, ctx: MessageContext) -> SessionLegalMoves:
+        legal_moves = list(self._session(message.session_id).legal_moves())
+        print(f"Legal moves in session {message.session_id}: {legal_moves}")
+        return SessionLegalMoves(session_id=message.session_id, moves=legal_moves)
+
+    @message_handler
+    async def handle_session_move(self, message: SessionMoveMessage, ctx: MessageContext) -> SessionMoveResult:
+        session = self._session(message.session_id)
+        legal = session.push(message.move)
+        if legal:
+            print(f"Move {message.move} applied in session {message.session_id}.")
+            self.on_session_move(session)
+        else:
+            print(f"Illegal move: {message.move}")
+        return SessionMoveResult(session_id=message.session_id, move=message.move, legal=legal,
+                                 ply=len(session.board.move_stack))
+
+    @message_handler
+    async def handle_close_session(self, message: CloseSessionMessage, ctx: MessageContext) -> None:
+        self.sessions.pop(message.session_id, None)
+        print(f"Session {message.session_id} closed")
+
+    def on_session_move(self, session: ChessSession) -> None:
+        """Called after every legal session move; subclasses can update a UI here."""
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import contextlib
+    import os
+    import random
+    import time
+
+    from autogen_core import AgentId, SingleThreadedAgentRuntime
+    # The agent routes on the classes of the imported module, not on this script's __main__ copies
+    from chess_sessions import CloseSessionMessage, OpenSessionMessage, SessionLegalMovesMessage, SessionMoveMessage
+    from test_chess import ChessAgent, ChessMoveMessage, GetLegalMovesMessage
+
+    parser = argparse.ArgumentParser(description="Messages/sec of FEN messages versus a session.")
+    parser.add_argument("--plies", type=int, default=2000, help="Moves to play (new games start as needed)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # A legal-moves query plus a move per ply, the way a client steps through a game
+    rng = random.Random(args.seed)
+    games, board = [[]], chess.Board()
+    for _ in range(args.plies):
+        if board.is_game_over():
+            games.append([])
+            board = chess.Board()
+        move = rng.choice(list(board.legal_moves))
+        games[-1].append((board.fen(), move.uci()))
+        board.push(move)
+
+    async def run_fen(runtime, agent) -> None:
+        for game in games:
+            for fen, move in game:
+                await runtime.send_message(GetLegalMovesMessage(fen=fen), agent)
+                await runtime.send_message(ChessMoveMessage(fen=fen, move=move), agent)
+
+    async def run_session(runtime, agent) -> None:
+        for game in games:
+            opened = await runtime.send_message(OpenSessionMessage(), agent)
+            for _, move in game:
+                await runtime.send_message(SessionLegalMovesMessage(session_id=opened.session_id), agent)
+                result = await runtime.send_message(SessionMoveMessage(session_id=opened.session_id, move=move), agent)
+                assert result.legal
+            await runtime.send_message(CloseSessionMessage(session_id=opened.session_id), agent)
+
+    async def main() -> None:
+        runtime = SingleThreadedAgentRuntime()
+        await ChessAgent.register(runtime, "chess_agent", lambda: ChessAgent("chess_agent"))
+        runtime.start()
+        agent = AgentId("chess_agent", "default")
+        for label, run in (("FEN", run_fen), ("session", run_session)):
+            start = time.perf_counter()
+            with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                await run(runtime, agent)
+            elapsed = time.perf_counter() - start
+            messages = 2 * args.plies + (2 * len(games) if label == "session" else 0)
+            print(f"{label:>8}: {messages} messages in {elapsed:.2f}s ({messages / elapsed:,.0f} msg/s)")
+        await runtime.stop()
+
+    def handler_work() -> None:
+        """The same work without the runtime, to separate the agent's own cost from message dispatch."""
+        start = time.perf_counter()
+        for game in games:
+            for fen, move in game:
+                [m.uci() for m in chess.Board(fen).legal_moves]
+                board = chess.Board(fen)
+                if chess.Move.from_uci(move) in board.legal_moves:
+                    board.push(chess.Move.from_uci(move))
+                    board.fen()
+        fen_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for game in games:
+            session = ChessSession()
+            for _, move in game:
+                list(session.legal_moves())
+                session.push(move)
+        session_time = time.perf_counter() - start
+        print(f"handler work only: FEN {2 * args.plies / fen_time:,.0f} msg/s, "
+              f"session {2 * args.plies / session_time:,.0f} msg/s")
+
+    asyncio.run(main())
+    handler_work()
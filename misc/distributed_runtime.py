@@ -0,0 +1,304 @@
+"""
+Distributed deployment of the chess agents on autogen's gRPC worker runtime.
+
+A host process (GrpcWorkerAgentRuntimeHost) routes messages between worker
+processes (GrpcWorkerAgentRuntime), so agents no longer share the one core of
+a SingleThreadedAgentRuntime. The host routes by agent type, and each type
+lives on exactly one worker. Every worker therefore registers its agents under
+a shard suffix (chess_agent_0, chess_agent_1, ...), and clients pick the shard
+from the game id with ShardRouter. All messages of a game reach the same
+worker, where the AgentId key (the game id) selects the game's agent instance.
+
+    python distributed_runtime.py host --address localhost:50051
+    python distributed_runtime.py worker --address localhost:50051 --shard 0
+    python distributed_runtime.py worker --address localhost:50051 --shard 1
+    python distributed_runtime.py loadtest --workers 1 2 4
+
+Messages travel by class name, and test_v2 (umpire_agent) and test_v3
+(multiplayer_umpire_agent) each define a UserMessage with different fields.
+No process, worker or client, can therefore load both, and load_agents()
+refuses to. All three agents can share one host only on separate worker sets,
+for example `worker --shard 0 --agents umpire_agent` next to the default
+workers, with each client connecting for the umpire it talks to.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import time
+import zlib
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+
+import chess
+from autogen_core import JSON_DATA_CONTENT_TYPE, AgentId, try_get_known_serializers_for_type
+from autogen_ext.runtimes.grpc import GrpcWorkerAgentRuntime, GrpcWorkerAgentRuntimeHost
+
+from chess_sessions import (CloseSessionMessage, OpenSessionMessage, SessionLegalMoves, SessionLegalMovesMessage,
+                            SessionMoveMessage, SessionMoveResult, SessionOpened)
+
+SESSION_MESSAGES = [OpenSessionMessage, SessionOpened, SessionMoveMessage, SessionMoveResult,
+                    SessionLegalMovesMessage, SessionLegalMoves, CloseSessionMessage]
+DEFAULT_AGENTS = ("chess_agent", "multiplayer_umpire_agent")
+
+
+class NoneSerializer:
+    """
+    Serializer for handlers that return None. The gRPC runtime serializes every RPC
+    result by type name, and autogen has no serializer for NoneType.
+    """
+
+    data_content_type = JSON_DATA_CONTENT_TYPE
+    type_name = "NoneType"
+
+    def serialize(self, message: None) -> bytes:
+        return b"null"
+
+    def deserialize(self, payload: bytes) -> None:
+        return None
+
+
+# Agent name -> loader returning (agent class, factory, message types). Modules are imported only
+# for the agents a process hosts: test_v2 and test_v3 both define a UserMessage.
+AgentSpec = Tuple[type, Callable[[], Any], List[type]]
+
+
+def _chess_agent() -> AgentSpec:
+    from test_chess import ChessAgent, ChessMoveMessage, GetLegalMovesMessage
+    return ChessAgent, (lambda: ChessAgent("chess_agent")), [ChessMoveMessage, GetLegalMovesMessage] + SESSION_MESSAGES
+
+
+def _umpire_agent() -> AgentSpec:
+    from test_v2 import UmpireAgentWrapper, UserMessage
+    return UmpireAgentWrapper, (lambda: UmpireAgentWrapper("umpire_agent")), [UserMessage]
+
+
+def _multiplayer_umpire_agent() -> AgentSpec:
+    from game_shards import GameStore
+    from test_v3 import MultiplayerUmpireAgent, UserMessage
+    store = GameStore()  # One store per worker, shared by all of its games
+    return MultiplayerUmpireAgent, (lambda: MultiplayerUmpireAgent("multiplayer_umpire_agent", store=store)), [UserMessage]
+
+
+AGENTS: Dict[str, Callable[[], AgentSpec]] = {
+    "chess_agent": _chess_agent,
+    "umpire_agent": _umpire_agent,
+    "multiplayer_umpire_agent": _multiplayer_umpire_agent,
+}
+
+
+def load_agents(names: Sequence[str]) -> Dict[str, AgentSpec]:
+    """Specs of the named agents. Messages travel by class name, so the agents' message names must not clash."""
+    loaded = {}
+    seen: Dict[str, type] = {}
+    for name in names:
+        if name not in AGENTS:
+            raise ValueError(f"Unknown agent {name!r}; choose from {', '.join(AGENTS)}")
+        loaded[name] = AGENTS[name]()
+        for message_type in loaded[name][2]:
+            other = seen.setdefault(message_type.__name__, message_type)
+            if other is not message_type:
+                raise ValueError(f"{other.__module__}.{other.__name__} and {message_type.__module__}."
+                                 f"{message_type.__name__} share a wire name; host these agents separately")
+    return loaded
+
+
+def add_serializers(runtime: GrpcWorkerAgentRuntime, agents: Dict[str, AgentSpec]) -> None:
+    runtime.add_message_serializer(NoneSerializer())
+    for _, _, message_types in agents.values():
+        for message_type in message_types:
+            runtime.add_message_serializer(try_get_known_serializers_for_type(message_type))
+
+
+class ShardRouter:
+    """Maps a game id to the worker shard hosting it: a stable hash, the same in every process."""
+
+    def __init__(self, shards: int) -> None:
+        self.shards = shards
+
+    def shard(self, game_id: str) -> int:
+        return zlib.crc32(game_id.encode()) % self.shards
+
+    def agent_id(self, agent: str, game_id: str) -> AgentId:
+        return AgentId(f"{agent}_{self.shard(game_id)}", game_id)
+
+
+async def run_host(address: str) -> None:
+    host = GrpcWorkerAgentRuntimeHost(address=address)
+    host.start()
+    print(f"Host listening on {address}")
+    await host.stop_when_signal()
+
+
+async def run_worker(address: str, shard: int, agent_names: Sequence[str] = DEFAULT_AGENTS, ready=None) -> None:
+    """Host this shard of every agent until SIGINT/SIGTERM."""
+    agents = load_agents(agent_names)
+    runtime = GrpcWorkerAgentRuntime(host_address=address)
+    add_serializers(runtime, agents)
+    runtime.start()
+    for name, (agent_class, factory, _) in agents.items():
+        await agent_class.register(runtime, f"{name}_{shard}", factory)
+    print(f"Worker {shard} serving {', '.join(f'{name}_{shard}' for name in agents)}")
+    if ready is not None:
+        ready.set()
+    await runtime.stop_when_signal()
+
+
+async def connect(address: str, agent_names: Sequence[str] = DEFAULT_AGENTS) -> GrpcWorkerAgentRuntime:
+    """A client runtime that can send the named agents' messages and decode their replies."""
+    runtime = GrpcWorkerAgentRuntime(host_address=address)
+    add_serializers(runtime, load_agents(agent_names))
+    runtime.start()
+    return runtime
+
+
+def _host_main(address: str, quiet: bool) -> None:
+    if quiet:
+        sys.stdout = open(os.devnull, "w")
+    asyncio.run(run_host(address))
+
+
+def _worker_main(address: str, shard: int, agent_names: Sequence[str], ready, quiet: bool) -> None:
+    if quiet:
+        sys.stdout = open(os.devnull, "w")  # The agents print every move
+    asyncio.run(run_worker(address, shard, agent_names, ready))
+
+
+class LocalCluster:
+    """A host process and `workers` worker processes on this machine, for tests and load tests."""
+
+    def __init__(self, workers: int, agent_names: Sequence[str] = DEFAULT_AGENTS, address: str = None,
+                 quiet: bool = True) -> None:
+        self.workers = workers
+        self.agent_names = list(agent_names)
+        self.address = address or f"localhost:{_free_port()}"
+        self.quiet = quiet
+        self.router = ShardRouter(workers)
+        self._context = multiprocessing.get_context("spawn")  # gRPC does not survive fork
+        self._processes: List[multiprocessing.Process] = []
+
+    def start(self, timeout: float = 60.0) -> "LocalCluster":
+        host = self._context.Process(target=_host_main, args=(self.address, self.quiet), daemon=True)
+        host.start()
+        self._processes.append(host)
+        ready = []
+        for shard in range(self.workers):
+            event = self._context.Event()
+            worker = self._context.Process(target=_worker_main, daemon=True,
+                                           args=(self.address, shard, self.agent_names, event, self.quiet))
+            worker.start()
+            self._processes.append(worker)
+            ready.append(event)
+        deadline = time.monotonic() + timeout
+        for shard, event in enumerate(ready):
+            if not event.wait(max(0.0, deadline - time.monotonic())):
+                self.stop()
+                raise RuntimeError(f"Worker {shard} did not register within {timeout} s")
+        return self
+
+    def stop(self) -> None:
+        for process in reversed(self._processes):  # Workers first, then the host
+            process.terminate()
+        for process in self._processes:
+            process.join(timeout=10)
+        self._processes.clear()
+
+    def __enter__(self) -> "LocalCluster":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("localhost", 0))
+        return s.getsockname()[1]
+
+
+def random_game(plies: int, rng: random.Random) -> List[str]:
+    board = chess.Board()
+    moves = []
+    while len(moves) < plies and not board.is_game_over():
+        move = rng.choice(list(board.legal_moves))
+        board.push(move)
+        moves.append(move.uci())
+    return moves
+
+
+async def load_test(cluster: LocalCluster, games: int, plies: int, seed: int = 0) -> Dict[str, float]:
+    """
+    Play `games` concurrent games against the cluster: half through ChessAgent sessions,
+    half through MultiplayerUmpireAgent, every move one RPC. Returns messages per second.
+    """
+    runtime = await connect(cluster.address, cluster.agent_names)
+    rng = random.Random(seed)
+    scripts = [random_game(plies, rng) for _ in range(games)]
+    messages = 0
+
+    async def session_game(game_id: str, moves: List[str]) -> None:
+        nonlocal messages
+        agent = cluster.router.agent_id("chess_agent", game_id)
+        session = await runtime.send_message(OpenSessionMessage(), agent)
+        for move in moves:
+            await runtime.send_message(SessionMoveMessage(session_id=session.session_id, move=move), agent)
+        await runtime.send_message(CloseSessionMessage(session_id=session.session_id), agent)
+        messages += len(moves) + 2
+
+    async def umpired_game(game_id: str, moves: List[str]) -> None:
+        nonlocal messages
+        from test_v3 import UserMessage
+        agent = cluster.router.agent_id("multiplayer_umpire_agent", game_id)
+        for ply, move in enumerate(moves):
+            await runtime.send_message(UserMessage(content=move, player=f"Player {ply % 2 + 1}"), agent)
+        messages += len(moves)
+
+    kinds = [kind for kind in (session_game if "chess_agent" in cluster.agent_names else None,
+                               umpired_game if "multiplayer_umpire_agent" in cluster.agent_names else None) if kind]
+    start = time.perf_counter()
+    try:
+        await asyncio.gather(*(kinds[i % len(kinds)](f"game-{i}", script) for i, script in enumerate(scripts)))
+    finally:
+        elapsed = time.perf_counter() - start
+        await runtime.stop()
+    shards = [cluster.router.shard(f"game-{i}") for i in range(games)]
+    return {
+        "workers": cluster.workers,
+        "messages": messages,
+        "elapsed_s": elapsed,
+        "messages_per_second": messages / elapsed if elapsed else 0.0,
+        "games_per_worker": [shards.count(shard) for shard in range(cluster.workers)],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chess agents on autogen's distributed gRPC runtime.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    host_parser = commands.add_parser("host", help="Run the message-routing host")
+    host_parser.add_argument("--address", default="localhost:50051")
+    worker_parser = commands.add_parser("worker", help="Run one worker shard")
+    worker_parser.add_argument("--address", default="localhost:50051")
+    worker_parser.add_argument("--shard", type=int, required=True)
+    worker_parser.add_argument("--agents", nargs="+", default=list(DEFAULT_AGENTS), choices=list(AGENTS))
+    load_parser = commands.add_parser("loadtest", help="Messages/sec against local clusters of growing size")
+    load_parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    load_parser.add_argument("--games", type=int, default=64)
+    load_parser.add_argument("--plies", type=int, default=40)
+    args = parser.parse_args()
+
+    if args.command == "host":
+        asyncio.run(run_host(args.address))
+    elif args.command == "worker":
+        asyncio.run(run_worker(args.address, args.shard, args.agents))
+    else:
+        print(f"{os.cpu_count()} CPU cores")
+        baseline = None
+        for workers in args.workers:
+            with LocalCluster(workers) as cluster:
+                result = asyncio.run(load_test(cluster, args.games, args.plies))
+            baseline = baseline or result["messages_per_second"]
+            print(f"{workers} worker(s): {result['messages']} messages in {result['elapsed_s']:.2f} s, "
+                  f"{result['messages_per_second']:,.0f} messages/s ({result['messages_per_second'] / baseline:.2f}x), "
+                  f"games per worker {result['games_per_worker']}")
@@ -0,0 +1,254 @@
+import collections
+import os
+import time
+import urllib.parse
+from array import array
+from typing import Dict, List, Optional
+
+import chess
+
+
+def pack_move(move: chess.Move) -> int:
+    """Pack a move into 16 bits: from square, to square and promotion piece."""
+    return move.from_square | (move.to_square << 6) | ((move.promotion or 0) << 12)
+
+
+def unpack_move(packed: int) -> chess.Move:
+    return chess.Move(packed & 0x3F, (packed >> 6) & 0x3F, (packed >> 12) or None)
+
+
+class GameState:
+    """
+    Compact state of one umpired game: two bytes per ply.
+
+    The chess.Board is only built when somebody asks for it, and the store
+    drops it again (keeping the packed moves) once too many boards are live.
+    """
+
+    __slots__ = ("game_id", "moves", "last_active", "_board")
+
+    def __init__(self, game_id: str, moves: Optional[array] = None) -> None:
+        self.game_id = game_id
+        self.moves = moves if moves is not None else array("H")
+        self.last_active = time.monotonic()
+        self._board: Optional[chess.Board] = None
+
+    @property
+    def board(self) -> chess.Board:
+        if self._board is None:
+            board = chess.Board()
+            for packed in self.moves:
+                board.push(unpack_move(packed))
+            self._board = board
+        return self._board
+
+    @property
+    def has_board(self) -> bool:
+        return self._board is not None
+
+    def drop_board(self) -> None:
+        self._board = None
+
+    def push(self, move: chess.Move) -> None:
+        """Apply an already validated move."""
+        self.board.push(move)
+        self.moves.append(pack_move(move))
+
+    @property
+    def current_player(self) -> str:
+        return "Player 1" if len(self.moves) % 2 == 0 else "Player 2"
+
+    @property
+    def move_log(self) -> List[str]:
+        return [unpack_move(packed).uci() for packed in self.moves]
+
+
+class GameStore:
+    """
+    Per-game state for many concurrent games, keyed by game id.
+
+    At most `max_boards` games keep a materialized chess.Board; the rest keep
+    only their packed move list. With a `directory`, games idle for longer
+    than `idle_seconds` are evicted to disk (one small file per game) by a
+    sweep that get() runs every `idle_seconds / 4`, and are rehydrated
+    transparently by their next get().
+
+    With a `journal` (a move_journal.MoveJournal), every move pushed through
+    push() is journaled, and the games the journal recovered on open are
+    loaded back, so a restarted umpire continues them. finish() ends a game:
+    it is journaled as over and forgotten, and its id starts a new game.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_boards: int = 256, idle_seconds: float = 300.0,
+                 journal=None) -> None:
+        self.directory = directory
+        self.max_boards = max_boards
+        self.idle_seconds = idle_seconds
+        self.journal = journal
+        self._games: Dict[str, GameState] = {}
+        self._boards = collections.OrderedDict()  # game ids with a live board, least recently used first
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if journal is not None:
+            for game_id, moves in journal.recovered.items():
+                self._games[game_id] = GameState(game_id, moves)
+                if directory and os.path.exists(self._path(game_id)):
+                    os.remove(self._path(game_id))  # The journal is at least as recent as an evicted copy
+        self._last_sweep = time.monotonic()
+        self.created = 0
+        self.evicted = 0
+        self.rehydrated = 0
+        self.finished = 0
+
+    def _path(self, game_id: str) -> str:
+        return os.path.join(self.directory, urllib.parse.quote(game_id, safe="") + ".moves")
+
+    def get(self, game_id: str) -> GameState:
+        state = self._games.get(game_id)
+        if state is None:
+            state = self._load(game_id)
+            self._games[game_id] = state
+        state.last_active = now = time.monotonic()
+        if self.directory and now - self._last_sweep >= self.idle_seconds / 4:
+            self.evict_idle(now)
+        return state
+
+    def board(self, game_id: str) -> chess.Board:
+        """The live board for a game, keeping the number of materialized boards bounded."""
+        state = self.get(game_id)
+        board = state.board
+        self._boards[game_id] = None
+        self._boards.move_to_end(game_id)
+        while len(self._boards) > self.max_boards:
+            old_id, _ = self._boards.popitem(last=False)
+            old_state = self._games.get(old_id)
+            if old_state is not None:
+                old_state.drop_board()
+        return board
+
+    def push(self, game_id: str, move: chess.Move) -> None:
+        """Apply an already validated move to a game, journaling it first if there is a journal."""
+        if self.journal is not None:
+            self.journal.append(game_id, move)
+        self.get(game_id).push(move)
+
+    def finish(self, game_id: str) -> None:
+        """Forget a game that is over, in memory, on disk and (as a finish record) in the journal."""
+        if self.journal is not None:
+            self.journal.finish(game_id)
+        self._games.pop(game_id, None)
+        self._boards.pop(game_id, None)
+        if self.directory and os.path.exists(self._path(game_id)):
+            os.remove(self._path(game_id))
+        self.finished += 1
+
+    def _load(self, game_id: str) -> GameState:
+        if self.directory:
+            path = self._path(game_id)
+            if os.path.exists(path):
+                moves = array("H")
+                with open(path, "rb") as f:
+                    moves.frombytes(f.read())
+                os.remove(path)
+                self.rehydrated += 1
+                return GameState(game_id, moves)
+        self.created += 1
+        return GameState(game_id)
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Write games idle for longer than idle_seconds to disk and forget them. Returns how many."""
+        if not self.directory:
+            return 0
+        now = time.monotonic() if now is None else now
+        self._last_sweep = now
+        idle = [game_id for game_id, state in self._games.items() if now - state.last_active >= self.idle_seconds]
+        for game_id in idle:
+            state = self._games.pop(game_id)
+            self._boards.pop(game_id, None)
+            with open(self._path(game_id), "wb") as f:
+                f.write(state.moves.tobytes())
+        self.evicted += len(idle)
+        return len(idle)
+
+    def stats(self) -> dict:
+        return {
+            "resident_games": len(self._games),
+            "live_boards": len(self._boards),
+            "created": self.created,
+            "evicted": self.evicted,
+            "rehydrated": self.rehydrated,
+            "finished": self.finished,
+            "recovered": len(self.journal.recovered) if self.journal is not None else 0,
+        }
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import contextlib
+    import tempfile
+    import tracemalloc
+
+    from autogen_core import AgentId, SingleThreadedAgentRuntime
+    from move_parser import MoveParser
+    from test_v3 import MultiplayerUmpireAgent, UserMessage
+
+    OPENING = ["e2e4", "e7e5", "g1f3", "b8c6", "f1b5", "a7a6", "b5a4", "g8f6", "e1g1", "f8e7",
+               "f1e1", "b7b5", "a4b3", "d7d6", "c2c3", "e8g8", "h2h3", "c6a5", "b3c2", "c7c5"]
+
+    parser = argparse.ArgumentParser(description="Run many concurrent games through one umpire registration.")
+    parser.add_argument("--games", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--plies", type=int, default=10, help=f"Plies per game (max {len(OPENING)})")
+    parser.add_argument("--max-boards", type=int, default=256, help="Materialized boards kept in memory")
+    args = parser.parse_args()
+
+    async def play(num_games: int, store: GameStore) -> float:
+        """Play the opening in every game, one ply across all games at a time. Returns the elapsed seconds."""
+        move_parser = MoveParser()
+        runtime = SingleThreadedAgentRuntime()
+        await MultiplayerUmpireAgent.register(
+            runtime, "multiplayer_umpire_agent",
+            lambda: MultiplayerUmpireAgent("multiplayer_umpire_agent", store=store, parser=move_parser, save_svg=False),
+        )
+        runtime.start()
+        agents = [AgentId("multiplayer_umpire_agent", f"game-{i}") for i in range(num_games)]
+        start = time.perf_counter()
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            for ply, uci in enumerate(OPENING[:args.plies]):
+                message = UserMessage(content=uci, player="Player 1" if ply % 2 == 0 else "Player 2")
+                await asyncio.gather(*(runtime.send_message(message, agent) for agent in agents))
+        elapsed = time.perf_counter() - start
+        await runtime.stop_when_idle()
+        return elapsed
+
+    def run(num_games: int) -> None:
+        with tempfile.TemporaryDirectory() as directory:
+            store = GameStore(directory, max_boards=args.max_boards, idle_seconds=3600)
+            elapsed = asyncio.run(play(num_games, store))
+            messages = num_games * args.plies
+            print(f"{num_games} games, {messages} messages in {elapsed:.2f}s ({messages / elapsed:,.0f} msg/s)")
+
+        # Memory is measured in a second pass, since tracing allocations slows everything down
+        with tempfile.TemporaryDirectory() as directory:
+            store = GameStore(directory, max_boards=args.max_boards, idle_seconds=3600)
+            tracemalloc.start()
+            baseline = tracemalloc.get_traced_memory()[0]
+            asyncio.run(play(num_games, store))
+            in_memory = tracemalloc.get_traced_memory()[0] - baseline
+            resident = sum(len(state.moves) * state.moves.itemsize for state in store._games.values())
+            evicted = store.evict_idle(now=float("inf"))
+            after_eviction = tracemalloc.get_traced_memory()[0] - baseline
+            tracemalloc.stop()
+
+            start = time.perf_counter()
+            for i in range(num_games):
+                assert store.get(f"game-{i}").move_log == OPENING[:args.plies]
+            rehydrate = time.perf_counter() - start
+
+        print(f"  memory per game: {in_memory / num_games:,.0f} B with {args.max_boards} boards materialized "
+              f"({resident / num_games:.0f} B of packed moves), "
+              f"{after_eviction / num_games:,.0f} B after evicting {evicted} games to disk")
+        print(f"  rehydrate: {rehydrate / num_games * 1e6:.1f} µs per game; {store.stats()}")
+
+    for num_games in args.games:
+        run(num_games)
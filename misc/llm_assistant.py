@@ -0,0 +1,128 @@
+"""
+The LLM move translator shared by the umpire agents (test_v2.py, test_v3.py).
+
+CustomAssistant turns a player's natural-language move into a UCI string with
+the local OpenAI-compatible server. Depending on the environment it keeps an
+AssistantAgent conversation, sends a fresh position prompt per move
+(LLM_PROMPT) or streams the reply and stops at the first legal move
+(LLM_STREAM=1).
+"""
+import os
+import sys
+import time
+from typing import List, Optional
+
+import chess
+from autogen_agentchat.agents import AssistantAgent
+from autogen_agentchat.messages import TextMessage
+from autogen_core.models import SystemMessage, UserMessage as LLMUserMessage
+
+from model_clients import PooledChatCompletionClient, shared_model_client, stream_until
+from move_parser import find_uci_move
+from position_prompt import PositionPrompt, position_prompt_from_env
+from translation_cache import TranslationCache, is_legal_uci
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Top-level modules (repository root)
+from tracing import tracer
+
+# Stream LLM replies and stop each request once it holds a legal move (LLM_STREAM=1)
+STREAM_REPLIES = os.environ.get("LLM_STREAM", "0") == "1"
+# Send each move as a fresh prompt built from the position instead of the whole conversation
+# (LLM_PROMPT=position, or position+legal to list the legal moves too)
+POSITION_PROMPT = position_prompt_from_env(os.environ.get("LLM_PROMPT"))
+
+
+def get_model_client() -> PooledChatCompletionClient:
+    """
+    Returns a mock OpenAI API client configured for a local LLM server.
+    Every agent shares the same pooled client and HTTP connection pool.
+    """
+    return shared_model_client(
+        model="llama3.2-vision:latest",
+        api_key="NotRequiredSinceWeAreLocal",
+        base_url=os.environ.get("LLM_BASE_URL", "http://0.0.0.0:4000"),
+        model_capabilities={
+            "json_output": False,
+            "vision": False,
+            "function_calling": True,
+        },
+    )
+
+
+# System message for the AI agent
+sys_msg = """You are an AI-powered chess board agent.
+You translate the user's natural language input into a legal UCI move.
+You should only reply with the move in UCI format, consisting of exactly four or five characters (e.g., e2e4, e7e8q), without any extra text or explanation."""
+
+
+class CustomAssistant:
+    """
+    A custom wrapper around AssistantAgent to handle chess-specific messaging.
+    """
+    def __init__(self, name: str, cache: Optional[TranslationCache] = None, stream: bool = STREAM_REPLIES,
+                 prompt: Optional[PositionPrompt] = POSITION_PROMPT):
+        self.assistant = AssistantAgent(name=name, system_message=sys_msg, model_client=get_model_client())
+        self.model_client = get_model_client()
+        self.cache = cache
+        self.stream = stream
+        self.prompt = prompt
+        self.usage_log: List[dict] = []  # Tokens and latency per LLM request
+
+    async def handle_message(self, message: str, board: Optional[chess.Board] = None) -> str:
+        """
+        Sends a message to the AssistantAgent and retrieves the UCI move response.
+        With a cache and a board, legal translations are memoized and reused.
+        With a position prompt and a board, each move is a fresh fixed-size request
+        instead of another turn in the AssistantAgent's growing conversation.
+        """
+        if self.cache is not None and board is not None:
+            cached = self.cache.get(message, board)
+            if cached is not None:
+                return cached
+        start = time.perf_counter()
+        with tracer.span("llm_call", ply=len(board.move_stack) + 1 if board is not None else None) as span:
+            if self.stream:
+                uci_move, usage = await self.stream_move(message, board)
+            elif self.prompt is not None and board is not None:
+                result = await self.model_client.create(self.one_turn_messages(message, board))
+                uci_move, usage = self.extract_move(result.content, board), result.usage
+            else:
+                reply = await self.assistant.on_messages(
+                    [TextMessage(content=message, source="user")],
+                    cancellation_token=None
+                )
+                uci_move, usage = self.extract_move(reply.chat_message.content, board), reply.chat_message.models_usage
+            span.set(move=uci_move, prompt_tokens=usage.prompt_tokens if usage else None)
+        self.usage_log.append({
+            "prompt_tokens": usage.prompt_tokens if usage else None,  # None for streams cut short
+            "completion_tokens": usage.completion_tokens if usage else None,
+            "latency_ms": (time.perf_counter() - start) * 1000,
+        })
+        if self.cache is not None and board is not None and is_legal_uci(uci_move, board):
+            self.cache.put(message, board, uci_move)
+        return uci_move
+
+    def one_turn_messages(self, message: str, board: Optional[chess.Board] = None) -> list:
+        """A fresh one-turn conversation: the position prompt when there is one and a board, else the bare message."""
+        content = self.prompt.build(message, board) if self.prompt is not None and board is not None else message
+        return [SystemMessage(content=sys_msg), LLMUserMessage(content=content, source="user")]
+
+    async def stream_move(self, message: str, board: Optional[chess.Board] = None):
+        """
+        Streams the reply and cuts the request off at the first legal move on the board
+        (or the first complete UCI move without one). Otherwise the whole reply is parsed.
+        Each call is a fresh one-turn conversation, without the AssistantAgent's history.
+        Returns the move and the reported usage (None when cut short).
+        """
+        text, usage = await stream_until(
+            self.model_client,
+            self.one_turn_messages(message, board),
+            lambda text: find_uci_move(text, board) is not None,
+        )
+        return self.extract_move(text, board), usage
+
+    @staticmethod
+    def extract_move(text: str, board: Optional[chess.Board] = None) -> str:
+        """The first legal move in a complete reply, else its first UCI-looking move, else the bare reply."""
+        return (find_uci_move(text, board, complete=True) or find_uci_move(text, complete=True)
+                or text.strip().replace("-", "").lower())
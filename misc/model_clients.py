@@ -0,0 +1,326 @@
+import asyncio
+import collections
+import contextvars
+import json
+import os
+import statistics
+import threading
+import time
+from typing import Any, AsyncGenerator, Callable, Deque, Dict, Mapping, Optional, Sequence, Tuple, Union
+
+import openai
+from autogen_core import CancellationToken
+from autogen_core.models import ChatCompletionClient, CreateResult, LLMMessage, ModelCapabilities, ModelInfo, RequestUsage
+from autogen_core.tools import Tool, ToolSchema
+from autogen_ext.models.openai import OpenAIChatCompletionClient
+
+# Cap on concurrent requests per shared client; the local LLM server serializes work anyway
+DEFAULT_MAX_CONCURRENCY = int(os.environ.get("LLM_MAX_CONCURRENCY", "8"))
+# Latency statistics cover this many recent requests, so a long-running process keeps a fixed footprint
+STATS_WINDOW = 1024
+
+_clients: Dict[str, "PooledChatCompletionClient"] = {}
+_clients_lock = threading.Lock()
+
+# HTTP responses opened by the stream being consumed, so an early exit can close them
+_open_responses: contextvars.ContextVar[Optional[list]] = contextvars.ContextVar("_open_responses", default=None)
+
+
+async def _track_response(response) -> None:
+    responses = _open_responses.get()
+    if responses is not None:
+        responses.append(response)
+
+
+class PooledChatCompletionClient(ChatCompletionClient):
+    """
+    A ChatCompletionClient shared by every agent in the process.
+
+    It wraps one OpenAIChatCompletionClient, so all agents share a single HTTP
+    connection pool. At most `max_concurrency` requests are in flight at once.
+    Identical create() calls that overlap share one request, which runs until
+    its last caller stops waiting. Token counts and the latency of the last
+    STATS_WINDOW requests are recorded for stats().
+    """
+
+    def __init__(self, client: ChatCompletionClient, max_concurrency: int = DEFAULT_MAX_CONCURRENCY) -> None:
+        self._client = client
+        self.max_concurrency = max_concurrency
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._in_flight: Dict[str, list] = {}  # Request key -> [shared request task, callers waiting on it]
+        self.requests = 0
+        self.coalesced = 0
+        self.aborted_streams = 0
+        self.errors = 0
+        self.active = 0
+        self.max_active = 0
+        self.latencies: Deque[float] = collections.deque(maxlen=STATS_WINDOW)
+        self.queue_waits: Deque[float] = collections.deque(maxlen=STATS_WINDOW)
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+    def _bind_loop(self) -> None:
+        # asyncio primitives belong to one event loop; rebuild them if a new loop uses the client
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._in_flight = {}
+
+    @staticmethod
+    def _request_key(messages: Sequence[LLMMessage], tools: Sequence[Any], json_output: Optional[bool],
+                     extra_create_args: Mapping[str, Any]) -> str:
+        return json.dumps(
+            {
+                "messages": [message.model_dump(mode="json") for message in messages],
+                "tools": [tool if isinstance(tool, dict) else tool.schema for tool in tools],
+                "json_output": json_output,
+                "extra": dict(extra_create_args),
+            },
+            sort_keys=True,
+            default=str,
+        )
+
+    async def create(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        json_output: Optional[bool] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> CreateResult:
+        self._bind_loop()
+        key = self._request_key(messages, tools, json_output, extra_create_args)
+        shared = self._in_flight.get(key)
+        if shared is None:
+            # The request runs as its own task: a caller that is cancelled only stops waiting for it
+            task = self._loop.create_task(self._send(messages, tools, json_output, extra_create_args))
+            shared = self._in_flight[key] = [task, 0]
+            task.add_done_callback(lambda _task, shared=shared: self._forget(key, shared))
+        else:
+            self.coalesced += 1
+        task = shared[0]
+        shared[1] += 1
+        waiter = asyncio.shield(task)
+        if cancellation_token is not None:
+            cancellation_token.link_future(waiter)
+        try:
+            return await waiter
+        finally:
+            shared[1] -= 1
+            if not shared[1] and not task.done():
+                # Nobody wants the answer any more. Forget it first, so an identical request
+                # arriving before the cancellation completes starts afresh instead of joining it
+                self._forget(key, shared)
+                task.cancel()
+
+    def _forget(self, key: str, shared: list) -> None:
+        if self._in_flight.get(key) is shared:
+            del self._in_flight[key]
+
+    async def _send(self, messages, tools, json_output, extra_create_args) -> CreateResult:
+        queued = time.perf_counter()
+        async with self._semaphore:
+            start = time.perf_counter()
+            self.queue_waits.append(start - queued)
+            self.requests += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            try:
+                result = await self._client.create(
+                    messages,
+                    tools=tools,
+                    json_output=json_output,
+                    extra_create_args=extra_create_args,
+                )
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self.active -= 1
+            self.latencies.append(time.perf_counter() - start)
+            self.prompt_tokens += result.usage.prompt_tokens
+            self.completion_tokens += result.usage.completion_tokens
+            return result
+
+    async def create_stream(
+        self,
+        messages: Sequence[LLMMessage],
+        *,
+        tools: Sequence[Tool | ToolSchema] = [],
+        json_output: Optional[bool] = None,
+        extra_create_args: Mapping[str, Any] = {},
+        cancellation_token: Optional[CancellationToken] = None,
+    ) -> AsyncGenerator[Union[str, CreateResult], None]:
+        # Streams are not coalesced, but they count against the concurrency limit.
+        # If the consumer stops early, the HTTP response is closed so the server stops generating;
+        # merely dropping the generator would leave the connection streaming in the background.
+        self._bind_loop()
+        async with self._semaphore:
+            self.requests += 1
+            start = time.perf_counter()
+            responses: list = []
+            tracking = _open_responses.set(responses)
+            stream = self._client.create_stream(
+                messages,
+                tools=tools,
+                json_output=json_output,
+                extra_create_args=extra_create_args,
+                cancellation_token=cancellation_token,
+            )
+            try:
+                async for chunk in stream:
+                    if isinstance(chunk, CreateResult):
+                        self.prompt_tokens += chunk.usage.prompt_tokens
+                        self.completion_tokens += chunk.usage.completion_tokens
+                    yield chunk
+            finally:
+                try:
+                    _open_responses.reset(tracking)
+                except ValueError:  # Resumed from another context
+                    _open_responses.set(None)
+                for response in responses:
+                    if not response.is_closed:
+                        self.aborted_streams += 1
+                        await response.aclose()
+                await stream.aclose()
+                self.latencies.append(time.perf_counter() - start)
+
+    def actual_usage(self) -> RequestUsage:
+        return self._client.actual_usage()
+
+    def total_usage(self) -> RequestUsage:
+        return self._client.total_usage()
+
+    def count_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self._client.count_tokens(messages, tools=tools)
+
+    def remaining_tokens(self, messages: Sequence[LLMMessage], *, tools: Sequence[Tool | ToolSchema] = []) -> int:
+        return self._client.remaining_tokens(messages, tools=tools)
+
+    @property
+    def capabilities(self) -> ModelCapabilities:  # type: ignore
+        return self._client.capabilities
+
+    @property
+    def model_info(self) -> ModelInfo:
+        return self._client.model_info
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "coalesced": self.coalesced,
+            "aborted_streams": self.aborted_streams,
+            "errors": self.errors,
+            "max_concurrent": self.max_active,
+            "avg_latency_ms": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+            "p95_latency_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000 if latencies else 0.0,
+            "avg_queue_wait_ms": statistics.fmean(self.queue_waits) * 1000 if self.queue_waits else 0.0,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+async def stream_until(client: ChatCompletionClient, messages: Sequence[LLMMessage],
+                       done: Callable[[str], bool]) -> Tuple[str, Optional[RequestUsage]]:
+    """
+    Stream a completion until done(text so far) holds, then stop the request.
+    Returns the text received and the usage the server reported, or None if the stream was cut short.
+    """
+    text = ""
+    usage = None
+    stream = client.create_stream(messages)
+    try:
+        async for chunk in stream:
+            if isinstance(chunk, CreateResult):
+                usage = chunk.usage
+                break
+            text += chunk
+            if done(text):
+                break
+    finally:
+        await stream.aclose()
+    return text, usage
+
+
+def shared_model_client(max_concurrency: Optional[int] = None, **config: Any) -> PooledChatCompletionClient:
+    """Return the process-wide client for this OpenAIChatCompletionClient config, creating it once."""
+    key = json.dumps(config, sort_keys=True, default=str)
+    with _clients_lock:
+        client = _clients.get(key)
+        if client is None:
+            options = dict(config)
+            options.setdefault("http_client", openai.DefaultAsyncHttpxClient(event_hooks={"response": [_track_response]}))
+            client = PooledChatCompletionClient(
+                OpenAIChatCompletionClient(**options), max_concurrency or DEFAULT_MAX_CONCURRENCY
+            )
+            _clients[key] = client
+        return client
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from autogen_core.models import SystemMessage, UserMessage
+    from stub_llm_server import start_stub_server
+
+    parser = argparse.ArgumentParser(description="Load a shared model client against the local stub server.")
+    parser.add_argument("--requests", type=int, default=200, help="Total requests to send")
+    parser.add_argument("--distinct", type=int, default=20, help="Distinct prompts among them (the rest coalesce)")
+    parser.add_argument("--max-concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=50.0, help="Stub server delay per request")
+    parser.add_argument("--time-to-move", action="store_true",
+                        help="Instead, compare time-to-move of full and streamed translations")
+    parser.add_argument("--moves", type=int, default=20, help="Translations per mode with --time-to-move")
+    parser.add_argument("--chatter-words", type=int, default=40, help="Explanation words the stub adds after the move")
+    parser.add_argument("--ms-per-output-token", type=float, default=20.0)
+    args = parser.parse_args()
+
+    config = dict(model="llama3.2:1b", api_key="NotRequiredSinceWeAreLocal",
+                  model_capabilities={"json_output": False, "vision": False, "function_calling": True})
+
+    async def load_test(base_url: str) -> None:
+        client = shared_model_client(max_concurrency=args.max_concurrency, base_url=base_url, **config)
+        system = SystemMessage(content="Reply with a UCI move.")
+        squares = [f"{file}{rank}" for file in "abcdefgh" for rank in "1234"]
+        prompts = [[system, UserMessage(content=f"Play {squares[i % len(squares)]}e5 (#{i})", source="user")]
+                   for i in range(args.distinct)]
+        start = time.perf_counter()
+        await asyncio.gather(*(client.create(prompts[i % args.distinct]) for i in range(args.requests)))
+        elapsed = time.perf_counter() - start
+        print(f"{args.requests} calls in {elapsed:.2f}s ({args.requests / elapsed:.1f} calls/s)")
+        print(client.stats())
+
+    async def time_to_move(state) -> None:
+        import chess
+        from llm_assistant import CustomAssistant
+
+        board = chess.Board()
+        moves = [move.uci() for move in board.legal_moves]
+        for stream in (False, True):
+            assistant = CustomAssistant(name="StreamingTranslator" if stream else "FullTranslator", stream=stream)
+            sent_before = state.completion_tokens
+            times = []
+            for i in range(args.moves):
+                start = time.perf_counter()
+                reply = await assistant.handle_message(f"I'd like to play {moves[i % len(moves)]}", board)
+                times.append(time.perf_counter() - start)
+                assert reply == moves[i % len(moves)], reply
+            times.sort()
+            print(f"{'streamed' if stream else 'full':>8}: {statistics.fmean(times) * 1000:7.1f} ms avg, "
+                  f"{times[len(times) // 2] * 1000:7.1f} ms p50 time-to-move, "
+                  f"{(state.completion_tokens - sent_before) / args.moves:.1f} tokens generated per move")
+        print(assistant.model_client.stats())
+
+    if args.time_to_move:
+        chatter = " ".join(["it"] * args.chatter_words)
+        server, base_url = start_stub_server(latency_ms=args.latency_ms, chatter=chatter,
+                                             ms_per_output_token=args.ms_per_output_token)
+        os.environ["LLM_BASE_URL"] = base_url
+        asyncio.run(time_to_move(server.RequestHandlerClass.state))
+    else:
+        _server, base_url = start_stub_server(latency_ms=args.latency_ms)
+        asyncio.run(load_test(base_url))
@@ -0,0 +1,182 @@
+import re
+from typing import Optional
+
+import chess
+
+PIECE_WORDS = {
+    "pawn": chess.PAWN,
+    "knight": chess.KNIGHT,
+    "horse": chess.KNIGHT,
+    "bishop": chess.BISHOP,
+    "rook": chess.ROOK,
+    "queen": chess.QUEEN,
+    "king": chess.KING,
+}
+
+UCI_PATTERN = re.compile(r"\b([a-h][1-8])(?:\s*(?:-|x|to|takes|captures)\s*|\s*)([a-h][1-8])(?:\s*=?\s*([qrbn])\b)?")
+SQUARE_PATTERN = re.compile(r"\b([a-h][1-8])\b")
+SAN_PATTERN = re.compile(r"^(?:[KQRBN]?[a-h]?[1-8]?x?[a-h][1-8](?:=?[QRBNqrbn])?|O-O(?:-O)?)[+#]?$")
+PROMOTION_DEFAULT = re.compile(r"^([a-h]?x?[a-h][18])([+#]?)$")  # A pawn move to the last rank, no piece given
+REPLY_MOVE_PATTERN = re.compile(r"(?<![a-z0-9])([a-h][1-8])-?([a-h][1-8])([qrbn])?(?=([^a-z0-9]))?")
+KINGSIDE_PATTERN = re.compile(r"\b(?:castles?|castling)\s+(?:on\s+the\s+)?(?:king\s*side|short)\b|\b(?:short|king\s*side)\s+castl|^(?:o-o|0-0)$")
+QUEENSIDE_PATTERN = re.compile(r"\b(?:castles?|castling)\s+(?:on\s+the\s+)?(?:queen\s*side|long)\b|\b(?:long|queen\s*side)\s+castl|^(?:o-o-o|0-0-0)$")
+
+
+def find_uci_move(text: str, board: Optional[chess.Board] = None, complete: bool = False) -> Optional[str]:
+    """
+    The first UCI move in an LLM reply that may still be streaming.
+
+    With a board, the first legal move is returned as soon as it appears. Without
+    one, a move only counts once it is followed by a non-move character, or when
+    `complete` says the text is final, since a promotion letter might still follow.
+    """
+    lowered = text.lower()
+    for match in REPLY_MOVE_PATTERN.finditer(lowered):
+        from_square, to_square, promotion, boundary = match.groups()
+        uci = from_square + to_square + (promotion or "")
+        if board is not None:
+            try:
+                if chess.Move.from_uci(uci) in board.legal_moves:
+                    return uci
+            except ValueError:
+                continue
+        elif boundary is not None or (complete and match.end() == len(lowered)):
+            return uci
+    return None
+
+
+class MoveParser:
+    """
+    Resolves a player's utterance to a legal move without asking the LLM.
+
+    Understands UCI ("e2e4", "e2-e4", "e2 to e4"), SAN ("Nf3", "exd5", "O-O")
+    and common phrasings ("knight to f3", "bishop takes c4", "castle kingside").
+    parse() returns None when nothing matches or the text fits several legal
+    moves, so the caller can fall back to the LLM. Hits, misses and ambiguous
+    inputs are counted.
+    """
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.ambiguous = 0
+
+    def parse(self, text: str, board: chess.Board) -> Optional[chess.Move]:
+        candidates = self._candidates(text, board)
+        if len(candidates) == 1:
+            self.hits += 1
+            return candidates.pop()
+        if candidates:
+            self.ambiguous += 1
+        else:
+            self.misses += 1
+        return None
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses + self.ambiguous
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "ambiguous": self.ambiguous,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def _candidates(self, text: str, board: chess.Board) -> set:
+        raw = text.strip().rstrip(".!?")
+        lowered = raw.lower()
+
+        if QUEENSIDE_PATTERN.search(lowered):
+            return self._castling(board, kingside=False)
+        if KINGSIDE_PATTERN.search(lowered):
+            return self._castling(board, kingside=True)
+
+        # Coordinate moves: "e2e4", "e2-e4", "e7e8q", "e2 to e4"
+        match = UCI_PATTERN.search(lowered)
+        if match:
+            from_square, to_square, promotion = match.groups()
+            uci = from_square + to_square + (promotion or "")
+            move = chess.Move.from_uci(uci)
+            if move in board.legal_moves:
+                return {move}
+            if not promotion:
+                # A pawn reaching the last rank needs a piece; default to a queen
+                promoted = chess.Move.from_uci(uci + "q")
+                if promoted in board.legal_moves:
+                    return {promoted}
+
+        # Named pieces win over bare squares, so "bishop takes c4" is not read as the pawn move c4
+        if any(word in PIECE_WORDS for word in re.findall(r"[a-z]+", lowered)):
+            return self._phrase(lowered, board)
+
+        # SAN tokens: "Nf3", "exd5", "e8=Q+". A lower-case piece letter ("nf3") is read as that piece too,
+        # so "bc4" also stands for Bc4 and is ambiguous when a b-pawn can capture on c4 as well
+        san_moves = set()
+        for token in re.split(r"[\s,;:]+", raw):
+            token = token.strip(".!?\"'()").replace("0", "O")
+            for variant in {token, token[:1].upper() + token[1:]}:
+                if not variant or not SAN_PATTERN.match(variant):
+                    continue
+                # Like a coordinate move, a pawn reaching the last rank without a piece becomes a queen
+                for san in dict.fromkeys((variant, PROMOTION_DEFAULT.sub(r"\1=Q\2", variant))):
+                    try:
+                        san_moves.add(board.parse_san(san))
+                        break
+                    except ValueError:
+                        continue
+        return san_moves
+
+    def _castling(self, board: chess.Board, kingside: bool) -> set:
+        return {move for move in board.legal_moves
+                if board.is_castling(move) and board.is_kingside_castling(move) == kingside}
+
+    def _phrase(self, lowered: str, board: chess.Board) -> set:
+        """Piece names plus squares: "knight to f3", "pawn e4", "queen from d1 to h5"."""
+        words = re.findall(r"[a-z]+", lowered)
+        pieces = [PIECE_WORDS[word] for word in words if word in PIECE_WORDS]
+        squares = [chess.parse_square(square) for square in SQUARE_PATTERN.findall(lowered)]
+        if not squares:
+            return set()
+
+        if "promot" in lowered:
+            # "promote to a knight on e8": the named piece is the promotion, the mover a pawn
+            piece_type = chess.PAWN
+            promotion = next((piece for piece in pieces if piece != chess.PAWN), chess.QUEEN)
+        else:
+            piece_type = pieces[0] if pieces else None
+            promotion = pieces[1] if len(pieces) > 1 and piece_type == chess.PAWN else None
+        to_square = squares[-1]
+        from_square = squares[0] if len(squares) > 1 else None
+
+        candidates = set()
+        for move in board.legal_moves:
+            if move.to_square != to_square:
+                continue
+            if from_square is not None and move.from_square != from_square:
+                continue
+            if piece_type is not None and board.piece_type_at(move.from_square) != piece_type:
+                continue
+            if move.promotion and move.promotion != (promotion or chess.QUEEN):
+                continue
+            candidates.add(move)
+        return candidates
+
+
+if __name__ == "__main__":
+    import time
+
+    parser = MoveParser()
+    board = chess.Board()
+    samples = ["Play e2e4", "e2-e4", "Nf3", "knight to f3", "pawn to d4", "play the move e4", "move my horse to c3",
+               "knight takes e5", "castle kingside", "I don't know, something aggressive"]
+    for sample in samples:
+        move = parser.parse(sample, board)
+        print(f"{sample!r:40} -> {move.uci() if move else None}")
+
+    iterations = 2000
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for sample in samples:
+            parser.parse(sample, board)
+    elapsed = time.perf_counter() - start
+    print(f"{elapsed / (iterations * len(samples)) * 1e6:.1f} µs per parse")
+    print(parser.stats())
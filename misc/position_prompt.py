@@ -0,0 +1,94 @@
+from typing import Optional
+
+import chess
+
+
+class PositionPrompt:
+    """
+    Builds a self-contained prompt for one move from the position alone.
+
+    The prompt holds the FEN, the side to move, the last `last_moves` moves and,
+    optionally, the legal moves, followed by what the player said. Its size does
+    not depend on how long the game has run, unlike a growing conversation.
+    """
+
+    def __init__(self, last_moves: int = 6, legal_moves: bool = False) -> None:
+        self.last_moves = last_moves
+        self.legal_moves = legal_moves
+
+    def build(self, message: str, board: chess.Board) -> str:
+        lines = [
+            f"Position (FEN): {board.fen()}",
+            f"Side to move: {'White' if board.turn == chess.WHITE else 'Black'}",
+        ]
+        recent = board.move_stack[-self.last_moves:] if self.last_moves else []
+        if recent:
+            lines.append("Last moves: " + " ".join(move.uci() for move in recent))
+        if self.legal_moves:
+            lines.append("Legal moves: " + " ".join(sorted(move.uci() for move in board.legal_moves)))
+        lines.append(f"Player says: {message}")
+        return "\n".join(lines)
+
+
+def position_prompt_from_env(value: Optional[str]) -> Optional[PositionPrompt]:
+    """LLM_PROMPT setting: "position", "position+legal" or anything else for the conversation history."""
+    if value == "position":
+        return PositionPrompt()
+    if value == "position+legal":
+        return PositionPrompt(legal_moves=True)
+    return None
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import os
+    import random
+    import statistics
+    import time
+
+    from stub_llm_server import start_stub_server
+
+    parser = argparse.ArgumentParser(description="Compare prompt size and latency over a long game.")
+    parser.add_argument("--plies", type=int, default=200)
+    parser.add_argument("--ms-per-token", type=float, default=0.5, help="Stub delay per prompt token")
+    parser.add_argument("--legal-moves", action="store_true", help="Include the legal-move list in position prompts")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    _server, os.environ["LLM_BASE_URL"] = start_stub_server(latency_ms=20, ms_per_token=args.ms_per_token)
+    from llm_assistant import CustomAssistant
+
+    rng = random.Random(args.seed)
+    game = chess.Board()
+    while len(game.move_stack) < args.plies:
+        if game.is_game_over(claim_draw=True):
+            game = chess.Board()  # Random games rarely end early; start over if one does
+        game.push(rng.choice(list(game.legal_moves)))
+    moves = game.move_stack
+
+    async def play(prompt: Optional[PositionPrompt]) -> list:
+        assistant = CustomAssistant(name="Translator", prompt=prompt)
+        board = chess.Board()
+        for move in moves:
+            reply = await assistant.handle_message(f"I'd like to play {move.uci()}", board)
+            assert reply == move.uci(), reply
+            board.push(move)
+        return assistant.usage_log
+
+    def report(label: str, log: list) -> None:
+        checkpoints = [1] + list(range(50, len(log) + 1, 50))
+        tokens = " ".join(f"{ply}:{log[ply - 1]['prompt_tokens']}" for ply in checkpoints)
+        first, last = log[:10], log[-10:]
+        print(f"{label:>13}: prompt tokens at ply {tokens}; "
+              f"latency first 10 {statistics.fmean(entry['latency_ms'] for entry in first):.0f} ms, "
+              f"last 10 {statistics.fmean(entry['latency_ms'] for entry in last):.0f} ms, "
+              f"total {sum(entry['prompt_tokens'] for entry in log):,} prompt tokens")
+
+    async def main() -> None:
+        start = time.perf_counter()
+        report("conversation", await play(None))
+        report("position", await play(PositionPrompt(legal_moves=args.legal_moves)))
+        print(f"{time.perf_counter() - start:.1f}s for {2 * len(moves)} translations")
+
+    asyncio.run(main())
@@ -0,0 +1,165 @@
+import asyncio
+import time
+from typing import Dict, List, Optional
+
+import chess
+import pygame
+
+SQUARE_COLORS = [(255, 255, 255), (125, 135, 150)]
+
+
+class PygameBoardRenderer:
+    """
+    Draws a chess.Board onto a pygame surface, repainting only what changed.
+
+    Piece glyphs are rendered once. Each draw() compares the board with what is
+    on screen and repaints just the squares that differ (the from/to squares of
+    a normal move), returning their rects for pygame.display.update(). run()
+    redraws `board` at a capped frame rate, independent of whoever moves on it.
+    """
+
+    def __init__(self, screen: pygame.Surface, square_size: int = 50, font_size: int = 36) -> None:
+        self.screen = screen
+        self.square_size = square_size
+        self.board = chess.Board()  # What run() shows; replace or mutate it from the game
+        self.running = False
+        font = pygame.font.Font(None, font_size)
+        self._glyphs: Dict[str, pygame.Surface] = {
+            symbol: font.render(symbol, True, (0, 0, 0)) for symbol in "PNBRQKpnbrqk"
+        }
+        self._shown: Optional[Dict[int, str]] = None  # Square -> symbol currently on screen
+        self.frames = 0
+        self.squares_painted = 0
+
+    def show(self, board: chess.Board) -> None:
+        self.board = board
+
+    def _rect(self, square: int) -> pygame.Rect:
+        # Same layout as the original UI: square index = row * 8 + col, a1 in the top-left corner
+        row, col = divmod(square, 8)
+        return pygame.Rect(col * self.square_size, row * self.square_size, self.square_size, self.square_size)
+
+    def _paint(self, square: int, symbol: Optional[str]) -> pygame.Rect:
+        rect = self._rect(square)
+        row, col = divmod(square, 8)
+        self.screen.fill(SQUARE_COLORS[(row + col) % 2], rect)
+        if symbol:
+            self.screen.blit(self._glyphs[symbol], (rect.x + 15, rect.y + 10))
+        return rect
+
+    def draw(self, board: chess.Board) -> List[pygame.Rect]:
+        """Repaint the squares that changed since the last draw; returns their rects."""
+        pieces = {square: piece.symbol() for square, piece in board.piece_map().items()}
+        if self._shown is None:
+            squares = range(64)
+        else:
+            squares = [square for square in set(pieces) | set(self._shown)
+                       if pieces.get(square) != self._shown.get(square)]
+        rects = [self._paint(square, pieces.get(square)) for square in squares]
+        self._shown = pieces
+        self.frames += 1
+        self.squares_painted += len(rects)
+        return rects
+
+    def invalidate(self) -> None:
+        """Force a full repaint on the next draw (e.g. after the window was exposed)."""
+        self._shown = None
+
+    async def run(self, fps: float = 30.0) -> None:
+        """Handle window events and redraw at most `fps` times per second until the window is closed."""
+        self.running = True
+        interval = 1.0 / fps
+        next_frame = time.perf_counter()
+        while self.running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    self.running = False
+                elif event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                    self.invalidate()
+            rects = self.draw(self.board)
+            if rects:
+                pygame.display.update(rects)
+            next_frame += interval
+            delay = next_frame - time.perf_counter()
+            if delay < 0:  # Running behind: don't try to catch up with a burst of frames
+                next_frame, delay = time.perf_counter(), 0
+            await asyncio.sleep(delay)
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import random
+
+    parser = argparse.ArgumentParser(description="Headless benchmark of the pygame board renderer.")
+    parser.add_argument("--plies", type=int, default=500, help="Moves to draw (new games start as needed)")
+    parser.add_argument("--fps", type=float, default=30.0, help="Frame cap for the idle-loop measurement")
+    parser.add_argument("--idle-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    screen = pygame.display.set_mode((400, 400))
+
+    rng = random.Random(0)
+    boards, board = [], chess.Board()
+    for _ in range(args.plies):
+        if board.is_game_over():
+            board = chess.Board()
+        board.push(rng.choice(list(board.legal_moves)))
+        boards.append(board.copy(stack=False))
+
+    def legacy_draw_board(board):
+        """The previous test_v1 draw_board: every square, and a new Font per piece, on every update."""
+        screen.fill((0, 0, 0))
+        for row in range(8):
+            for col in range(8):
+                color = SQUARE_COLORS[(row + col) % 2]
+                pygame.draw.rect(screen, color, pygame.Rect(col * 50, row * 50, 50, 50))
+                piece = board.piece_at(row * 8 + col)
+                if piece:
+                    piece_text = str(piece).upper() if piece.color else str(piece).lower()
+                    font = pygame.font.Font(None, 36)
+                    text = font.render(piece_text, True, (0, 0, 0))
+                    screen.blit(text, (col * 50 + 15, row * 50 + 10))
+        pygame.display.flip()
+
+    start = time.process_time()
+    for board in boards:
+        legacy_draw_board(board)
+    legacy_cpu = (time.process_time() - start) / len(boards)
+
+    renderer = PygameBoardRenderer(screen)
+    renderer.draw(chess.Board())
+    start = time.process_time()
+    for board in boards:
+        pygame.display.update(renderer.draw(board))
+    dirty_cpu = (time.process_time() - start) / len(boards)
+    squares = renderer.squares_painted / renderer.frames
+
+    async def idle(loop_body, seconds):
+        start = time.process_time()
+        deadline = time.perf_counter() + seconds
+        while time.perf_counter() < deadline:
+            await loop_body()
+        return (time.process_time() - start) / seconds
+
+    async def spin():
+        pygame.event.get()
+        await asyncio.sleep(0.01)
+
+    async def capped():
+        task = asyncio.ensure_future(renderer.run(fps=args.fps))
+        await asyncio.sleep(args.idle_seconds)
+        renderer.running = False
+        await task
+
+    spin_cpu = asyncio.run(idle(spin, args.idle_seconds))
+    start = time.process_time()
+    asyncio.run(capped())
+    capped_cpu = (time.process_time() - start) / args.idle_seconds
+    pygame.quit()
+
+    print(f"per move frame: legacy full redraw {legacy_cpu * 1000:.3f} ms CPU, "
+          f"dirty rects {dirty_cpu * 1000:.3f} ms CPU ({squares:.1f} squares/frame)")
+    print(f"idle UI loop: sleep(0.01) spin {spin_cpu:.1%} of a core, {args.fps:g} fps cap {capped_cpu:.1%} of a core")
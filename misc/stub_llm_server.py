@@ -0,0 +1,196 @@
+"""
+A local stand-in for the OpenAI-compatible LLM server at 0.0.0.0:4000.
+
+It answers /chat/completions (and /v1/chat/completions) by echoing the last
+UCI-looking move in the last user message (what the player asked for comes
+after any position context), or --default-reply otherwise.
+--chatter appends explanation text after the move, the way small models tend
+to ramble. --latency-ms adds a fixed delay per request and --ms-per-token a
+delay per prompt token, so latency behaves roughly like a real local model.
+Requests with "stream": true get server-sent events, one chunk of about one
+token every --ms-per-output-token; the stub stops generating as soon as the
+client disconnects.
+"""
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+UCI_PATTERN = re.compile(r"\b([a-h][1-8])\s*-?\s*([a-h][1-8])([qrbn])?\b", re.IGNORECASE)
+
+
+def count_tokens(text):
+    """Rough token count (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+
+class StubState:
+    def __init__(self, default_reply="e2e4", latency_ms=0.0, ms_per_token=0.0, chatter="", ms_per_output_token=0.0):
+        self.default_reply = default_reply
+        self.latency_ms = latency_ms
+        self.ms_per_token = ms_per_token
+        self.chatter = chatter
+        self.ms_per_output_token = ms_per_output_token
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0  # Tokens actually sent, so aborted streams count only what went out
+        self.aborted_streams = 0
+
+    def reply_for(self, messages):
+        user_messages = [m for m in messages if m.get("role") == "user"]
+        text = _content_text(user_messages[-1]) if user_messages else ""
+        matches = UCI_PATTERN.findall(text)
+        if matches:
+            move = "".join(matches[-1]).lower()
+        else:
+            move = self.default_reply
+        return move + (" " + self.chatter if self.chatter else "")
+
+
+def _content_text(message):
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; without TCP_NODELAY each reply waits ~40 ms for a delayed ACK
+    disable_nagle_algorithm = True
+    state: StubState = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/models"):
+            self._send_json({"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "stub"}]})
+        else:
+            self._send_json({"error": "not found"}, status=404)
+
+    def do_POST(self):
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self._send_json({"error": "not found"}, status=404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        messages = request.get("messages", [])
+        prompt_tokens = sum(count_tokens(_content_text(m)) for m in messages)
+        with self.state.lock:
+            self.state.requests += 1
+            self.state.prompt_tokens += prompt_tokens
+        delay = (self.state.latency_ms + self.state.ms_per_token * prompt_tokens) / 1000
+        if delay:
+            time.sleep(delay)
+
+        reply = self.state.reply_for(messages)
+        if request.get("stream"):
+            self._send_stream(request, reply, prompt_tokens)
+            return
+        with self.state.lock:
+            self.state.completion_tokens += count_tokens(reply)
+        if self.state.ms_per_output_token:
+            time.sleep(self.state.ms_per_output_token * count_tokens(reply) / 1000)
+        self._send_json({
+            "id": f"chatcmpl-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": reply},
+                "finish_reason": "stop",
+            }],
+            "usage": {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": count_tokens(reply),
+                "total_tokens": prompt_tokens + count_tokens(reply),
+            },
+        })
+
+    def _send_stream(self, request, reply, prompt_tokens):
+        """Send the reply as chat.completion.chunk events of about one token each."""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+        pieces = [reply[i:i + 4] for i in range(0, len(reply), 4)]
+        include_usage = (request.get("stream_options") or {}).get("include_usage", False)
+        try:
+            for i, piece in enumerate(pieces):
+                if i and self.state.ms_per_output_token:
+                    time.sleep(self.state.ms_per_output_token / 1000)
+                last = i == len(pieces) - 1
+                chunk = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": request.get("model", "stub"),
+                    "choices": [{
+                        "index": 0,
+                        "delta": {"role": "assistant", "content": piece} if i == 0 else {"content": piece},
+                        "finish_reason": "stop" if last else None,
+                    }],
+                }
+                if last and include_usage:
+                    chunk["usage"] = {
+                        "prompt_tokens": prompt_tokens,
+                        "completion_tokens": len(pieces),
+                        "total_tokens": prompt_tokens + len(pieces),
+                    }
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                self.wfile.flush()
+                with self.state.lock:
+                    self.state.completion_tokens += 1
+            self.wfile.write(b"data: [DONE]\n\n")
+            self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            with self.state.lock:
+                self.state.aborted_streams += 1
+
+    def _send_json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_stub_server(host="127.0.0.1", port=0, **options):
+    """Start the stub in a background thread; returns (server, base_url). Port 0 picks a free port."""
+    handler = type("BoundStubHandler", (StubHandler,), {"state": StubState(**options)})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible chat completions server.")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=4000)
+    parser.add_argument("--default-reply", default="e2e4", help="Reply when the prompt holds no UCI move")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Fixed delay per request")
+    parser.add_argument("--ms-per-token", type=float, default=0.0, help="Extra delay per prompt token")
+    parser.add_argument("--chatter", default="", help="Explanation text appended after the move")
+    parser.add_argument("--ms-per-output-token", type=float, default=0.0, help="Delay per generated token")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.host, args.port, default_reply=args.default_reply,
+                                    latency_ms=args.latency_ms, ms_per_token=args.ms_per_token,
+                                    chatter=args.chatter, ms_per_output_token=args.ms_per_output_token)
+    print(f"Stub LLM server listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
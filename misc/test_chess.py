@@ -3,6 +3,7 @@ import chess.engine
 from autogen_core import AgentId, MessageContext, RoutedAgent, message_handler, SingleThreadedAgentRuntime
 from dataclasses import dataclass
 import asyncio
+from chess_sessions import OpenSessionMessage, SessionChessAgent, SessionLegalMovesMessage, SessionMoveMessage
 
 # Define message types
 @dataclass
@@ -14,8 +15,9 @@ class ChessMoveMessage:
 class GetLegalMovesMessage:
     fen: str
 
-# Define the ChessAgent
-class ChessAgent(RoutedAgent):
+# Define the ChessAgent: stateless FEN messages, plus the session messages of SessionChessAgent
+# (OpenSessionMessage, SessionMoveMessage, SessionLegalMovesMessage) that keep a live board per game
+class ChessAgent(SessionChessAgent):
     def __init__(self, name: str) -> None:
         super().__init__(name)
 
@@ -44,6 +46,12 @@ async def main():
     runtime.start()
     await runtime.send_message(GetLegalMovesMessage(fen=chess.Board().fen()), AgentId("chess_agent", "default"))
     await runtime.send_message(ChessMoveMessage(fen=chess.Board().fen(), move="e2e4"), AgentId("chess_agent", "default"))
+
+    # Session mode: open a game once, then send only moves
+    session = await runtime.send_message(OpenSessionMessage(), AgentId("chess_agent", "default"))
+    for move in ["e2e4", "e7e5", "g1f3"]:
+        await runtime.send_message(SessionMoveMessage(session_id=session.session_id, move=move), AgentId("chess_agent", "default"))
+    await runtime.send_message(SessionLegalMovesMessage(session_id=session.session_id), AgentId("chess_agent", "default"))
     await runtime.stop()
 
 if __name__ == "__main__":
@@ -3,7 +3,28 @@ import chess.engine
 from autogen_core import AgentId, MessageContext, RoutedAgent, message_handler, SingleThreadedAgentRuntime
 from dataclasses import dataclass
 import asyncio
+from chess_sessions import SessionChessAgent
+from pygame_renderer import PygameBoardRenderer
+from typing import Optional
 import pygame
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Top-level modules (repository root)
+from lite_engine import LiteEngine
+
+# The UI redraws at most this often; the game coroutines only change the board
+UI_FPS = 30
+
+ui: Optional[PygameBoardRenderer] = None  # Created by create_ui
+
+# In-process opponent for the demo games; no Stockfish needed
+ENGINE_LIMIT = chess.engine.Limit(depth=2)
+
+def update_board_ui(board):
+    """Show this board in the UI; the renderer paints the changed squares on its next frame."""
+    if ui is not None:
+        ui.show(board)
 
 # Define message types
 @dataclass
@@ -15,8 +36,9 @@ class ChessMoveMessage:
 class GetLegalMovesMessage:
     fen: str
 
-# Define the ChessAgent
-class ChessAgent(RoutedAgent):
+# Define the ChessAgent: stateless FEN messages, plus the session messages of SessionChessAgent
+# (OpenSessionMessage, SessionMoveMessage, SessionLegalMovesMessage) that keep a live board per game
+class ChessAgent(SessionChessAgent):
     def __init__(self, name: str) -> None:
         super().__init__(name)
 
@@ -38,40 +60,24 @@ class ChessAgent(RoutedAgent):
         else:
             print(f"Illegal move: {message.move}")
 
+    def on_session_move(self, session) -> None:
+        update_board_ui(session.board)
+
 # Pygame UI for displaying the chess board
 async def create_ui(runtime, agent_id):
+    global ui
     pygame.init()
     screen = pygame.display.set_mode((400, 400))
     pygame.display.set_caption("Chess Game")
-
-    square_size = 50
-    colors = [(255, 255, 255), (125, 135, 150)]
-
-    def draw_board(board):
-        for row in range(8):
-            for col in range(8):
-                color = colors[(row + col) % 2]
-                pygame.draw.rect(
-                    screen, color, pygame.Rect(col * square_size, row * square_size, square_size, square_size)
-                )
-                piece = board.piece_at(row * 8 + col)
-                if piece:
-                    piece_text = str(piece).upper() if piece.color else str(piece).lower()
-                    font = pygame.font.Font(None, 36)
-                    text = font.render(piece_text, True, (0, 0, 0))
-                    screen.blit(text, (col * square_size + 15, row * square_size + 10))
-        pygame.display.flip()
-
-    def update_board_ui(board):
-        screen.fill((0, 0, 0))
-        draw_board(board)
+    screen.fill((0, 0, 0))
+    ui = PygameBoardRenderer(screen, square_size=50)
 
     async def autoplay_game():
         board = chess.Board()
+        engine = LiteEngine()
         update_board_ui(board)  # Ensure the initial board state is drawn
         while not board.is_game_over():
-            legal_moves = list(board.legal_moves)
-            move = legal_moves[0]  # Just pick the first legal move
+            move = engine.play(board, ENGINE_LIMIT).move
             board.push(move)
             update_board_ui(board)
             await asyncio.sleep(1)  # Pause to show the move
@@ -79,16 +85,14 @@ async def create_ui(runtime, agent_id):
 
     async def two_player_game():
         board = chess.Board()
+        engines = {chess.WHITE: LiteEngine(), chess.BLACK: LiteEngine()}  # Separate hash tables per side
         update_board_ui(board)
         while not board.is_game_over():
+            move = engines[board.turn].play(board, ENGINE_LIMIT).move
             if board.turn:  # White to move
-                legal_moves = list(board.legal_moves)
-                move = legal_moves[0]  # First legal move for White
                 board.push(move)
                 print(f"White plays: {move}")
             else:  # Black to move
-                legal_moves = list(board.legal_moves)
-                move = legal_moves[0]  # First legal move for Black
                 board.push(move)
                 print(f"Black plays: {move}")
             update_board_ui(board)
@@ -98,13 +102,7 @@ async def create_ui(runtime, agent_id):
     # Start two-player game in the background
     asyncio.create_task(two_player_game())
 
-    running = True
-    while running:
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                running = False
-        await asyncio.sleep(0.01)  # Allow event loop to run smoothly
-
+    await ui.run(fps=UI_FPS)  # Until the window is closed
     pygame.quit()
 
 # Register and run the runtime
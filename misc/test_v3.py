@@ -2,13 +2,21 @@ import chess
 import chess.svg
 import asyncio
 from autogen_core import AgentId, MessageContext, RoutedAgent, message_handler, SingleThreadedAgentRuntime
-from autogen_agentchat.agents import AssistantAgent
-from autogen_agentchat.messages import TextMessage
-from autogen_ext.models.openai import OpenAIChatCompletionClient
-from collections import defaultdict
+from llm_assistant import CustomAssistant
+from move_parser import MoveParser
+from translation_cache import TranslationCache
+from game_shards import GameState, GameStore
+from move_journal import MoveJournal
 from typing import List, Optional
 from dataclasses import dataclass
+import collections
 import os
+import sys
+import urllib.parse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))  # Top-level modules (repository root)
+from game_record import GameRecord
+from tracing import tracer
 
 @dataclass
 class UserMessage:
@@ -16,53 +24,89 @@ class UserMessage:
     content: str
     player: str  # Identifies the player ("Player 1" or "Player 2")
 
-def get_model_client() -> OpenAIChatCompletionClient:
-    """
-    Returns a mock OpenAI API client configured for a local LLM server.
-    """
-    return OpenAIChatCompletionClient(
-        model="llama3.2-vision:latest",
-        api_key="NotRequiredSinceWeAreLocal",
-        base_url="http://0.0.0.0:4000",
-        model_capabilities={
-            "json_output": False,
-            "vision": False,
-            "function_calling": True,
-        },
-    )
-
-# System message for the AI agent
-sys_msg = """You are an AI-powered chess board agent.
-You translate the user's natural language input into a legal UCI move.
-You should only reply with the move in UCI format, consisting of exactly four or five characters (e.g., e2e4, e7e8q), without any extra text or explanation."""
-
-class CustomAssistant:
-    """
-    A custom wrapper around AssistantAgent to handle chess-specific messaging.
-    """
-    def __init__(self, name: str):
-        self.assistant = AssistantAgent(name=name, system_message=sys_msg, model_client=get_model_client())
-
-    async def handle_message(self, message: str) -> str:
-        """
-        Sends a message to the AssistantAgent and retrieves the UCI move response.
-        """
-        reply = await self.assistant.on_messages(
-            [TextMessage(content=message, source="user")],
-            cancellation_token=None
-        )
-        return reply.chat_message.content.strip().replace("-", "").lower()
-
 class MultiplayerUmpireAgent(RoutedAgent):
     """
-    An agent that manages a multiplayer chess game by alternating turns between players and validating moves.
+    An agent that manages multiplayer chess games by alternating turns between players and validating moves.
+    One registration serves any number of games: the AgentId key is the game id, and each game's
+    board, turn and move log live in a shared GameStore.
+    With a record_dir, every move is appended to that game's compact record (see game_record.py),
+    from which any position can be rendered later; save_svg rewrites current_board.svg on every move.
+    A record stays open while its game is played (up to MAX_OPEN_RECORDS at once) and is closed when
+    the game ends. A game that starts from scratch under an id with an old record, after its game
+    ended or after a restart without a journal, moves the old record aside as <id>.<n>.cgr.
     """
-    def __init__(self, name: str) -> None:
+    _assistant: Optional[CustomAssistant] = None  # Shared by all games; created on the first LLM fallback
+    MAX_OPEN_RECORDS = 256
+    _records: "collections.OrderedDict[str, GameRecord]" = collections.OrderedDict()  # By path, least recently used first
+
+    def __init__(self, name: str, store: Optional[GameStore] = None, parser: Optional[MoveParser] = None,
+                 save_svg: bool = False, record_dir: Optional[str] = None) -> None:
         super().__init__(name)
-        self.assistant = CustomAssistant(name="UmpireAgent")
-        self.board = chess.Board()
-        self.current_player = "Player 1"  # Tracks whose turn it is
-        self.move_log: List[str] = []
+        self.store = store if store is not None else GameStore()
+        self.parser = parser if parser is not None else MoveParser()  # Resolves plain moves locally; the LLM only sees the rest
+        self.save_svg = save_svg
+        self.record_dir = record_dir
+        if record_dir:
+            os.makedirs(record_dir, exist_ok=True)
+
+    @property
+    def record_path(self) -> Optional[str]:
+        if not self.record_dir:
+            return None
+        return os.path.join(self.record_dir, urllib.parse.quote(self.id.key, safe="") + ".cgr")
+
+    def _record(self, new_game: bool) -> GameRecord:
+        """This game's open record; a new game gets a new one."""
+        path = self.record_path
+        records = MultiplayerUmpireAgent._records
+        if new_game:
+            self.close_record()
+            if os.path.exists(path):
+                stem, n = path[:-len(".cgr")], 1
+                while os.path.exists(f"{stem}.{n}.cgr"):
+                    n += 1
+                os.replace(path, f"{stem}.{n}.cgr")
+        record = records.get(path)
+        if record is None:
+            record = records[path] = GameRecord(path)
+            while len(records) > self.MAX_OPEN_RECORDS:
+                records.popitem(last=False)[1].close()
+        records.move_to_end(path)
+        return record
+
+    def close_record(self) -> None:
+        if self.record_dir:
+            record = MultiplayerUmpireAgent._records.pop(self.record_path, None)
+            if record is not None:
+                record.close()
+
+    @classmethod
+    def close_records(cls) -> None:
+        """Close every open game record, e.g. before the process exits."""
+        while cls._records:
+            cls._records.popitem()[1].close()
+
+    @property
+    def game(self) -> GameState:
+        return self.store.get(self.id.key)
+
+    @property
+    def board(self) -> chess.Board:
+        return self.store.board(self.id.key)
+
+    @property
+    def current_player(self) -> str:
+        return self.game.current_player
+
+    @property
+    def move_log(self) -> List[str]:
+        return self.game.move_log
+
+    @property
+    def assistant(self) -> CustomAssistant:
+        if MultiplayerUmpireAgent._assistant is None:
+            MultiplayerUmpireAgent._assistant = CustomAssistant(name="UmpireAgent", cache=TranslationCache())
+        return MultiplayerUmpireAgent._assistant
 
     def save_board_svg(self, filename="current_board.svg", last_move: Optional[str] = None):
         """
@@ -76,26 +120,31 @@ class MultiplayerUmpireAgent(RoutedAgent):
         with open(filename, "w") as f:
             f.write(board_svg)
 
-    def log_move(self, move: str):
+    def log_move(self, move: chess.Move):
         """
-        Logs the move and prints the move history.
+        Records the move in the game state (journaled, if the store has a journal, and in the
+        game record, if any) and prints just this move; the full history is in move_log.
         """
-        self.move_log.append(move)
-        print("Move Log:")
-        for i, mv in enumerate(self.move_log, 1):
-            print(f"{i}. {mv}")
+        new_game = not self.game.moves
+        self.store.push(self.id.key, move)
+        if self.record_dir:
+            record = self._record(new_game)
+            record.append(move, self.board)
+            record.flush()
+        print(f"{self.id.key} {len(self.game.moves)}. {move.uci()}")
 
     def check_game_status(self) -> Optional[str]:
         """
         Checks the current status of the game (checkmate, stalemate, or draw).
         """
-        if self.board.is_checkmate():
+        board = self.board
+        if board.is_checkmate():
             return f"Checkmate! {self.current_player} loses."
-        if self.board.is_stalemate():
+        if board.is_stalemate():
             return "Stalemate! It's a draw."
-        if self.board.is_insufficient_material():
+        if board.is_insufficient_material():
             return "Draw due to insufficient material."
-        if self.board.is_seventyfive_moves():
+        if board.is_seventyfive_moves():
             return "Draw due to 75-move rule."
         return None
 
@@ -108,24 +157,36 @@ class MultiplayerUmpireAgent(RoutedAgent):
             print(f"It's not {message.player}'s turn. It's {self.current_player}'s turn.")
             return
 
-        reply = await self.assistant.handle_message(message.content)
+        board = self.board
+        move = self.parser.parse(message.content, board)
+        source = "parser" if move is not None else "llm"
+        if move is not None:
+            reply = move.uci()
+        else:
+            reply = await self.assistant.handle_message(message.content, board)
+            board = self.board  # Other games ran during the LLM call and may have released this board
         print(f"{message.player}'s move: {reply}")
 
         try:
-            self.board.push_uci(reply)
-            self.log_move(reply)
-            self.save_board_svg(last_move=reply)
+            with tracer.span("validation", game=self.id.key, ply=len(board.move_stack) + 1, source=source):
+                move = board.parse_uci(reply)
+                self.log_move(move)
+            if self.save_svg:
+                self.save_board_svg(last_move=reply)
 
             game_status = self.check_game_status()
             if game_status:
                 print(game_status)
+                self.close_record()
+                self.store.finish(self.id.key)  # Not recovered after a restart; the id can host a new game
                 return
 
-            # Switch player turn
-            self.current_player = "Player 2" if self.current_player == "Player 1" else "Player 1"
+            # The turn switches with the move count
             print(f"Next turn: {self.current_player}")
 
         except ValueError as e:
+            if source == "llm":
+                tracer.count("illegal_llm_moves_total")
             print(f"Illegal move by {message.player}: {reply}. Error: {e}")
         except Exception as ex:
             print(f"Unexpected error: {ex}")
@@ -136,7 +197,14 @@ async def main():
     Main function to initialize the runtime, register the agent, and send a test message.
     """
     runtime = SingleThreadedAgentRuntime()
-    await MultiplayerUmpireAgent.register(runtime, "multiplayer_umpire_agent", lambda: MultiplayerUmpireAgent("multiplayer_umpire_agent"))
+    os.makedirs("games", exist_ok=True)
+    # One store for every game served by this registration. Moves are journaled, so a restart
+    # replays games/moves.journal and continues the games where they stopped.
+    journal = MoveJournal("games/moves.journal")
+    store = GameStore(journal=journal)
+    if journal.recovered:
+        print(f"Recovered {len(journal.recovered)} games in {journal.recovery_seconds * 1000:.1f} ms")
+    await MultiplayerUmpireAgent.register(runtime, "multiplayer_umpire_agent", lambda: MultiplayerUmpireAgent("multiplayer_umpire_agent", store=store, record_dir="games"))
 
     runtime.start()
     agent_id = AgentId("multiplayer_umpire_agent", "default")
@@ -149,10 +217,13 @@ async def main():
         UserMessage(content="Play b8c6", player="Player 2")
     ]
 
-    for msg in test_messages:
+    for msg in test_messages[len(store.get(agent_id.key).moves):]:  # Skip the moves a previous run played
         await runtime.send_message(msg, agent_id)
 
     await runtime.stop()
+    MultiplayerUmpireAgent.close_records()
+    journal.close()
+    print(f"Render any position with: python game_record.py show {os.path.abspath('games/default.cgr')} --ply N --svg board.svg")
 
 if __name__ == "__main__":
     asyncio.run(main())
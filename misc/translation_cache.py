@@ -0,0 +1,164 @@
+import collections
+import re
+import sqlite3
+import time
+from typing import Optional
+
+import chess
+
+# Utterances that mean the same move in every position: a bare coordinate move, or castling to a named side.
+# Anything else ("knight to c3", "castle", "take the pawn on d5") may mean another move elsewhere.
+COORDINATE_MOVE_PATTERN = re.compile(r"^(?:(?:play|move)\s+)?[a-h][1-8]\s*(?:-|x|to|takes)?\s*[a-h][1-8](?:\s*=?\s*[qrbn])?$")
+CASTLING_PATTERN = re.compile(r"^(?:castles?|castling)\s+(?:on\s+the\s+)?(?:king\s*side|queen\s*side|short|long)$"
+                              r"|^(?:short|long|king\s*side|queen\s*side)\s+castl\w*$|^(?:o-o(?:-o)?|0-0(?:-0)?)$")
+
+
+def is_legal_uci(uci: str, board: chess.Board) -> bool:
+    try:
+        return chess.Move.from_uci(uci) in board.legal_moves
+    except ValueError:
+        return False
+
+
+def normalize(text: str) -> str:
+    """Lower-case, drop punctuation other than move symbols and collapse whitespace."""
+    text = re.sub(r"[^\w\s\-=+#]", " ", text.lower())
+    return " ".join(text.split())
+
+
+class TranslationCache:
+    """
+    Memoizes natural-language -> UCI translations from the LLM.
+
+    Entries are keyed by the normalized utterance plus a scope: the position
+    (FEN without move counters) for most phrases, or only the side to move for
+    plain coordinate moves ("e2e4", "play e2 to e4") and castling to a named
+    side, since only those mean the same move wherever they are said. Entries expire after `ttl` seconds and the
+    least recently used ones are evicted beyond `capacity`. With a `path` they
+    are also kept in SQLite across runs. Every hit is checked for legality on
+    the current board before it is returned.
+    """
+
+    def __init__(self, capacity: int = 10_000, ttl: Optional[float] = 3600.0, path: Optional[str] = None) -> None:
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries = collections.OrderedDict()
+        self._db = None
+        if path:
+            self._db = sqlite3.connect(path)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "utterance TEXT NOT NULL, scope TEXT NOT NULL, uci TEXT NOT NULL, created REAL NOT NULL, "
+                "PRIMARY KEY (utterance, scope))"
+            )
+            self._db.commit()
+        self.hits = 0
+        self.misses = 0
+        self.stale = 0
+
+    @staticmethod
+    def key(text: str, board: chess.Board) -> tuple:
+        utterance = normalize(text)
+        if COORDINATE_MOVE_PATTERN.match(utterance) or CASTLING_PATTERN.match(utterance):
+            scope = "white" if board.turn == chess.WHITE else "black"
+        else:
+            scope = board.epd()
+        return utterance, scope
+
+    def get(self, text: str, board: chess.Board) -> Optional[str]:
+        """Return the cached UCI move if it is still fresh and legal on this board."""
+        key = self.key(text, board)
+        entry = self._entries.get(key)
+        if entry is None and self._db is not None:
+            row = self._db.execute(
+                "SELECT uci, created FROM translations WHERE utterance = ? AND scope = ?", key
+            ).fetchone()
+            if row is not None:
+                entry = tuple(row)
+                self._remember(key, entry)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        uci, created = entry
+        if self.ttl is not None and time.time() - created > self.ttl:
+            self._forget(key)
+            self.stale += 1
+            self.misses += 1
+            return None
+        if not is_legal_uci(uci, board):
+            self.stale += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return uci
+
+    def put(self, text: str, board: chess.Board, uci: str) -> None:
+        key = self.key(text, board)
+        entry = (uci, time.time())
+        self._remember(key, entry)
+        if self._db is not None:
+            self._db.execute("INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?)", (*key, *entry))
+            self._db.commit()
+
+    def _remember(self, key: tuple, entry: tuple) -> None:
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def _forget(self, key: tuple) -> None:
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM translations WHERE utterance = ? AND scope = ?", key)
+            self._db.commit()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale": self.stale,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+        }
+
+    def close(self) -> None:
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+if __name__ == "__main__":
+    import argparse
+    import asyncio
+    import os
+
+    from stub_llm_server import start_stub_server
+
+    parser = argparse.ArgumentParser(description="Replay repeated phrases through a cached CustomAssistant.")
+    parser.add_argument("--base-url", default=None, help="LLM endpoint (default: start a local stub server)")
+    parser.add_argument("--rounds", type=int, default=20, help="Times to replay the phrase list")
+    parser.add_argument("--db", default=None, help="Optional SQLite file to persist translations")
+    args = parser.parse_args()
+
+    if args.base_url is None:
+        _server, args.base_url = start_stub_server(latency_ms=50)
+    os.environ["LLM_BASE_URL"] = args.base_url
+    from llm_assistant import CustomAssistant
+
+    async def main() -> None:
+        cache = TranslationCache(path=args.db)
+        assistant = CustomAssistant(name="CachedTranslator", cache=cache)
+        phrases = ["open with the king's pawn", "push the pawn in front of my king two squares", "e2 to e4 please"]
+        board = chess.Board()
+        start = time.perf_counter()
+        for _ in range(args.rounds):
+            for phrase in phrases:
+                await assistant.handle_message(phrase, board)
+        elapsed = time.perf_counter() - start
+        print(f"{elapsed / (args.rounds * len(phrases)) * 1000:.2f} ms per translation")
+        print(cache.stats())
+
+    asyncio.run(main())
@@ -0,0 +1,153 @@
+import argparse
+import collections
+import random
+
+import chess
+import chess.engine
+import chess.pgn
+import chess.polyglot
+
+# Points per game result for the side that played the move
+RESULT_POINTS = {"win": 2, "draw": 1, "loss": 0}
+
+
+def polyglot_move(board, move):
+    """Encode a move the Polyglot way: castling is stored as king-takes-rook."""
+    to_square = move.to_square
+    if board.is_castling(move):
+        rook_file = 7 if board.is_kingside_castling(move) else 0
+        to_square = chess.square(rook_file, chess.square_rank(move.from_square))
+    promotion = move.promotion - 1 if move.promotion else 0
+    return to_square | (move.from_square << 6) | (promotion << 12)
+
+
+def collect_moves(pgn_paths, max_ply=20):
+    """
+    Tally result points and game counts per (Zobrist key, Polyglot move) over the first max_ply plies.
+
+    A move repeated from the same position within one game counts once for that game.
+    """
+    points = collections.Counter()
+    counts = collections.Counter()
+    games = 0
+    for path in pgn_paths:
+        with open(path) as pgn:
+            while True:
+                game = chess.pgn.read_game(pgn)
+                if game is None:
+                    break
+                result = game.headers.get("Result", "*")
+                if result not in ("1-0", "0-1", "1/2-1/2"):
+                    continue
+                games += 1
+                board = game.board()
+                seen = set()
+                for ply, move in enumerate(game.mainline_moves()):
+                    if ply >= max_ply:
+                        break
+                    if result == "1/2-1/2":
+                        outcome = "draw"
+                    elif (result == "1-0") == (board.turn == chess.WHITE):
+                        outcome = "win"
+                    else:
+                        outcome = "loss"
+                    key = (chess.polyglot.zobrist_hash(board), polyglot_move(board, move))
+                    if key not in seen:
+                        seen.add(key)
+                        points[key] += RESULT_POINTS[outcome]
+                        counts[key] += 1
+                    board.push(move)
+    return points, counts, games
+
+
+def build_book(pgn_paths, output_path, max_ply=20, min_games=2):
+    """
+    Write a Polyglot .bin book from finished games.
+
+    Moves seen in fewer than min_games games or that only ever lost are left
+    out. Weights are the result points (win 2, draw 1), scaled to fit 16 bits.
+    """
+    points, counts, games = collect_moves(pgn_paths, max_ply)
+    entries = [(key, move, points[key, move]) for (key, move), count in counts.items()
+               if count >= min_games and points[key, move] > 0]
+    scale = max((weight for _, _, weight in entries), default=0) / 0xFFFF
+    entries.sort(key=lambda entry: (entry[0], -entry[2]))
+    with open(output_path, "wb") as f:
+        for key, move, weight in entries:
+            weight = max(1, int(weight / scale)) if scale > 1 else weight
+            f.write(chess.polyglot.ENTRY_STRUCT.pack(key, move, weight, 0))
+    print(f"Wrote {len(entries)} entries from {games} games to {output_path}")
+    return len(entries)
+
+
+class OpeningBook:
+    """
+    Probes a Polyglot book for the first max_ply plies of a game.
+
+    With randomize=True moves are drawn in proportion to their weights,
+    otherwise the highest-weighted move is played.
+    """
+
+    def __init__(self, path, max_ply=16, randomize=True, seed=None):
+        self.reader = chess.polyglot.open_reader(path)
+        self.max_ply = max_ply
+        self.randomize = randomize
+        self.random = random.Random(seed)
+        self.hits = 0
+        self.misses = 0
+
+    def choose(self, board):
+        """Return a book move for the position, or None when out of book."""
+        if board.ply() >= self.max_ply:
+            return None
+        try:
+            if self.randomize:
+                entry = self.reader.weighted_choice(board, random=self.random)
+            else:
+                entry = self.reader.find(board)
+        except IndexError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry.move
+
+    def close(self):
+        self.reader.close()
+
+
+class BookEngine:
+    """
+    Wraps an engine so play() answers from an OpeningBook before searching.
+    probe() does the same for callers that run their own search, like TimeManager.
+    """
+
+    def __init__(self, engine, book):
+        self.engine = engine
+        self.book = book
+
+    def play(self, board, limit, **kwargs):
+        move = self.book.choose(board)
+        if move is not None:
+            return chess.engine.PlayResult(move, None)
+        return self.engine.play(board, limit, **kwargs)
+
+    def probe(self, board, limit):
+        """A book move, else whatever the wrapped engine answers without searching; None if neither has one."""
+        move = self.book.choose(board)
+        if move is not None:
+            return chess.engine.PlayResult(move, None)
+        probe = getattr(self.engine, "probe", None)
+        return probe(board, limit) if probe is not None else None
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a Polyglot opening book from self-play PGNs.")
+    parser.add_argument("pgn", nargs="+", help="PGN files with finished games (e.g. tournament.pgn)")
+    parser.add_argument("-o", "--output", default="book.bin", help="Polyglot .bin file to write")
+    parser.add_argument("--max-ply", type=int, default=20, help="Only book moves from the first N plies")
+    parser.add_argument("--min-games", type=int, default=2, help="Drop moves played in fewer games than this")
+    args = parser.parse_args()
+    build_book(args.pgn, args.output, args.max_ply, args.min_games)
@@ -1,51 +1,90 @@
 import chess
 import chess.engine
 import time
+from engine_pool import EnginePool
+from opening_book import BookEngine, OpeningBook
+from tracing import tracer
 
 # Path to the Stockfish engine (update this to your system's path)
 STOCKFISH_PATH = "/usr/games/stockfish"
 
-def autonomous_chess():
+# Optional Polyglot book (see opening_book.py) probed before the engines for the first BOOK_MAX_PLY plies
+BOOK_PATH = None
+BOOK_MAX_PLY = 16
+
+def play_game(white, black, limit=chess.engine.Limit(time=0.5), verbose=True, pause=0.0,
+              ponder=False, stats=None, max_plies=None, time_manager=None):
+    """
+    Play one game between two engines.
+    With ponder=True each engine keeps searching on its expected reply while the other
+    thinks; pass a pondering.PonderStats as `stats` to collect hit rate and depth per move.
+    With a time_manager.TimeManager, moves are timed by its clocks instead of `limit`.
+    Returns the final board and the think time of every move in seconds.
+    """
     board = chess.Board()
-    
-    # Start two Stockfish engines
-    with chess.engine.SimpleEngine.popen_uci(STOCKFISH_PATH) as engine1, \
-         chess.engine.SimpleEngine.popen_uci(STOCKFISH_PATH) as engine2:
-        
-        print("Autonomous chess game between two Stockfish engines!")
-        time.sleep(1)
-        
-        while not board.is_game_over():
+    engines = {chess.WHITE: (white, "Engine 1"), chess.BLACK: (black, "Engine 2")}
+    move_times = []
+    game = object()  # New game identity, so each engine receives ucinewgame
+
+    info = chess.engine.INFO_BASIC if stats is not None else chess.engine.INFO_NONE
+    while not board.is_game_over() and (max_plies is None or len(board.move_stack) < max_plies):
+        if verbose and board.turn == chess.WHITE:
             print("\nCurrent board position:\n")
             print(board)
             print("\nThinking...\n")
+        if pause:
+            time.sleep(pause)
+
+        engine, name = engines[board.turn]
+        start = time.perf_counter()
+        with tracer.span("engine_think", ply=len(board.move_stack) + 1, engine=name) as span:
+            if time_manager is not None:
+                result = time_manager.play(engine, board, info=info)
+            else:
+                result = engine.play(board, limit, game=game, ponder=ponder, info=info)
+            span.set(move=result.move.uci())
+        move_times.append(time.perf_counter() - start)
+        if stats is not None:
+            stats.record(result, move_times[-1])
+        board.push(result.move)
+        if verbose:
+            print(f"{name} plays: {result.move.uci()}")
+
+    return board, move_times
+
+def autonomous_chess(pool=None):
+    # Warm engines can be shared across games; otherwise start a private pool of two
+    own_pool = pool is None
+    if own_pool:
+        pool = EnginePool(STOCKFISH_PATH, size=2)
+
+    try:
+        # Lease two Stockfish engines
+        with pool.lease() as engine1, pool.lease() as engine2:
+            if BOOK_PATH:
+                book = OpeningBook(BOOK_PATH, max_ply=BOOK_MAX_PLY)
+                engine1, engine2 = BookEngine(engine1, book), BookEngine(engine2, book)
+
+            print("Autonomous chess game between two Stockfish engines!")
             time.sleep(1)
-            
-            # Let engine 1 play
-            result1 = engine1.play(board, chess.engine.Limit(time=0.5))  # 0.5-second time limit
-            board.push(result1.move)
-            print(f"Engine 1 plays: {result1.move.uci()}")
-            
-            if board.is_game_over():
-                break
-            
-            # Let engine 2 play
-            result2 = engine2.play(board, chess.engine.Limit(time=0.5))  # 0.5-second time limit
-            board.push(result2.move)
-            print(f"Engine 2 plays: {result2.move.uci()}")
-        
-        # Game over message
-        print("\nGame Over!")
-        print("Final board position:\n")
-        print(board)
-        if board.is_checkmate():
-            print("Checkmate!")
-        elif board.is_stalemate():
-            print("Stalemate!")
-        elif board.is_insufficient_material():
-            print("Draw due to insufficient material!")
-        else:
-            print("Game result: Draw!")
+
+            board, _ = play_game(engine1, engine2, chess.engine.Limit(time=0.5), pause=0.5)  # 0.5-second time limit
+
+            # Game over message
+            print("\nGame Over!")
+            print("Final board position:\n")
+            print(board)
+            if board.is_checkmate():
+                print("Checkmate!")
+            elif board.is_stalemate():
+                print("Stalemate!")
+            elif board.is_insufficient_material():
+                print("Draw due to insufficient material!")
+            else:
+                print("Game result: Draw!")
+    finally:
+        if own_pool:
+            pool.close()
 
 if __name__ == "__main__":
     autonomous_chess()
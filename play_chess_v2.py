@@ -1,109 +1,169 @@
 import chess
 import chess.engine
 import chess.svg
-import time
 import os
+import time
 import cv2
-import numpy as np
-from svglib.svglib import svg2rlg
-from reportlab.graphics import renderPM
+from board_renderer import export_svg
+from game_record import GameRecord
+from render_pipeline import RenderPipeline
+from engine_pool import EnginePool
+from opening_book import BookEngine, OpeningBook
+from pondering import PonderStats, format_summary
+from time_manager import TimeManager
+from tracing import tracer
 
 # Path to the Stockfish engine (update this to your system's path)
 STOCKFISH_PATH = "/usr/games/stockfish"
 
-# Ensure images folder exists
-os.makedirs("images", exist_ok=True)
+# Optional Polyglot book (see opening_book.py) probed before the engines for the first BOOK_MAX_PLY plies
+BOOK_PATH = None
+BOOK_MAX_PLY = 16
+
+# Compact move record of the game (see game_record.py); render any ply from it with
+# `python game_record.py show chess_game.cgr --ply N --svg board.svg`. None disables it.
+RECORD_PATH = "chess_game.cgr"
+
+# Also write every position to images/ as SVG (slow and large; prefer RECORD_PATH)
+SAVE_SVG = False
+
+# Let each engine search on its expected reply while the other one thinks (see pondering.py)
+PONDER = False
+
+# Per-side clock as (base seconds, increment), e.g. (60, 1): moves are timed by time_manager.py,
+# which stops early on stable best moves and spends the savings on critical positions.
+# None plays every move with Limit(time=0.5). Pondering only applies to fixed-time moves.
+TIME_CONTROL = None
+
+# Show the live OpenCV window; "drop" skips stale display frames, "block" waits for the UI.
+# Video frames are never dropped either way.
+DISPLAY = True
+DISPLAY_POLICY = "drop"
 
 def save_board_image(board, move_number):
     """Save the current board as an SVG image without coordinates/labels."""
-    svg_data = chess.svg.board(board, coordinates=False)
-    with open(f"images/board_{move_number}.svg", "w") as f:
-        f.write(svg_data)
+    os.makedirs("images", exist_ok=True)
+    export_svg(board, f"images/board_{move_number}.svg")
 
-def svg_to_cv2_image(svg_path):
-    """Convert an SVG file to a format suitable for OpenCV (PNG)."""
-    drawing = svg2rlg(svg_path)
-    png_data = renderPM.drawToPIL(drawing)
-    # Convert to NumPy array for OpenCV compatibility
-    return cv2.cvtColor(np.array(png_data), cv2.COLOR_RGB2BGR)
+def record_position(pipeline, board, move_number):
+    """Hand the current position to the render pipeline, optionally exporting it as SVG too."""
+    if SAVE_SVG:
+        save_board_image(board, move_number)
+    pipeline.submit(board)
 
-def autonomous_chess():
+def autonomous_chess(pool=None):
     board = chess.Board()
     move_number = 0  # Track the number of moves
     
-    # Initialize video writer
-    video_writer = cv2.VideoWriter('chess_game.mp4', cv2.VideoWriter_fourcc(*'mp4v'), 2, (800, 800))
+    # Rendering, display and video encoding run on background threads
+    pipeline = RenderPipeline('chess_game.mp4', fps=2, size=800, display=DISPLAY, display_policy=DISPLAY_POLICY)
+    pipeline.start()
     
-    # Start two Stockfish engines
-    with chess.engine.SimpleEngine.popen_uci(STOCKFISH_PATH) as engine1, \
-         chess.engine.SimpleEngine.popen_uci(STOCKFISH_PATH) as engine2:
-        
-        print("Autonomous chess game between two Stockfish engines!")
-        time.sleep(1)
-        
-        while not board.is_game_over():
-            move_number += 1
-            
-            # Save the current board position
-            save_board_image(board, move_number)
-            
-            # Convert SVG to OpenCV-compatible format and display it
-            frame = svg_to_cv2_image(f"images/board_{move_number}.svg")
-            cv2.imshow("Chess Game", frame)
-            video_writer.write(frame)  # Save frame to video
-            
-            if cv2.waitKey(500) & 0xFF == ord('q'):  # Press 'q' to quit
-                break
-            
-            # Let engine 1 play
-            result1 = engine1.play(board, chess.engine.Limit(time=0.5))  # 0.5-second time limit
-            board.push(result1.move)
-            print(f"Engine 1 plays: {result1.move.uci()}")
-            
-            if board.is_game_over():
-                break
-            
-            move_number += 1
-            
-            # Save the current board position after engine 1's move
-            save_board_image(board, move_number)
+    stats = PonderStats()
+    time_manager = TimeManager(*TIME_CONTROL) if TIME_CONTROL else None
+    info = chess.engine.INFO_BASIC  # Depth and nodes for the ponder statistics
+    
+    record = None
+    if RECORD_PATH:
+        if os.path.exists(RECORD_PATH):
+            os.remove(RECORD_PATH)  # One game per record
+        record = GameRecord(RECORD_PATH)
+    
+    # Warm engines can be shared across games; otherwise start a private pool of two
+    own_pool = pool is None
+    if own_pool:
+        pool = EnginePool(STOCKFISH_PATH, size=2)
+    
+    try:
+        # Lease two Stockfish engines
+        with pool.lease() as engine1, pool.lease() as engine2:
+            if BOOK_PATH:
+                book = OpeningBook(BOOK_PATH, max_ply=BOOK_MAX_PLY)
+                engine1, engine2 = BookEngine(engine1, book), BookEngine(engine2, book)
             
-            # Convert SVG to OpenCV-compatible format and display it
-            frame = svg_to_cv2_image(f"images/board_{move_number}.svg")
-            cv2.imshow("Chess Game", frame)
-            video_writer.write(frame)  # Save frame to video
+            print("Autonomous chess game between two Stockfish engines!")
             
-            if cv2.waitKey(500) & 0xFF == ord('q'):  # Press 'q' to quit
-                break
+            while not board.is_game_over():
+                move_number += 1
+                
+                # Queue the current board position for rendering and encoding
+                record_position(pipeline, board, move_number)
+                
+                if pipeline.poll_display():  # Press 'q' to quit
+                    break
+                
+                # Let engine 1 play
+                start = time.perf_counter()
+                with tracer.span("engine_think", ply=move_number, engine="engine1") as span:
+                    if time_manager is not None:
+                        result1 = time_manager.play(engine1, board, info=info)
+                    else:
+                        result1 = engine1.play(board, chess.engine.Limit(time=0.5), ponder=PONDER, info=info)  # 0.5-second time limit
+                    span.set(move=result1.move.uci())
+                stats.record(result1, time.perf_counter() - start)
+                board.push(result1.move)
+                if record is not None:
+                    record.append(result1.move, board)
+                print(f"Engine 1 plays: {result1.move.uci()}")
+                
+                if board.is_game_over():
+                    break
+                
+                move_number += 1
+                
+                # Queue the board position after engine 1's move
+                record_position(pipeline, board, move_number)
+                
+                if pipeline.poll_display():  # Press 'q' to quit
+                    break
+                
+                # Let engine 2 play
+                start = time.perf_counter()
+                with tracer.span("engine_think", ply=move_number, engine="engine2") as span:
+                    if time_manager is not None:
+                        result2 = time_manager.play(engine2, board, info=info)
+                    else:
+                        result2 = engine2.play(board, chess.engine.Limit(time=0.5), ponder=PONDER, info=info)  # 0.5-second time limit
+                    span.set(move=result2.move.uci())
+                stats.record(result2, time.perf_counter() - start)
+                board.push(result2.move)
+                if record is not None:
+                    record.append(result2.move, board)
+                print(f"Engine 2 plays: {result2.move.uci()}")
             
-            # Let engine 2 play
-            result2 = engine2.play(board, chess.engine.Limit(time=0.5))  # 0.5-second time limit
-            board.push(result2.move)
-            print(f"Engine 2 plays: {result2.move.uci()}")
-        
-        # Save the final board position
-        save_board_image(board, move_number + 1)
-        
-        # Convert final SVG to OpenCV-compatible format and display it
-        frame = svg_to_cv2_image(f"images/board_{move_number + 1}.svg")
-        cv2.imshow("Chess Game", frame)
-        video_writer.write(frame)  # Save final frame to video
-        
-        # Game over message
-        print("\nGame Over!")
-        print("Final board position:\n")
-        print(board)
-        if board.is_checkmate():
-            print("Checkmate!")
-        elif board.is_stalemate():
-            print("Stalemate!")
-        elif board.is_insufficient_material():
-            print("Draw due to insufficient material!")
-        else:
-            print("Game result: Draw!")
+            # Queue the final board position
+            record_position(pipeline, board, move_number + 1)
+    finally:
+        # Flush every queued frame to chess_game.mp4, also when 'q' was pressed
+        pipeline.close()
+        if record is not None:
+            record.close()
+        if own_pool:
+            pool.close()
+        tracer.flush()  # Write the metrics file, if tracing is on
+    
+    # Game over message
+    print("\nGame Over!")
+    print("Final board position:\n")
+    print(board)
+    if board.is_checkmate():
+        print("Checkmate!")
+    elif board.is_stalemate():
+        print("Stalemate!")
+    elif board.is_insufficient_material():
+        print("Draw due to insufficient material!")
+    else:
+        print("Game result: Draw!")
+    print(f"Video frames written: {pipeline.frames_encoded}, display frames dropped: {pipeline.display_frames_dropped}")
+    print(f"Search: {format_summary(stats.summary())}{' (pondering)' if PONDER and not time_manager else ''}")
+    if time_manager is not None:
+        print(f"Clocks left: {time_manager.clocks[chess.WHITE]:.1f}s / {time_manager.clocks[chess.BLACK]:.1f}s, "
+              f"search stops: {time_manager.stops}")
+    if record is not None:
+        print(f"Game record: {RECORD_PATH} ({len(record)} plies, {os.path.getsize(RECORD_PATH)} bytes)")
     
-    video_writer.release()
-    cv2.destroyAllWindows()
+    if DISPLAY:
+        cv2.destroyAllWindows()
 
 if __name__ == "__main__":
     autonomous_chess()
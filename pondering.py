@@ -0,0 +1,109 @@
+"""
+Ponder statistics: how often engines predicted the reply, and what pondering bought.
+
+With engine.play(board, limit, ponder=True) python-chess leaves the engine
+searching the position after its expected reply ("go ponder") while the
+opponent thinks. If the opponent plays that move, the next play() sends
+"ponderhit" and the engine keeps the search it already has; otherwise it
+sends "stop" and searches from scratch. PonderStats compares the predicted
+replies with the moves actually played and collects depth and nodes per move,
+so ponder and non-ponder runs can be compared at the same wall clock.
+"""
+import statistics
+
+import chess
+import chess.engine
+
+
+class PonderStats:
+    """
+    Record every PlayResult with record(); summary() gives the hit rate and search effort per move.
+    Without pondering the hit rate still shows how often pondering would have paid off.
+    """
+
+    def __init__(self):
+        self.predictions = 0
+        self.hits = 0
+        self.moves = []  # (seconds, depth, nodes, ponderhit: None if the mover had nothing to ponder on)
+        self._expected = None  # Reply the previous mover pondered on
+        self._pending_hit = None  # Whether that prediction came true: it decides the previous mover's next search
+
+    def record(self, result, seconds):
+        # A ponderhit does not speed up the predicted move itself, but the predicting engine's next move,
+        # which is the one recorded right after it
+        self.moves.append((seconds, result.info.get("depth"), result.info.get("nodes"), self._pending_hit))
+        self._pending_hit = None
+        if self._expected is not None:
+            self._pending_hit = result.move == self._expected
+            self.predictions += 1
+            self.hits += self._pending_hit
+        self._expected = result.ponder
+
+    def summary(self):
+        searched = [move for move in self.moves if move[1] is not None]
+        think = sum(move[0] for move in self.moves)
+
+        def mean_depth(moves):
+            return statistics.fmean(move[1] for move in moves) if moves else None
+
+        return {
+            "moves": len(self.moves),
+            "predictions": self.predictions,
+            "ponder_hits": self.hits,
+            "hit_rate": self.hits / self.predictions if self.predictions else 0.0,
+            "avg_think_ms": think / len(self.moves) * 1000 if self.moves else 0.0,
+            "avg_depth": mean_depth(searched),
+            "avg_depth_on_hit": mean_depth([move for move in searched if move[3] is True]),
+            "avg_depth_on_miss": mean_depth([move for move in searched if move[3] is False]),
+            "nodes_per_wall_second": sum(move[2] or 0 for move in searched) / think if think else 0.0,
+        }
+
+
+def format_summary(summary):
+    depth = summary["avg_depth"]
+    return (f"{summary['moves']} moves, predicted replies {summary['ponder_hits']}/{summary['predictions']} "
+            f"({summary['hit_rate']:.0%}), {summary['avg_think_ms']:.0f} ms/move, "
+            + (f"avg depth {depth:.1f}" if depth is not None else "no search info"))
+
+
+if __name__ == "__main__":
+    import argparse
+    import sys
+
+    from play_chess_v1 import play_game
+
+    parser = argparse.ArgumentParser(description="Compare ponder and non-ponder play at the same time per move.")
+    parser.add_argument("--engine", default=None, help="UCI engine command (default: the bundled fake engine)")
+    parser.add_argument("--time", type=float, default=0.2, help="Seconds per move, as Limit(time=...)")
+    parser.add_argument("--max-plies", type=int, default=60)
+    parser.add_argument("--depth-time", type=int, default=10, help="Fake engine: ms per search depth")
+    parser.add_argument("--miss-rate", type=int, default=0, help="Fake engine: percent of wrong expected replies")
+    args = parser.parse_args()
+
+    command = args.engine or [sys.executable, "fake_uci_engine.py"]
+    options = {} if args.engine else {"DepthTime": args.depth_time, "MissRate": args.miss_rate}
+
+    def run(ponder):
+        engines = [chess.engine.SimpleEngine.popen_uci(command) for _ in range(2)]
+        try:
+            for engine in engines:
+                engine.configure(options)
+            stats = PonderStats()
+            play_game(*engines, chess.engine.Limit(time=args.time), verbose=False,
+                      ponder=ponder, stats=stats, max_plies=args.max_plies)
+            return stats.summary()
+        finally:
+            for engine in engines:
+                engine.quit()
+
+    baseline, pondering = run(False), run(True)
+    print(f"baseline: {format_summary(baseline)}")
+    print(f"   ponder: {format_summary(pondering)}")
+    for key, outcome in (("avg_depth_on_hit", "a ponderhit"), ("avg_depth_on_miss", "a wrong prediction")):
+        if pondering[key] is not None:
+            print(f"   ponder: avg depth {pondering[key]:.1f} after {outcome}")
+    if baseline["avg_depth"] and pondering["avg_depth"]:
+        print(f"depth per wall-clock second: baseline {baseline['avg_depth'] / (baseline['avg_think_ms'] / 1000):.1f}, "
+              f"ponder {pondering['avg_depth'] / (pondering['avg_think_ms'] / 1000):.1f}; "
+              f"nodes per wall-clock second: baseline {baseline['nodes_per_wall_second']:,.0f}, "
+              f"ponder {pondering['nodes_per_wall_second']:,.0f}")
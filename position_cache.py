@@ -0,0 +1,225 @@
+import collections
+import sqlite3
+import threading
+import time
+
+import chess
+import chess.engine
+import chess.polyglot
+
+
+# SQLite writes are batched: one transaction per this many results, or once this many seconds passed
+COMMIT_EVERY = 256
+COMMIT_INTERVAL = 5.0
+# Past this many plies without a capture or pawn move the 50-move rule starts to shape engine results
+HALFMOVE_LIMIT = 50
+
+
+def depends_on_history(board, move=None):
+    """
+    Whether an engine result for `board` may depend on more than the position the Zobrist key
+    describes: the position (or the one after `move`) occurred before in this game, so an engine
+    scores it by repetition, or the halfmove clock is close enough to the 50-move rule to matter.
+    """
+    if board.halfmove_clock >= HALFMOVE_LIMIT or board.is_repetition(2):
+        return True
+    if move is None:
+        return False
+    board.push(move)
+    try:
+        return board.is_repetition(2)
+    finally:
+        board.pop()
+
+
+def limit_key(limit):
+    """Stable text form of a chess.engine.Limit, e.g. 'time=0.5'."""
+    fields = ("time", "depth", "nodes", "mate", "white_clock", "black_clock", "white_inc", "black_inc", "remaining_moves")
+    return ",".join(f"{name}={getattr(limit, name)}" for name in fields if getattr(limit, name, None) is not None)
+
+
+def _signed(key):
+    """Zobrist hashes are unsigned 64-bit; SQLite integers are signed."""
+    return key - (1 << 64) if key >= (1 << 63) else key
+
+
+class PositionCache:
+    """
+    Transposition cache of engine results keyed by Zobrist hash and search limit.
+
+    Recently used entries live in an in-memory LRU of `capacity` entries. With a
+    `path`, every result is also written to a SQLite database (WAL mode) that is
+    shared by later runs and by concurrent processes; memory misses fall back to
+    it and promote the entry back into the LRU. Writes are queued and committed
+    in batches (see COMMIT_EVERY), and by flush() and close(); a crash loses at
+    most the queued batch.
+
+    The key holds neither the game's history nor the move counters, so positions
+    that differ only in earlier repetitions or the halfmove clock share entries.
+    CachedEngine therefore leaves such positions to the engine (depends_on_history).
+    """
+
+    def __init__(self, path=None, capacity=100_000):
+        self.capacity = capacity
+        self._memory = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+        self._pending = {}  # (zobrist, search_limit) -> row not yet written to SQLite
+        self._last_commit = time.monotonic()
+        if path:
+            self._db = sqlite3.connect(path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS positions ("
+                "zobrist INTEGER NOT NULL, search_limit TEXT NOT NULL, move TEXT NOT NULL, ponder TEXT, "
+                "score_cp INTEGER, score_mate INTEGER, PRIMARY KEY (zobrist, search_limit))"
+            )
+            self._db.commit()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(board, limit, namespace=""):
+        """Namespace keeps results of different engines sharing one store apart."""
+        search_limit = limit_key(limit)
+        return chess.polyglot.zobrist_hash(board), f"{namespace}|{search_limit}" if namespace else search_limit
+
+    def get(self, board, limit, namespace=""):
+        """Return the cached (move, ponder, white-relative score) for the position, or None."""
+        key = self.key(board, limit, namespace)
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return entry
+            if self._db is not None:
+                row = self._pending.get((_signed(key[0]), key[1]))  # Queued, not written yet
+                if row is not None:
+                    row = row[2:]
+                else:
+                    row = self._db.execute(
+                        "SELECT move, ponder, score_cp, score_mate FROM positions WHERE zobrist = ? AND search_limit = ?",
+                        (_signed(key[0]), key[1]),
+                    ).fetchone()
+                if row is not None:
+                    entry = self._row_to_entry(row)
+                    self._remember(key, entry)
+                    self.disk_hits += 1
+                    return entry
+            self.misses += 1
+            return None
+
+    def put(self, board, limit, move, ponder=None, score=None, namespace=""):
+        """Store an engine result; `score` is a chess.engine.PovScore (or None)."""
+        key = self.key(board, limit, namespace)
+        white_score = score.white() if score is not None else None
+        entry = (move, ponder, white_score)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._pending[_signed(key[0]), key[1]] = (
+                    _signed(key[0]), key[1], move.uci(), ponder.uci() if ponder else None,
+                    white_score.score() if white_score is not None and not white_score.is_mate() else None,
+                    white_score.mate() if white_score is not None and white_score.is_mate() else None)
+                if len(self._pending) >= COMMIT_EVERY or time.monotonic() - self._last_commit >= COMMIT_INTERVAL:
+                    self._write_pending()
+
+    def flush(self):
+        """Write queued results to SQLite now."""
+        with self._lock:
+            self._write_pending()
+
+    def _write_pending(self):
+        # One short transaction per batch, so concurrent processes are not kept waiting for the write lock
+        if self._db is not None and self._pending:
+            self._db.executemany("INSERT OR REPLACE INTO positions VALUES (?, ?, ?, ?, ?, ?)", self._pending.values())
+            self._db.commit()
+            self._pending = {}
+        self._last_commit = time.monotonic()
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def _row_to_entry(row):
+        move, ponder, score_cp, score_mate = row
+        if score_mate is not None:
+            score = chess.engine.Mate(score_mate)
+        elif score_cp is not None:
+            score = chess.engine.Cp(score_cp)
+        else:
+            score = None
+        return chess.Move.from_uci(move), chess.Move.from_uci(ponder) if ponder else None, score
+
+    def stats(self):
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "lookups": lookups,
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+            "entries_in_memory": len(self._memory),
+            "evictions": self.evictions,
+        }
+
+    def close(self):
+        if self._db is not None:
+            self.flush()
+            self._db.close()
+            self._db = None
+
+
+class CachedEngine:
+    """
+    Wraps a SimpleEngine so play() is answered from a PositionCache when possible.
+
+    Cache hits are re-checked for legality (the Zobrist key ignores move
+    counters) and return a PlayResult without talking to the engine. Positions
+    whose result depends on the game's history (a repetition, or a halfmove
+    clock near the 50-move rule) are neither answered from the cache nor stored
+    in it. probe() and store() expose the same lookup to callers that search on
+    their own.
+    Every other attribute is passed through to the wrapped engine.
+    """
+
+    def __init__(self, engine, cache, namespace=""):
+        self.engine = engine
+        self.cache = cache
+        self.namespace = namespace
+
+    def play(self, board, limit, **kwargs):
+        result = self.probe(board, limit)
+        if result is not None:
+            return result
+        kwargs["info"] = kwargs.get("info", chess.engine.INFO_NONE) | chess.engine.INFO_SCORE
+        result = self.engine.play(board, limit, **kwargs)
+        self.store(board, limit, result)
+        return result
+
+    def probe(self, board, limit):
+        """The cached result for the position and limit as a PlayResult, or None."""
+        if depends_on_history(board):
+            return None
+        entry = self.cache.get(board, limit, self.namespace)
+        if entry is None or entry[0] not in board.legal_moves or depends_on_history(board, entry[0]):
+            return None
+        move, ponder, score = entry
+        info = {"score": chess.engine.PovScore(score, chess.WHITE)} if score is not None else {}
+        return chess.engine.PlayResult(move, ponder, info)
+
+    def store(self, board, limit, result):
+        """Cache a result found by a search outside play() (TimeManager runs its own)."""
+        if result.move is not None and not depends_on_history(board):
+            self.cache.put(board, limit, result.move, result.ponder, result.info.get("score"), self.namespace)
+
+    def __getattr__(self, name):
+        return getattr(self.engine, name)
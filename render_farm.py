@@ -0,0 +1,279 @@
+"""
+Offline render farm: turn stored games into videos across a process pool.
+
+Games are streamed from PGN files (or compact .cgr game records) and every
+worker renders whole games with its own BoardRenderer, so game play and video
+production are decoupled and scale with the number of cores. Each position is
+rendered once: a frame that does not change (the final position, null moves,
+a repeated position with the same highlight) is held for longer instead of
+being redrawn. GIFs store the hold as the frame's duration; MP4 and WebM run
+at a fixed frame rate, so the rendered image is passed to the encoder again for
+every frame of the hold and encoded each time. Every format is
+written as the game is replayed, so a worker holds only a few frames at a
+time however long the game is. A game that fails to render is reported and
+skipped, and its partial files are removed.
+
+    python render_farm.py tournament.pgn -o videos --formats mp4,gif --size 480 --move-duration 0.5
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import time
+
+import chess
+import cv2
+import numpy as np
+from PIL import GifImagePlugin, Image
+
+from board_renderer import BoardRenderer, quiet_stderr
+from game_record import GameRecord, unpack_move
+from game_sources import read_tasks
+
+# Formats written with cv2.VideoWriter: extension -> fourcc. FFmpeg warns that WebM has no
+# tag for VP80 and then writes VP8 anyway.
+VIDEO_CODECS = {"mp4": "mp4v", "webm": "VP80"}
+FORMATS = ("mp4", "gif", "webm")
+
+_renderer = None
+_settings = None
+_palette = None
+
+
+def _init_worker(settings):
+    global _renderer, _settings, _palette
+    with quiet_stderr():  # renderPM prints "colinear!" while the piece glyphs are rasterized
+        _renderer = BoardRenderer(size=settings["size"])
+    _settings = settings
+    if "gif" in settings["formats"]:
+        # One palette for every GIF frame: all pieces plus both highlighted square colours.
+        # Quantizing against it is several times faster than a palette per frame.
+        frame = _renderer.render(chess.Board(), lastmove=chess.Move.from_uci("a2a3"))
+        _palette = _to_image(frame).quantize(256, dither=Image.Dither.NONE)
+
+
+def _to_image(frame):
+    return Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB))
+
+
+def read_games(paths):
+    """
+    Yield one task (fen, moves, headers) per game of every PGN or .cgr file, lazily.
+    Game records also pass their checkpoints, which place the board after unknown moves.
+    """
+    index = 0
+    for path in paths:
+        if path.lower().endswith(".cgr"):
+            record = GameRecord(path, readonly=True)
+            yield {"index": index, "headers": {"Event": os.path.splitext(os.path.basename(path))[0]},
+                   "fen": record.board(0).fen(), "moves": [unpack_move(word).uci() for word in record.moves],
+                   "checkpoints": dict(record.checkpoints)}
+            index += 1
+            continue
+        for task in read_tasks(path, start_index=index):
+            index = task["index"] + 1
+            yield task
+
+
+def output_name(task):
+    """File name (without extension) for a game: index plus the players, filesystem-safe."""
+    headers = task["headers"]
+    players = f"{headers.get('White', '')}-{headers.get('Black', '')}".strip("-") or headers.get("Event", "game")
+    return f"{task['index']:05d}_" + re.sub(r"[^A-Za-z0-9._-]+", "_", players)[:60]
+
+
+def timeline(task, move_duration, end_hold, highlight=True):
+    """
+    The game as (key, board, lastmove, seconds) segments, one per distinct frame.
+    Consecutive positions that draw the same image are merged into one longer segment.
+    """
+    board = chess.Board(task["fen"])
+    segments = []
+
+    def add(lastmove, seconds):
+        key = (board.board_fen(), lastmove if highlight else None)
+        if segments and segments[-1][0] == key:
+            segments[-1][3] += seconds
+        else:
+            segments.append([key, board.copy(stack=False), key[1], seconds])
+
+    checkpoints = task.get("checkpoints", {})
+    add(None, move_duration)
+    for ply, uci in enumerate(task["moves"], 1):
+        move = chess.Move.from_uci(uci)
+        if ply in checkpoints:
+            board.set_fen(checkpoints[ply])
+        else:
+            board.push(move)
+        add(move if move else None, move_duration)
+    segments[-1][3] += end_hold
+    return segments
+
+
+class _GifWriter:
+    """
+    An animated GIF written frame by frame, with the same write()/release() calls as cv2.VideoWriter.
+    All frames share the worker's palette, so one global colour table serves the whole file. After
+    the first frame only the rectangle that changed is stored, with its unchanged pixels set to a
+    transparent colour the rectangle does not use, as Pillow's own GIF writer does.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "wb")
+        self._previous = None
+
+    def write(self, image, duration):
+        pixels = np.asarray(image)
+        params = {"duration": duration}
+        if self._previous is None:
+            header, _ = GifImagePlugin.getheader(image, info={"loop": 0})
+            self._file.write(b"".join(header))
+            top, left, region = 0, 0, pixels
+        else:
+            changed = pixels != self._previous
+            rows, columns = np.flatnonzero(changed.any(axis=1)), np.flatnonzero(changed.any(axis=0))
+            if not rows.size:
+                rows = columns = np.zeros(1, dtype=int)  # Same image again: one pixel carries the duration
+            top, bottom, left, right = rows[0], rows[-1] + 1, columns[0], columns[-1] + 1
+            region = pixels[top:bottom, left:right]
+            unused = np.flatnonzero(np.bincount(region.ravel(), minlength=256) == 0)
+            if unused.size:
+                region = np.where(changed[top:bottom, left:right], region, unused[0]).astype(np.uint8)
+                params["transparency"] = int(unused[0])
+        frame = Image.frombytes("P", (region.shape[1], region.shape[0]), np.ascontiguousarray(region).tobytes())
+        for data in GifImagePlugin.getdata(frame, offset=(int(left), int(top)), **params):
+            self._file.write(data)
+        self._previous = pixels
+
+    def release(self):
+        if not self._file.closed:
+            self._file.write(b";")  # Trailer
+            self._file.close()
+
+
+def _open_writer(path, fmt, fps, size):
+    if fmt == "gif":
+        return _GifWriter(path)
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*VIDEO_CODECS[fmt]), fps, (size, size))
+    if not writer.isOpened():
+        raise RuntimeError(f"OpenCV cannot write {path} with codec {VIDEO_CODECS[fmt]}")
+    return writer
+
+
+def render_game(task):
+    """Render one game to every requested format; returns its statistics, with "error" if it failed."""
+    settings = _settings
+    name = output_name(task)
+    paths = {fmt: os.path.join(settings["output_dir"], f"{name}.{fmt}") for fmt in settings["formats"]}
+    result = {"index": task["index"], "name": name, "plies": len(task["moves"]), "frames_rendered": 0,
+              "frames_written": 0, "skipped": all(os.path.exists(path) for path in paths.values())}
+    if result["skipped"]:
+        return result  # Rendered by an earlier run
+
+    fps = 1.0 / settings["move_duration"]
+    # Keep the extension in the temporary name, OpenCV picks the container by it
+    tmp_paths = {fmt: f"{path[:-len(fmt) - 1]}.part.{fmt}" for fmt, path in paths.items()}
+    writers = {}
+    try:
+        for fmt in paths:
+            writers[fmt] = _open_writer(tmp_paths[fmt], fmt, fps, settings["size"])
+        _write_frames(task, writers, fps, result)
+        for fmt, writer in writers.items():
+            writer.release()
+            os.replace(tmp_paths[fmt], paths[fmt])  # A crash never leaves a truncated video behind
+    except Exception as error:
+        for writer in writers.values():
+            writer.release()
+        for path in tmp_paths.values():
+            if os.path.exists(path):
+                os.remove(path)
+        result["error"] = f"{type(error).__name__}: {error}"
+    return result
+
+
+def _write_frames(task, writers, fps, result):
+    """Replay the game into the open writers, rendering each distinct frame once."""
+    settings = _settings
+    recent = {}  # Last few frames by key: repetitions come back to a position within a few plies
+    render_time = 0.0
+    start = time.perf_counter()
+    for key, board, lastmove, seconds in timeline(task, settings["move_duration"], settings["end_hold"],
+                                                  settings["highlight"]):
+        frame = recent.get(key)
+        if frame is None:
+            render_start = time.perf_counter()
+            frame = recent[key] = _renderer.render(board, lastmove=lastmove)
+            render_time += time.perf_counter() - render_start
+            result["frames_rendered"] += 1
+            if len(recent) > 8:
+                del recent[next(iter(recent))]
+        for fmt, writer in writers.items():
+            if fmt == "gif":
+                writer.write(_to_image(frame).quantize(palette=_palette, dither=Image.Dither.NONE),
+                             round(seconds * 1000))
+                result["frames_written"] += 1
+                continue
+            for _ in range(max(1, round(seconds * fps))):  # A hold re-encodes the frame but does not redraw it
+                writer.write(frame)
+                result["frames_written"] += 1
+    result["render_s"] = render_time
+    result["encode_s"] = time.perf_counter() - start - render_time
+
+
+def run_farm(inputs, output_dir="videos", formats=("mp4",), size=800, move_duration=0.5, end_hold=2.0,
+             highlight=True, workers=None):
+    """Render every game of `inputs` into output_dir; games already rendered are skipped."""
+    for fmt in formats:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format: {fmt}")
+    if workers is None:
+        workers = os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+    settings = {"output_dir": output_dir, "formats": tuple(formats), "size": size, "move_duration": move_duration,
+                "end_hold": end_hold, "highlight": highlight}
+
+    start = time.perf_counter()
+    totals = {"games": 0, "skipped": 0, "errors": 0, "plies": 0, "frames_rendered": 0, "frames_written": 0}
+    with multiprocessing.Pool(workers, initializer=_init_worker, initargs=(settings,)) as pool:
+        for result in pool.imap_unordered(render_game, read_games(inputs)):
+            if result["skipped"]:
+                totals["skipped"] += 1
+                continue
+            if "error" in result:
+                totals["errors"] += 1
+                print(f"{result['name']} failed: {result['error']}")
+                continue
+            totals["games"] += 1
+            for key in ("plies", "frames_rendered", "frames_written"):
+                totals[key] += result[key]
+            print(f"{result['name']}: {result['plies']} plies, {result['frames_rendered']} frames rendered, "
+                  f"{result['render_s'] * 1000:.0f} ms render + {result['encode_s'] * 1000:.0f} ms encode")
+        pool.close()
+        pool.join()
+
+    elapsed = time.perf_counter() - start
+    totals.update({
+        "workers": workers,
+        "elapsed_s": elapsed,
+        "games_per_minute": totals["games"] / elapsed * 60 if elapsed else 0.0,
+    })
+    return totals
+
+
+if __name__ == "__main__":
+    import json
+
+    parser = argparse.ArgumentParser(description="Render stored games (PGN or .cgr) to videos in parallel.")
+    parser.add_argument("inputs", nargs="+", help="PGN files or compact game records (.cgr)")
+    parser.add_argument("-o", "--output-dir", default="videos")
+    parser.add_argument("--formats", default="mp4", help=f"Comma-separated, any of {', '.join(FORMATS)}")
+    parser.add_argument("--size", type=int, default=800, help="Frame size in pixels")
+    parser.add_argument("--move-duration", type=float, default=0.5, help="Seconds each move stays on screen")
+    parser.add_argument("--end-hold", type=float, default=2.0, help="Extra seconds on the final position")
+    parser.add_argument("--no-highlight", action="store_true", help="Do not highlight the last move")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    stats = run_farm(args.inputs, args.output_dir, args.formats.split(","), args.size, args.move_duration,
+                     args.end_hold, not args.no_highlight, args.workers)
+    print(json.dumps(stats, indent=2))
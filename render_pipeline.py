@@ -0,0 +1,180 @@
+import queue
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+import chess
+import cv2
+
+from board_renderer import BoardRenderer
+from tracing import tracer
+
+_STOP = object()
+
+
+@dataclass
+class Snapshot:
+    """A lightweight copy of a position handed from the game loop to the pipeline."""
+    fen: str
+    lastmove: Optional[str] = None
+    ply: int = 0
+
+
+class RenderPipeline:
+    """
+    Producer/consumer pipeline that renders and encodes frames off the game loop.
+
+    The game loop calls submit() with the current board, which only enqueues a
+    Snapshot. A render thread turns snapshots into frames and hands them to an
+    encoder thread that writes the video. Both queues are bounded: when they are
+    full submit() blocks, so video frames are never dropped. Display frames go
+    through a one-slot buffer that the main thread drains with poll_display();
+    with display_policy="drop" a frame the UI has not shown yet is replaced by
+    the newer one, with "block" the render thread waits for the UI instead.
+    """
+
+    def __init__(self, video_path="chess_game.mp4", fps=2, size=800, max_queue=64,
+                 display=True, display_policy="drop", window_name="Chess Game"):
+        if display_policy not in ("drop", "block"):
+            raise ValueError(f"Unknown display policy: {display_policy}")
+        self.size = size
+        self.display = display
+        self.display_policy = display_policy
+        self.window_name = window_name
+        self._renderer = BoardRenderer(size=size)
+        self._video_writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (size, size))
+        self._snapshots = queue.Queue(maxsize=max_queue)
+        self._frames = queue.Queue(maxsize=max_queue)
+        self._display_slot = queue.Queue(maxsize=1)
+        self._render_thread = threading.Thread(target=self._render_loop, name="render", daemon=True)
+        self._encode_thread = threading.Thread(target=self._encode_loop, name="encode", daemon=True)
+        self._closed = False
+        self._error = None
+        self.frames_submitted = 0
+        self.frames_encoded = 0
+        self.display_frames_shown = 0
+        self.display_frames_dropped = 0
+        self.submit_wait_time = 0.0
+        self.max_queue_depth = 0
+
+    def start(self):
+        self._render_thread.start()
+        self._encode_thread.start()
+        return self
+
+    def submit(self, board):
+        """Queue the current position for rendering; blocks only if the pipeline is saturated."""
+        if self._error is not None:
+            raise RuntimeError("render pipeline stopped") from self._error
+        lastmove = board.peek().uci() if board.move_stack else None
+        start = time.perf_counter()
+        self._snapshots.put(Snapshot(board.fen(), lastmove, len(board.move_stack)))
+        self.submit_wait_time += time.perf_counter() - start
+        self.frames_submitted += 1
+        depth = self._snapshots.qsize()
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        tracer.observe("queue_depth", depth, queue="snapshots")
+
+    def poll_display(self, wait_ms=1):
+        """Show the newest rendered frame (main thread only). Returns True if 'q' was pressed."""
+        if not self.display:
+            return False
+        try:
+            frame = self._display_slot.get_nowait()
+        except queue.Empty:
+            frame = None
+        if frame is not None:
+            cv2.imshow(self.window_name, frame)
+            self.display_frames_shown += 1
+        return cv2.waitKey(wait_ms) & 0xFF == ord('q')
+
+    def close(self):
+        """
+        Flush every queued frame to the encoder and release the video file.
+        Raises the exception that stopped the render or encode thread, if one did, unless
+        close() runs while another exception propagates (from a finally block or __exit__).
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._snapshots.put(_STOP)
+        while self._render_thread.is_alive():
+            # Keep draining the display slot so a "block" render thread can finish
+            self.poll_display()
+            self._render_thread.join(timeout=0.05)
+        self._encode_thread.join()
+        self._video_writer.release()
+        if self.display:
+            self.poll_display()
+        if self._error is not None and sys.exc_info()[0] is None:
+            raise self._error
+
+    def stats(self):
+        return {
+            "frames_submitted": self.frames_submitted,
+            "frames_encoded": self.frames_encoded,
+            "display_frames_shown": self.display_frames_shown,
+            "display_frames_dropped": self.display_frames_dropped,
+            "submit_wait_ms": self.submit_wait_time * 1000,
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+    def _render_loop(self):
+        try:
+            while True:
+                snapshot = self._snapshots.get()
+                if snapshot is _STOP:
+                    return
+                lastmove = chess.Move.from_uci(snapshot.lastmove) if snapshot.lastmove else None
+                with tracer.span("render", ply=snapshot.ply):
+                    frame = self._renderer.render(chess.Board(snapshot.fen), lastmove=lastmove)
+                self._frames.put((snapshot.ply, frame))
+                tracer.observe("queue_depth", self._frames.qsize(), queue="frames")
+                if self.display:
+                    self._offer_display(frame)
+        except BaseException as error:
+            self._fail(error, self._snapshots)
+        finally:
+            self._frames.put(_STOP)  # Even after a failure, so the encoder finishes and close() returns
+
+    def _offer_display(self, frame):
+        if self.display_policy == "block":
+            self._display_slot.put(frame)
+            return
+        try:
+            self._display_slot.put_nowait(frame)
+        except queue.Full:
+            try:
+                self._display_slot.get_nowait()
+                self.display_frames_dropped += 1
+            except queue.Empty:
+                pass
+            self._display_slot.put_nowait(frame)
+
+    def _encode_loop(self):
+        try:
+            while True:
+                item = self._frames.get()
+                if item is _STOP:
+                    return
+                ply, frame = item
+                with tracer.span("encode", ply=ply):
+                    self._video_writer.write(frame)
+                self.frames_encoded += 1
+        except BaseException as error:
+            self._fail(error, self._frames)
+
+    def _fail(self, error, inbox):
+        """Keep the first worker error for close(), then discard the worker's input until _STOP so nothing blocks."""
+        if self._error is None:
+            self._error = error
+        while inbox.get() is not _STOP:
+            pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.close()
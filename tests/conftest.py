@@ -0,0 +1,14 @@
+import os
+import sys
+
+import pytest
+
+# The modules are scripts, not a package: put the repository root and misc/ on the path like running them does
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path[:0] = [path for path in (ROOT, os.path.join(ROOT, "misc")) if path not in sys.path]
+
+
+@pytest.fixture
+def fake_engine():
+    """Command line of the scripted UCI engine (fake_uci_engine.py)."""
+    return [sys.executable, os.path.join(ROOT, "fake_uci_engine.py")]
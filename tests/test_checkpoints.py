@@ -0,0 +1,18 @@
+import json
+
+from checkpoints import read_checkpoint
+
+
+def test_torn_last_line_is_cut_off(tmp_path):
+    path = tmp_path / "games.pgn.checkpoint"
+    lines = [json.dumps({"round": n, "offset": n * 100}) + "\n" for n in (1, 2)]
+    path.write_text(lines[0] + lines[1][:-10])
+
+    assert read_checkpoint(str(path)) == [{"round": 1, "offset": 100}]
+    with open(path, "a") as f:
+        f.write(lines[1])
+    assert [entry["round"] for entry in read_checkpoint(str(path))] == [1, 2]
+
+
+def test_missing_file(tmp_path):
+    assert read_checkpoint(str(tmp_path / "none.checkpoint")) == []
@@ -0,0 +1,90 @@
+import asyncio
+
+import chess
+import chess.engine
+import pytest
+
+from engine_pool import EnginePool
+
+
+def _record_lines(engine):
+    """Capture the UCI commands the pool sends to `engine` from now on."""
+    sent = []
+    send_line = engine.protocol.send_line
+
+    def recording(line):
+        sent.append(line)
+        send_line(line)
+    engine.protocol.send_line = recording
+    return sent
+
+
+def test_release_sends_ucinewgame(fake_engine):
+    with EnginePool(fake_engine, size=1) as pool:
+        with pool.lease() as engine:
+            sent = _record_lines(engine)
+            engine.play(chess.Board(), chess.engine.Limit(depth=2))
+        assert "ucinewgame" in sent
+        assert pool.acquire() is engine  # Reset, not replaced
+        pool.release(engine)
+        assert pool.stats()["restarts"] == 0
+
+
+def test_crashed_engine_is_restarted(fake_engine):
+    with EnginePool(fake_engine, size=1) as pool:
+        with pytest.raises(chess.engine.EngineTerminatedError):
+            with pool.lease() as engine:
+                engine.configure({"CrashRate": 100})
+                engine.play(chess.Board(), chess.engine.Limit(depth=2))
+        with pool.lease() as replacement:
+            assert replacement is not engine
+            assert replacement.play(chess.Board(), chess.engine.Limit(depth=2)).move is not None
+        assert pool.stats()["restarts"] == 1
+
+
+def test_timed_out_engine_is_restarted(fake_engine):
+    with EnginePool(fake_engine, size=1) as pool:
+        with pytest.raises(asyncio.TimeoutError):
+            with pool.lease() as engine:
+                raise asyncio.TimeoutError
+        assert engine.returncode.done()
+        with pool.lease() as replacement:
+            assert replacement is not engine
+        assert pool.stats()["restarts"] == 1
+
+
+def test_failed_spawn_leaves_an_empty_slot_that_is_retried(fake_engine, tmp_path):
+    with EnginePool(fake_engine, size=1) as pool:
+        pool.command = [str(tmp_path / "missing-engine")]
+        with pytest.raises(asyncio.TimeoutError):
+            with pool.lease():
+                raise asyncio.TimeoutError
+        stats = pool.stats()
+        assert (stats["idle"], stats["empty_slots"], stats["spawn_failures"]) == (0, 1, 1)
+
+        with pytest.raises(chess.engine.EngineTerminatedError):
+            pool.acquire(timeout=1)  # Retries the spawn, fails again and keeps the slot
+        stats = pool.stats()
+        assert (stats["empty_slots"], stats["spawn_failures"]) == (1, 2)
+
+        pool.command = fake_engine
+        with pool.lease(timeout=1) as engine:
+            assert engine.play(chess.Board(), chess.engine.Limit(depth=2)).move is not None
+        stats = pool.stats()
+        assert (stats["idle"], stats["empty_slots"], stats["restarts"]) == (1, 0, 1)
+
+
+def test_stats(fake_engine):
+    with EnginePool(fake_engine, size=2) as pool:
+        first = pool.acquire()
+        with pool.lease():
+            stats = pool.stats()
+            assert (stats["size"], stats["idle"], stats["leases"]) == (2, 0, 2)
+            with pytest.raises(TimeoutError):
+                pool.acquire(timeout=0.05)
+        pool.release(first)
+        stats = pool.stats()
+        assert (stats["idle"], stats["empty_slots"], stats["leases"]) == (2, 0, 2)
+        assert (stats["restarts"], stats["spawn_failures"]) == (0, 0)
+        assert stats["max_wait_ms"] >= stats["avg_wait_ms"] >= 0
+        assert 0 < stats["utilization"] <= 1
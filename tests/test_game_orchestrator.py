@@ -0,0 +1,57 @@
+import asyncio
+
+import chess
+import chess.engine
+
+import game_orchestrator
+from game_orchestrator import AgentPlayer, AsyncEnginePool
+from tracing import Tracer
+
+
+class ScriptedRuntime:
+    """Stands in for the agent runtime: replies with, or raises, the next scripted item."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+
+    async def send_message(self, message, recipient):
+        reply = self.replies.pop(0)
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def test_lazy_start_never_exceeds_the_pool_size(fake_engine):
+    async def game(pool, leases):
+        engine = await pool.acquire()
+        leases.add(engine)
+        await asyncio.sleep(0.05)
+        await pool.release(engine)
+
+    async def run():
+        pool = AsyncEnginePool(fake_engine, size=2)
+        leases = set()
+        try:
+            await asyncio.wait_for(asyncio.gather(*(game(pool, leases) for _ in range(6))), timeout=30)
+            assert len(pool._engines) == 2
+            assert len(leases) == 2  # Later games reuse the engines started by the first two
+        finally:
+            await pool.close()
+
+    asyncio.run(run())
+
+
+def test_agent_failures_are_not_counted_as_illegal_moves(tmp_path, monkeypatch):
+    tracer = Tracer().configure(metrics_path=str(tmp_path / "metrics.prom"))
+    monkeypatch.setattr(game_orchestrator, "tracer", tracer)
+    player = AgentPlayer(ScriptedRuntime([ConnectionError("agent down"), "not a move", " e2e4\n"]), "agent")
+    limit = chess.engine.Limit(time=1.0)
+
+    async def run():
+        return [await player.choose(chess.Board(), limit) for _ in range(3)]
+
+    assert asyncio.run(run()) == [chess.Move.null(), chess.Move.null(), chess.Move.from_uci("e2e4")]
+    counters = dict(tracer._counters)
+    tracer.close()
+    assert counters == {("agent_errors_total", (("kind", "ConnectionError"),)): 1,
+                        ("illegal_llm_moves_total", ()): 1}
@@ -0,0 +1,90 @@
+import random
+
+import chess
+import chess.svg
+import pytest
+
+from game_record import GameRecord, migrate
+
+
+def _random_game(plies, seed=0):
+    rng = random.Random(seed)
+    board = chess.Board()
+    while len(board.move_stack) < plies and not board.is_game_over():
+        board.push(rng.choice(sorted(board.legal_moves, key=chess.Move.uci)))
+    return board.move_stack
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "game.cgr")
+    moves = _random_game(90)
+    board = chess.Board()
+    with GameRecord(path, checkpoint_every=16) as record:
+        for move in moves:
+            board.push(move)
+            record.append(move, board if len(board.move_stack) % 2 else None)  # With and without the caller's board
+
+    with GameRecord(path, readonly=True) as record:
+        assert len(record) == len(moves)
+        assert sorted(record.checkpoints) == list(range(16, len(moves) + 1, 16))
+        replay = chess.Board()
+        for ply in range(len(moves) + 1):
+            assert record.board(ply).fen() == replay.fen()
+            assert record.last_move(ply) == (moves[ply - 1] if ply else None)
+            if ply < len(moves):
+                replay.push(moves[ply])
+        assert record.board(-1).fen() == replay.fen()
+        svg = record.render_svg(40)
+    expected = chess.Board()
+    for move in moves[:40]:
+        expected.push(move)
+    assert svg == chess.svg.board(expected, lastmove=moves[39], size=400, coordinates=False)
+
+
+def test_torn_tail_is_overwritten(tmp_path):
+    path = tmp_path / "game.cgr"
+    moves = _random_game(10)
+    with GameRecord(str(path)) as record:
+        for move in moves[:6]:
+            record.append(move)
+    with open(path, "ab") as f:
+        f.write(b"\x80")  # Half a word
+    with GameRecord(str(path)) as record:
+        assert len(record) == 6
+        for move in moves[6:]:
+            record.append(move)
+    with GameRecord(str(path), readonly=True) as record:
+        assert len(record) == len(moves)
+        assert record.board(-1).fen() == _board_after(moves).fen()
+
+
+def test_migrate_svg_snapshots(tmp_path):
+    moves = _random_game(30, seed=1)
+    board = chess.Board()
+    images = tmp_path / "images"
+    images.mkdir()
+    (images / "board_0.svg").write_text(chess.svg.board(board))
+    for n, move in enumerate(moves, 1):
+        board.push(move)
+        (images / f"board_{n}.svg").write_text(chess.svg.board(board))
+    (images / f"board_{len(moves) + 1}.svg").write_text(chess.svg.board(board))  # A repeated snapshot
+
+    summary = migrate(str(images), str(tmp_path / "game.cgr"))
+    assert (summary["snapshots"], summary["plies"], summary["unknown_moves"]) == (len(moves) + 2, len(moves), 0)
+    with GameRecord(str(tmp_path / "game.cgr"), readonly=True) as record:
+        for ply in (0, 7, len(moves)):
+            assert record.board(ply).board_fen() == _board_after(moves[:ply]).board_fen()
+
+
+def test_readonly_record_refuses_appends(tmp_path):
+    path = str(tmp_path / "game.cgr")
+    GameRecord(path).close()
+    with GameRecord(path, readonly=True) as record, pytest.raises(ValueError):
+        record.append(chess.Move.from_uci("e2e4"))
+
+
+def _board_after(moves):
+    board = chess.Board()
+    for move in moves:
+        board.push(move)
+    return board
@@ -0,0 +1,48 @@
+import random
+
+import chess
+
+from game_shards import GameStore, pack_move, unpack_move
+
+
+def _play(store, game_id, plies, seed):
+    rng = random.Random(seed)
+    reference = chess.Board()
+    for _ in range(plies):
+        if reference.is_game_over():
+            break
+        move = rng.choice(sorted(reference.legal_moves, key=chess.Move.uci))
+        store.board(game_id)  # The umpire validates against the live board first
+        store.push(game_id, move)
+        reference.push(move)
+    return reference
+
+
+def test_packed_moves_round_trip():
+    for uci in ("e2e4", "e7e8q", "a2a1n", "e1g1", "h7h8r"):
+        move = chess.Move.from_uci(uci)
+        assert unpack_move(pack_move(move)) == move
+
+
+def test_boards_are_rebuilt_after_release_and_eviction(tmp_path):
+    store = GameStore(str(tmp_path), max_boards=2, idle_seconds=3600)
+    references = {f"game-{i}": _play(store, f"game-{i}", 30 + i, seed=i) for i in range(5)}
+    assert store.stats()["live_boards"] == 2  # The others keep only their packed moves
+
+    assert store.evict_idle(now=float("inf")) == 5
+    assert store.stats()["resident_games"] == 0
+    for game_id, reference in references.items():
+        state = store.get(game_id)
+        assert not state.has_board
+        assert state.board.fen() == reference.fen()
+        assert state.move_log == [move.uci() for move in reference.move_stack]
+        assert state.current_player == ("Player 1" if reference.turn == chess.WHITE else "Player 2")
+    assert store.stats()["rehydrated"] == 5
+
+    # Rehydrated games keep playing where they stopped
+    board = store.board("game-0")
+    move = next(iter(board.legal_moves))
+    store.push("game-0", move)
+    references["game-0"].push(move)
+    store.evict_idle(now=float("inf"))
+    assert store.board("game-0").fen() == references["game-0"].fen()
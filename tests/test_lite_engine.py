@@ -0,0 +1,58 @@
+import chess
+import chess.engine
+import pytest
+
+from lite_engine import LiteEngine
+from play_chess_v1 import play_game
+from time_manager import TimeManager
+
+QUEEN_UP = "4k3/8/8/8/8/8/4P3/3QK3 w - - 0 1"
+
+
+@pytest.mark.parametrize("turn", [chess.WHITE, chess.BLACK])
+@pytest.mark.parametrize("limit", [chess.engine.Limit(nodes=nodes) for nodes in (150, 300, 500, 1500, 3000)]
+                         + [chess.engine.Limit(time=0.02)])
+def test_interrupted_search_scores_match_depth_limited(turn, limit):
+    board = chess.Board(QUEEN_UP)
+    board.turn = turn
+    reference = LiteEngine().analyse(board, chess.engine.Limit(depth=3))["score"].white().score()
+    score = LiteEngine().analyse(board, limit)["score"].white().score()
+    assert reference > 900
+    assert abs(score - reference) < 100
+
+
+def test_mate_distance_survives_the_transposition_table():
+    board = chess.Board("4Q3/1k6/8/2K5/8/8/8/8 w - - 0 1")
+    engine = LiteEngine()
+    for depth in range(1, 6):
+        info = engine.analyse(board, chess.engine.Limit(depth=depth))
+    assert info["score"].white() == chess.engine.Mate(3)
+    assert LiteEngine().analyse(board, chess.engine.Limit(depth=5))["score"].white() == chess.engine.Mate(3)
+
+
+def test_returning_to_the_position_after_an_irreversible_move_is_a_repetition():
+    board = chess.Board(QUEEN_UP)  # Halfmove clock 0, as right after a capture or pawn move
+    for uci in ("d1d2", "e8f7", "d2d1"):
+        board.push_uci(uci)
+    back, away = chess.Move.from_uci("f7e8"), chess.Move.from_uci("f7g7")
+    for depth in (1, 3):
+        info = LiteEngine().analyse(board, chess.engine.Limit(depth=depth), root_moves=[back, away])
+        assert info["pv"][0] == back  # Black, a queen down, takes the draw
+        assert info["score"].relative == chess.engine.Cp(0)
+
+
+def test_analysis_stops_between_depths():
+    engine = LiteEngine()
+    with engine.analysis(chess.Board(), chess.engine.Limit(depth=10)) as analysis:
+        depths = [info["depth"] for _, info in zip(range(3), analysis)]
+        analysis.stop()
+        best = analysis.wait()
+    assert depths == [1, 2, 3]
+    assert best.move in chess.Board().legal_moves
+
+
+def test_time_managed_game():
+    manager = TimeManager(base=2.0)
+    board, move_times = play_game(LiteEngine(), LiteEngine(), verbose=False, max_plies=12, time_manager=manager)
+    assert len(move_times) == 12
+    assert all(clock > 0 for clock in manager.clocks.values())
@@ -0,0 +1,68 @@
+import asyncio
+from types import SimpleNamespace
+
+from autogen_core.models import UserMessage
+
+from model_clients import PooledChatCompletionClient
+
+PROMPT = [UserMessage(content="Play e4", source="user")]
+
+
+class SlowClient:
+    """
+    Stands in for the OpenAI client: every request takes `delay` seconds and answers with its number.
+    A cancelled request takes `cleanup` seconds to wind down, like closing its HTTP connection.
+    """
+
+    def __init__(self, delay=0.05, cleanup=0.02):
+        self.delay = delay
+        self.cleanup = cleanup
+        self.started = 0
+        self.cancelled = 0
+
+    async def create(self, messages, **kwargs):
+        self.started += 1
+        number = self.started
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            await asyncio.sleep(self.cleanup)
+            raise
+        return SimpleNamespace(content=f"reply {number}", usage=SimpleNamespace(prompt_tokens=1, completion_tokens=1))
+
+
+def test_cancelled_caller_leaves_the_shared_request_to_the_others():
+    async def run():
+        inner = SlowClient()
+        client = PooledChatCompletionClient(inner)
+        first = asyncio.create_task(client.create(PROMPT))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(client.create(PROMPT))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        result = await second
+        await asyncio.gather(first, return_exceptions=True)
+        return first, result, inner, client
+
+    first, result, inner, client = asyncio.run(run())
+    assert first.cancelled()
+    assert result.content == "reply 1"
+    assert (inner.started, inner.cancelled, client.coalesced) == (1, 0, 1)
+
+
+def test_request_after_the_last_caller_cancelled_starts_afresh():
+    async def run():
+        inner = SlowClient()
+        client = PooledChatCompletionClient(inner)
+        first = asyncio.create_task(client.create(PROMPT))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        # The abandoned request is still being cancelled; an identical one must not join it
+        return await client.create(PROMPT), inner, client
+
+    result, inner, client = asyncio.run(run())
+    assert result.content == "reply 2"
+    assert (inner.started, inner.cancelled, client.coalesced) == (2, 1, 0)
+    assert client.stats()["requests"] == 2
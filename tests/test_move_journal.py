@@ -0,0 +1,81 @@
+import shutil
+
+import chess
+import pytest
+
+from game_shards import pack_move
+from move_journal import MOVE, MoveJournal, replay
+
+OPENING = [chess.Move.from_uci(uci) for uci in ("e2e4", "e7e5", "g1f3", "b8c6", "f1b5", "a7a6")]
+
+
+def _packed(moves):
+    return [pack_move(move) for move in moves]
+
+
+def test_recovers_synced_moves_after_a_crash(tmp_path):
+    path, crashed = tmp_path / "moves.journal", tmp_path / "crashed.journal"
+    journal = MoveJournal(str(path), sync_every=10_000, sync_interval=3600)
+    for move in OPENING[:4]:
+        journal.append("a", move)
+        journal.append("b", move)
+    journal.sync()
+    journal.append("a", OPENING[4])  # Still in the write buffer
+    shutil.copy(path, crashed)  # The file as a crash would leave it: no close(), no final sync
+    journal.close()
+
+    with MoveJournal(str(crashed)) as recovered:
+        assert {game_id: list(moves) for game_id, moves in recovered.recovered.items()} == \
+            {"a": _packed(OPENING[:4]), "b": _packed(OPENING[:4])}
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_torn_last_record_is_ignored(tmp_path, compact):
+    path = tmp_path / "moves.journal"
+    with MoveJournal(str(path)) as journal:
+        for move in OPENING[:3]:
+            journal.append("a", move)
+    with open(path, "ab") as f:
+        f.write(MOVE.pack(2, 0, pack_move(OPENING[3]))[:5])
+
+    with MoveJournal(str(path), compact=compact) as journal:
+        assert list(journal.recovered["a"]) == _packed(OPENING[:3])
+        journal.append("a", OPENING[3])  # Must follow the valid records, not the fragment
+    games, _, valid = replay(str(path))
+    assert list(games["a"]) == _packed(OPENING[:4])
+    assert valid == path.stat().st_size
+
+
+def test_compaction_keeps_only_live_games(tmp_path):
+    path = tmp_path / "moves.journal"
+    with MoveJournal(str(path)) as journal:
+        for game_id in ("a", "b", "c"):
+            for move in OPENING:
+                journal.append(game_id, move)
+        journal.finish("b")
+        journal.finish("unknown")  # Never started: nothing to record
+    size = path.stat().st_size
+
+    with MoveJournal(str(path)) as journal:
+        assert sorted(journal.recovered) == ["a", "c"]
+        assert journal.stats()["games"] == 2
+    games, ids, _ = replay(str(path))
+    assert ids == ["a", "c"]
+    assert list(games["c"]) == _packed(OPENING)
+    assert path.stat().st_size < size
+
+
+@pytest.mark.parametrize("compact", [False, True])
+def test_finished_id_starts_a_new_game(tmp_path, compact):
+    path = tmp_path / "moves.journal"
+    with MoveJournal(str(path)) as journal:
+        for move in OPENING[:4]:
+            journal.append("a", move)
+        journal.finish("a")
+        journal.append("a", OPENING[0])
+    with MoveJournal(str(path), compact=compact) as journal:
+        assert list(journal.recovered["a"]) == _packed(OPENING[:1])
+        journal.append("a", OPENING[1])
+        journal.finish("a")
+    with MoveJournal(str(path)) as journal:
+        assert journal.recovered == {}
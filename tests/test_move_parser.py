@@ -0,0 +1,48 @@
+import chess
+import pytest
+
+from move_parser import MoveParser
+
+# Black has a pawn on c4, White a pawn on b3: "bc4" is both Bc4 and the capture bxc4
+BISHOP_OR_PAWN = "rnbqkbnr/pp1ppppp/8/8/2p1P3/1P6/P1PP1PPP/RNBQKBNR w KQkq - 0 3"
+PROMOTION = "8/P6k/8/8/8/8/8/K7 w - - 0 1"
+CASTLING = "r3k2r/pppqbppp/2n1bn2/3pp3/3PP3/2N1BN2/PPPQBPPP/R3K2R w KQkq - 6 8"
+
+
+@pytest.mark.parametrize("text, fen, expected", [
+    ("nf3", chess.STARTING_FEN, "g1f3"),
+    ("play nc3", chess.STARTING_FEN, "b1c3"),
+    ("Nf3", chess.STARTING_FEN, "g1f3"),
+    ("e4", chess.STARTING_FEN, "e2e4"),
+    ("e2 to e4", chess.STARTING_FEN, "e2e4"),
+    ("e2-e4", chess.STARTING_FEN, "e2e4"),
+    ("knight to f3", chess.STARTING_FEN, "g1f3"),
+    ("move my horse to c3", chess.STARTING_FEN, "b1c3"),
+    ("pawn to d4", chess.STARTING_FEN, "d2d4"),
+    ("Bc4", BISHOP_OR_PAWN, "f1c4"),
+    ("bishop takes c4", BISHOP_OR_PAWN, "f1c4"),
+    ("b3c4", BISHOP_OR_PAWN, "b3c4"),
+    ("pawn takes c4", BISHOP_OR_PAWN, "b3c4"),
+    ("a8", PROMOTION, "a7a8q"),
+    ("a7a8", PROMOTION, "a7a8q"),
+    ("a8=N", PROMOTION, "a7a8n"),
+    ("O-O", CASTLING, "e1g1"),
+    ("0-0-0", CASTLING, "e1c1"),
+    ("castle kingside", CASTLING, "e1g1"),
+    ("I'll castle queenside", CASTLING, "e1c1"),
+])
+def test_parses(text, fen, expected):
+    move = MoveParser().parse(text, chess.Board(fen))
+    assert move is not None and move.uci() == expected
+
+
+@pytest.mark.parametrize("text, fen", [
+    ("bc4", BISHOP_OR_PAWN),  # Bishop or pawn: left to the LLM
+    ("bxc4", BISHOP_OR_PAWN),
+    ("knight takes e5", chess.STARTING_FEN),  # No such capture
+    ("something aggressive", chess.STARTING_FEN),
+])
+def test_ambiguous_or_unknown_falls_back(text, fen):
+    parser = MoveParser()
+    assert parser.parse(text, chess.Board(fen)) is None
+    assert parser.hits == 0
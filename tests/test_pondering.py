@@ -0,0 +1,42 @@
+import chess
+import chess.engine
+
+from play_chess_v1 import play_game
+from pondering import PonderStats
+
+
+def _result(move, ponder, depth):
+    return chess.engine.PlayResult(chess.Move.from_uci(move), chess.Move.from_uci(ponder), {"depth": depth})
+
+
+def test_hit_is_credited_to_the_pondering_engines_next_move():
+    stats = PonderStats()
+    # White expects e7e5 and gets it: white's next search (depth 20) started early.
+    # Black expects g1f3 but white plays d2d4: black's next search (depth 8) starts from scratch.
+    stats.record(_result("e2e4", "e7e5", 8), 0.1)
+    stats.record(_result("e7e5", "g1f3", 8), 0.1)
+    stats.record(_result("d2d4", "d7d5", 20), 0.1)
+    stats.record(_result("d7d6", "c2c4", 8), 0.1)
+
+    summary = stats.summary()
+    assert (summary["predictions"], summary["ponder_hits"]) == (3, 1)
+    assert [move[3] for move in stats.moves] == [None, None, True, False]
+    assert summary["avg_depth_on_hit"] == 20
+    assert summary["avg_depth_on_miss"] == 8
+
+
+def test_ponderhits_search_deeper_with_an_engine_that_mispredicts(fake_engine):
+    engines = [chess.engine.SimpleEngine.popen_uci(fake_engine) for _ in range(2)]
+    try:
+        for engine in engines:
+            engine.configure({"DepthTime": 10, "MissRate": 50})
+        stats = PonderStats()
+        play_game(*engines, chess.engine.Limit(time=0.1), verbose=False, ponder=True, stats=stats, max_plies=24)
+    finally:
+        for engine in engines:
+            engine.quit()
+
+    summary = stats.summary()
+    assert 0 < summary["ponder_hits"] < summary["predictions"]
+    # A ponderhit keeps the search that ran during the opponent's move, so it gets deeper
+    assert summary["avg_depth_on_hit"] > summary["avg_depth_on_miss"] + 2
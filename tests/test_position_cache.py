@@ -0,0 +1,72 @@
+import chess
+import chess.engine
+
+from lite_engine import LiteEngine
+from position_cache import CachedEngine, PositionCache, depends_on_history
+
+LIMIT = chess.engine.Limit(depth=2)
+SCORE = chess.engine.PovScore(chess.engine.Cp(35), chess.WHITE)
+
+
+def test_lru_and_sqlite_round_trip(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    board = chess.Board()
+    cache = PositionCache(path, capacity=1)
+    cache.put(board, LIMIT, chess.Move.from_uci("e2e4"), chess.Move.from_uci("e7e5"), SCORE)
+    cache.put(chess.Board("8/8/8/8/8/8/k7/K6Q w - - 0 1"), LIMIT, chess.Move.from_uci("h1h8"),
+              score=chess.engine.PovScore(chess.engine.Mate(2), chess.WHITE))
+    assert cache.stats()["evictions"] == 1
+    assert cache.get(board, LIMIT) == (chess.Move.from_uci("e2e4"), chess.Move.from_uci("e7e5"), chess.engine.Cp(35))
+    assert (cache.stats()["memory_hits"], cache.stats()["disk_hits"]) == (0, 1)  # Evicted, found among the queued rows
+    assert cache.get(board, chess.engine.Limit(depth=3)) is None
+    cache.close()  # Writes the queued rows
+
+    reopened = PositionCache(path)
+    assert reopened.get(board, LIMIT)[0] == chess.Move.from_uci("e2e4")
+    assert reopened.get(chess.Board("8/8/8/8/8/8/k7/K6Q w - - 0 1"), LIMIT)[2] == chess.engine.Mate(2)
+    assert reopened.get(board, LIMIT, namespace="other") is None
+    reopened.close()
+
+
+def test_cached_engine_rechecks_legality():
+    cache = PositionCache()
+    engine = CachedEngine(LiteEngine(), cache)
+    board = chess.Board()
+    first = engine.play(board, LIMIT)
+    assert engine.probe(board, LIMIT).move == first.move
+
+    # A stored move that is illegal in the position (castling without the right) is not played
+    no_rights = chess.Board("r3k2r/8/8/8/8/8/8/R3K2R w - - 0 1")
+    cache.put(no_rights, LIMIT, chess.Move.from_uci("e1g1"))
+    assert cache.get(no_rights, LIMIT) is not None
+    assert engine.probe(no_rights, LIMIT) is None
+    assert engine.play(no_rights, LIMIT).move in no_rights.legal_moves
+
+
+def test_history_dependent_positions_bypass_the_cache():
+    cache = PositionCache()
+    engine = CachedEngine(LiteEngine(), cache)
+    board = chess.Board()
+    shuffle = [chess.Move.from_uci(uci) for uci in ("g1f3", "g8f6", "f3g1", "f6g8")]
+    cache.put(board, LIMIT, chess.Move.from_uci("g1f3"))
+    assert engine.probe(board, LIMIT).move == chess.Move.from_uci("g1f3")
+
+    for move in shuffle:
+        board.push(move)
+    # Back at the start position: same Zobrist key, but now a repetition
+    assert depends_on_history(board)
+    assert engine.probe(board, LIMIT) is None
+
+    # A cached move into a position seen before is not replayed either
+    board = chess.Board()
+    for move in shuffle[:3]:
+        board.push(move)
+    cache.put(board, LIMIT, chess.Move.from_uci("f6g8"))
+    assert not depends_on_history(board)
+    assert depends_on_history(board, chess.Move.from_uci("f6g8"))
+    assert engine.probe(board, LIMIT) is None
+
+    late = chess.Board("4k3/8/8/8/8/8/4P3/4K3 w - - 60 80")
+    assert depends_on_history(late)
+    engine.play(late, LIMIT)
+    assert cache.get(late, LIMIT) is None  # Not stored
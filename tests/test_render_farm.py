@@ -0,0 +1,34 @@
+import numpy as np
+from PIL import Image, ImageSequence
+
+from render_farm import _GifWriter
+
+
+def test_gif_frames_are_streamed_losslessly(tmp_path):
+    palette = Image.new("P", (1, 1))
+    palette.putpalette([value for index in range(256) for value in (index, 255 - index, index // 2)])
+    rng = np.random.default_rng(1)
+    pixels = rng.integers(0, 200, (32, 40), dtype=np.uint8)
+    frames = []
+    for step in range(4):
+        if step:
+            pixels = pixels.copy()
+            pixels[step * 5:step * 5 + 6, step * 7:step * 7 + 3] = rng.integers(0, 256, (6, 3))
+        frame = Image.frombytes("P", (40, 32), pixels.tobytes())
+        frame.putpalette(palette.getpalette())
+        frames.append(frame)
+    frames.append(frames[-1])  # An unchanged frame still keeps its duration
+
+    path = tmp_path / "game.gif"
+    writer = _GifWriter(str(path))
+    for step, frame in enumerate(frames):
+        writer.write(frame, 100 * (step + 1))
+    writer.release()
+    writer.release()
+
+    with Image.open(path) as gif:
+        decoded = [(np.asarray(frame.convert("RGB")), frame.info["duration"]) for frame in ImageSequence.Iterator(gif)]
+        assert gif.info["loop"] == 0
+    assert [duration for _, duration in decoded] == [100, 200, 300, 400, 500]
+    for (image, _), frame in zip(decoded, frames):
+        assert (image == np.asarray(frame.convert("RGB"))).all()
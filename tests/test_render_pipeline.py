@@ -0,0 +1,39 @@
+import chess
+import pytest
+
+from render_pipeline import RenderPipeline
+
+
+class RenderFailed(Exception):
+    pass
+
+
+def broken_pipeline(tmp_path):
+    pipeline = RenderPipeline(str(tmp_path / "game.mp4"), size=64, display=False)
+
+    def render(board, lastmove=None):
+        raise RenderFailed()
+
+    pipeline._renderer.render = render
+    return pipeline
+
+
+def test_close_raises_the_worker_error(tmp_path):
+    pipeline = broken_pipeline(tmp_path).start()
+    pipeline.submit(chess.Board())
+    with pytest.raises(RenderFailed):
+        pipeline.close()
+
+
+def test_close_keeps_the_callers_exception(tmp_path):
+    pipeline = broken_pipeline(tmp_path).start()
+    with pytest.raises(KeyboardInterrupt):
+        try:
+            pipeline.submit(chess.Board())
+            raise KeyboardInterrupt()
+        finally:
+            pipeline.close()
+    with pytest.raises(KeyboardInterrupt):
+        with broken_pipeline(tmp_path) as pipeline:
+            pipeline.submit(chess.Board())
+            raise KeyboardInterrupt()
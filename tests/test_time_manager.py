@@ -0,0 +1,58 @@
+import chess
+import chess.engine
+import chess.pgn
+
+from lite_engine import LiteEngine
+from opening_book import BookEngine, OpeningBook, build_book, collect_moves
+from play_chess_v1 import play_game
+from position_cache import CachedEngine, PositionCache
+from time_manager import TimeManager
+
+BOOK_LINE = ["e2e4", "e7e5", "g1f3", "b8c6"]
+
+
+def write_book(tmp_path):
+    game = chess.pgn.Game()
+    node = game
+    for uci in BOOK_LINE:
+        node = node.add_variation(chess.Move.from_uci(uci))
+    game.headers["Result"] = "1/2-1/2"
+    pgn_path = tmp_path / "games.pgn"
+    pgn_path.write_text(f"{game}\n\n{game}\n")
+    book_path = str(tmp_path / "book.bin")
+    build_book([str(pgn_path)], book_path, max_ply=len(BOOK_LINE), min_games=2)
+    return OpeningBook(book_path, max_ply=len(BOOK_LINE), randomize=False)
+
+
+def test_time_manager_consults_the_book(tmp_path):
+    book = write_book(tmp_path)
+    manager = TimeManager(base=2.0)
+    white, black = BookEngine(LiteEngine(), book), BookEngine(LiteEngine(), book)
+    board, _ = play_game(white, black, verbose=False, max_plies=8, time_manager=manager)
+    assert [move.uci() for move in board.move_stack[:len(BOOK_LINE)]] == BOOK_LINE
+    assert manager.stops["probe"] == len(BOOK_LINE)
+    book.close()
+
+
+def test_book_counts_repeated_positions_once_per_game(tmp_path):
+    game = chess.pgn.Game()
+    node = game
+    for uci in ["g1f3", "g8f6", "f3g1", "f6g8"] * 3:
+        node = node.add_variation(chess.Move.from_uci(uci))
+    game.headers["Result"] = "1/2-1/2"
+    pgn_path = tmp_path / "shuffle.pgn"
+    pgn_path.write_text(f"{game}\n")
+    _, counts, games = collect_moves([str(pgn_path)], max_ply=12)
+    assert games == 1
+    assert set(counts.values()) == {1}
+    assert build_book([str(pgn_path)], str(tmp_path / "book.bin"), max_ply=12, min_games=2) == 0
+
+
+def test_time_manager_reuses_cached_results():
+    cache = PositionCache()
+    engine = CachedEngine(LiteEngine(), cache)
+    manager = TimeManager(base=2.0)
+    first = manager.play(engine, chess.Board())
+    second = manager.play(engine, chess.Board())
+    assert second.move == first.move
+    assert manager.stops["probe"] == 1
@@ -0,0 +1,18 @@
+import re
+
+from tracing import Tracer
+
+
+def test_label_values_are_escaped(tmp_path):
+    tracer = Tracer().configure(metrics_path=str(tmp_path / "metrics.prom"))
+    value = 'llama "3b"\\q4\nnext'
+    tracer.count("llm_errors_total", model=value)
+    text = tracer.prometheus_text()
+    tracer.close()
+
+    lines = [line for line in text.splitlines() if line.startswith("chess_llm_errors_total{")]
+    assert len(lines) == 1
+    match = re.fullmatch(r'chess_llm_errors_total\{model="((?:[^"\\\n]|\\[\\"n])*)"\} 1', lines[0])
+    assert match
+    unescaped = re.sub(r"\\(.)", lambda m: "\n" if m.group(1) == "n" else m.group(1), match.group(1))
+    assert unescaped == value
@@ -0,0 +1,64 @@
+import chess
+
+from translation_cache import TranslationCache
+
+AFTER_E4_E5 = "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2"
+CASTLE_BOTH_WAYS = "r3k2r/pppqbppp/2n1bn2/3pp3/3PP3/2N1BN2/PPPQBPPP/R3K2R w KQkq - 6 8"
+CASTLE_KINGSIDE_ONLY = "rn2k2r/pppqbppp/4bn2/3pp3/3PP3/4BN2/PPPQBPPP/RN2K2R w KQkq - 6 8"
+
+
+def test_coordinate_moves_are_shared_across_positions():
+    cache = TranslationCache()
+    cache.put("Play g1 to f3!", chess.Board(), "g1f3")
+    assert cache.get("play g1 to f3", chess.Board(AFTER_E4_E5)) == "g1f3"
+    assert cache.get("play g1 to f3", chess.Board(AFTER_E4_E5).mirror()) is None  # Other side to move
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_other_phrases_are_scoped_to_the_position():
+    cache = TranslationCache()
+    cache.put("knight from g1 to f3", chess.Board(), "g1f3")
+    cache.put("move the knight to c3", chess.Board(), "b1c3")
+    assert cache.get("knight from g1 to f3", chess.Board()) == "g1f3"
+    assert cache.get("knight from g1 to f3", chess.Board(AFTER_E4_E5)) is None
+    assert cache.get("move the knight to c3", chess.Board(AFTER_E4_E5)) is None
+
+
+def test_castling_is_shared_only_with_a_named_side():
+    cache = TranslationCache()
+    cache.put("castle kingside", chess.Board(CASTLE_KINGSIDE_ONLY), "e1g1")
+    cache.put("castle", chess.Board(CASTLE_KINGSIDE_ONLY), "e1g1")
+    assert cache.get("castle kingside", chess.Board(CASTLE_BOTH_WAYS)) == "e1g1"
+    # "castle" meant kingside only because queenside was not possible there
+    assert cache.get("castle", chess.Board(CASTLE_BOTH_WAYS)) is None
+
+
+def test_illegal_hit_falls_back():
+    cache = TranslationCache()
+    cache.put("e2e4", chess.Board(), "e2e4")
+    board = chess.Board()
+    board.push_uci("d2d4")
+    board.push_uci("d7d5")
+    board.push_uci("e2e4")
+    board.push_uci("g8f6")
+    assert cache.get("e2e4", board) is None
+    assert (cache.hits, cache.misses, cache.stale) == (0, 1, 1)
+
+
+def test_persisted_and_expired_entries(tmp_path):
+    path = str(tmp_path / "translations.db")
+    cache = TranslationCache(path=path)
+    cache.put("e2e4", chess.Board(), "e2e4")
+    cache.close()
+
+    reopened = TranslationCache(path=path)
+    assert reopened.get("e2e4", chess.Board()) == "e2e4"
+    reopened.close()
+
+    expired = TranslationCache(path=path, ttl=-1)
+    assert expired.get("e2e4", chess.Board()) is None
+    assert expired.stale == 1
+    expired.close()
+    fresh = TranslationCache(path=path)
+    assert fresh.get("e2e4", chess.Board()) is None  # Removed from disk too
+    fresh.close()
@@ -0,0 +1,160 @@
+"""
+Clock-aware time management: spend less on easy moves and more on critical ones.
+
+Instead of Limit(time=0.5) for every move, TimeManager keeps a clock per side
+(base plus increment) and searches with engine.analysis(), watching the info
+stream. A move with only one legal reply is played at once. The search stops
+early once the best move has stayed the same for `stable_depths` iterations.
+When the best move keeps changing or the score swings, the search continues
+past the soft budget, up to the hard limit. Time saved on easy moves stays on
+the clock, so later soft budgets (clock / moves_to_go) grow with it. Engines
+wrapped by BookEngine or CachedEngine are probed before any search.
+"""
+import time
+
+import chess
+import chess.engine
+
+# Limit under which time-managed results are looked up in and stored to a position cache. The real
+# limit depends on the clocks, so all time-managed moves share this one key.
+PROBE_LIMIT = chess.engine.Limit()
+
+
+class TimeManager:
+    def __init__(self, base=60.0, increment=0.0, moves_to_go=30, stable_depths=4, min_fraction=0.1,
+                 hard_factor=3.0, swing_cp=50):
+        self.base = base
+        self.increment = increment
+        self.moves_to_go = moves_to_go
+        self.stable_depths = stable_depths  # Same best move this many depths in a row stops the search
+        self.min_fraction = min_fraction  # Never stop before this fraction of the soft budget
+        self.hard_factor = hard_factor  # Critical positions may use this many soft budgets
+        self.swing_cp = swing_cp  # A score change this large between depths marks the position as critical
+        # Why searches ended; "engine" means the engine finished on its own (hard limit or maximum depth),
+        # "probe" that a book or cache wrapper answered without searching
+        self.stops = {"forced": 0, "probe": 0, "stable": 0, "soft": 0, "hard": 0, "engine": 0}
+        self.new_game()
+
+    def new_game(self):
+        self.clocks = {chess.WHITE: self.base, chess.BLACK: self.base}
+
+    def budget(self, turn):
+        """(soft, hard) seconds for the side to move."""
+        clock = max(self.clocks[turn], 0.0)
+        soft = clock / self.moves_to_go + self.increment * 0.8
+        hard = min(soft * self.hard_factor, clock * 0.5 + self.increment)
+        return min(soft, hard), hard
+
+    def play(self, engine, board, info=chess.engine.INFO_BASIC):
+        """Choose a move for the side to move and charge its clock; returns a PlayResult."""
+        turn = board.turn
+        start = time.perf_counter()
+        legal_moves = list(board.legal_moves)
+        if len(legal_moves) == 1:
+            self.stops["forced"] += 1
+            self._charge(turn, time.perf_counter() - start)
+            return chess.engine.PlayResult(legal_moves[0], None, {"string": "forced"})
+
+        # An opening book or position cache in front of the engine answers without a search
+        probe = getattr(engine, "probe", None)
+        if probe is not None:
+            result = probe(board, PROBE_LIMIT)
+            if result is not None:
+                self.stops["probe"] += 1
+                self._charge(turn, time.perf_counter() - start)
+                return result
+
+        soft, hard = self.budget(turn)
+        best, stable, last_score, critical = None, 0, None, False
+        reason = "engine"
+        latest = {}
+        info |= chess.engine.INFO_SCORE | chess.engine.INFO_PV
+        with engine.analysis(board, chess.engine.Limit(time=hard), info=info) as analysis:
+            for update in analysis:
+                if "pv" not in update or "depth" not in update:
+                    continue
+                latest = update
+                move = update["pv"][0]
+                stable = stable + 1 if move == best else 1
+                if move != best and best is not None:
+                    critical = True  # The best move changed; the position deserves more time
+                best = move
+                score = update.get("score")
+                if score is not None:
+                    cp = score.pov(turn).score(mate_score=100_000)
+                    if last_score is not None and abs(cp - last_score) >= self.swing_cp:
+                        critical = True
+                    last_score = cp
+                elapsed = time.perf_counter() - start
+                if stable >= self.stable_depths and elapsed >= soft * self.min_fraction:
+                    reason = "stable"
+                    break
+                if elapsed >= soft and not (critical and stable < self.stable_depths):
+                    reason = "soft"
+                    break
+                if elapsed >= hard:
+                    reason = "hard"
+                    break
+            analysis.stop()
+            bestmove = analysis.wait()
+        self.stops[reason] += 1
+        self._charge(turn, time.perf_counter() - start)
+        move = bestmove.move if bestmove.move is not None else best
+        result = chess.engine.PlayResult(move, bestmove.ponder, latest)
+        store = getattr(engine, "store", None)
+        if store is not None:
+            store(board, PROBE_LIMIT, result)
+        return result
+
+    def _charge(self, turn, seconds):
+        self.clocks[turn] += self.increment - seconds
+
+
+if __name__ == "__main__":
+    import argparse
+    import statistics
+    import sys
+
+    from play_chess_v1 import play_game
+
+    parser = argparse.ArgumentParser(description="Fixed time per move against the clock-aware time manager.")
+    parser.add_argument("--engine", default=None, help="UCI engine command (default: the bundled fake engine)")
+    parser.add_argument("--games", type=int, default=3)
+    parser.add_argument("--time", type=float, default=0.1, help="Fixed seconds per move for the baseline")
+    parser.add_argument("--base", type=float, default=None,
+                        help="Clock per side (default: what the baseline spends in --max-plies plies)")
+    parser.add_argument("--increment", type=float, default=0.0)
+    parser.add_argument("--max-plies", type=int, default=80)
+    parser.add_argument("--depth-time", type=int, default=5, help="Fake engine: ms per search depth")
+    args = parser.parse_args()
+
+    command = args.engine or [sys.executable, "fake_uci_engine.py"]
+    options = {} if args.engine else {"DepthTime": args.depth_time}
+    base = args.base if args.base is not None else args.time * args.max_plies / 2
+
+    def run(manager):
+        engines = [chess.engine.SimpleEngine.popen_uci(command) for _ in range(2)]
+        try:
+            for engine in engines:
+                engine.configure(options)
+            move_times = []
+            start = time.perf_counter()
+            for _ in range(args.games):
+                if manager is not None:
+                    manager.new_game()
+                _, times = play_game(*engines, chess.engine.Limit(time=args.time), verbose=False,
+                                     max_plies=args.max_plies, time_manager=manager)
+                move_times += times
+            return move_times, time.perf_counter() - start
+        finally:
+            for engine in engines:
+                engine.quit()
+
+    def report(label, move_times, elapsed):
+        print(f"{label:>13}: {statistics.fmean(move_times) * 1000:6.1f} ms/move, "
+              f"{args.games / elapsed * 3600:,.0f} games/hour ({len(move_times)} moves)")
+
+    report("fixed time", *run(None))
+    manager = TimeManager(base=base, increment=args.increment)
+    report("time manager", *run(manager))
+    print(f"time manager stops: {manager.stops}")
@@ -0,0 +1,232 @@
+import argparse
+import asyncio
+import datetime
+import io
+import json
+import multiprocessing
+import multiprocessing.util
+import os
+import time
+
+import chess
+import chess.engine
+import chess.pgn
+
+from checkpoints import read_checkpoint
+from engine_pool import EnginePool
+from opening_book import BookEngine, OpeningBook
+from position_cache import CachedEngine, PositionCache
+from play_chess_v1 import STOCKFISH_PATH, play_game
+
+# Per-process engine pools, created once by the pool initializer and reused for every game
+_pools = {}
+_engine_paths = {}
+_cache = None
+_book = None
+
+# Times a round is played before it is given up (until the next run) when an engine crashes mid-game
+ENGINE_ATTEMPTS = 3
+
+
+def _init_worker(engine_paths, threads, hash_mb, cache_path=None, book_path=None, book_ply=16):
+    """Start both engines for this worker with a bounded thread count and hash size."""
+    global _cache, _book
+    options = {"Threads": threads, "Hash": hash_mb}
+    for name, path in engine_paths.items():
+        _pools[name] = EnginePool(path, size=1, options=options)
+    _engine_paths.update(engine_paths)
+    if cache_path:
+        _cache = PositionCache(cache_path)
+    if book_path:
+        _book = OpeningBook(book_path, max_ply=book_ply)
+    # Pool workers skip atexit handlers, but run multiprocessing finalizers on a clean exit
+    multiprocessing.util.Finalize(None, _close_engines, exitpriority=10)
+
+
+def _close_engines():
+    for pool in _pools.values():
+        pool.close()
+    if _cache is not None:
+        _cache.close()
+
+
+def _play_round(task):
+    """
+    Play one tournament game; engines swap colours every round. A game interrupted by an engine
+    crash or hang is replayed from the start on restarted engines, up to ENGINE_ATTEMPTS times.
+    Returns (round, PGN text, None), or (round, None, error) if every attempt failed.
+    """
+    round_number, move_time = task
+    for _ in range(ENGINE_ATTEMPTS):
+        try:
+            return round_number, _play_game(round_number, move_time), None
+        except (chess.engine.EngineError, asyncio.TimeoutError) as error:
+            failure = f"{type(error).__name__}: {error}"
+    return round_number, None, failure
+
+
+def _play_game(round_number, move_time):
+    white, black = ("engine1", "engine2") if round_number % 2 else ("engine2", "engine1")
+
+    # Leasing resets each engine with ucinewgame and restarts it if it crashed in an earlier round
+    with _pools[white].lease() as white_engine, _pools[black].lease() as black_engine:
+        if _cache is not None:
+            lookups = _cache.stats()
+            white_engine = CachedEngine(white_engine, _cache, namespace=_engine_paths[white])
+            black_engine = CachedEngine(black_engine, _cache, namespace=_engine_paths[black])
+        if _book is not None:
+            white_engine, black_engine = BookEngine(white_engine, _book), BookEngine(black_engine, _book)
+        board, move_times = play_game(white_engine, black_engine, chess.engine.Limit(time=move_time), verbose=False)
+
+    game = chess.pgn.Game.from_board(board)
+    game.headers["Event"] = "Self-play tournament"
+    game.headers["Date"] = datetime.date.today().strftime("%Y.%m.%d")
+    game.headers["Round"] = str(round_number)
+    game.headers["White"] = white
+    game.headers["Black"] = black
+    game.headers["Result"] = board.result(claim_draw=True)
+    game.headers["PlyCount"] = str(len(board.move_stack))
+    game.headers["MoveTimeMs"] = str(round(sum(move_times) * 1000))
+    if _cache is not None:
+        stats = _cache.stats()
+        game.headers["CacheHits"] = str(stats["memory_hits"] + stats["disk_hits"] - lookups["memory_hits"] - lookups["disk_hits"])
+        game.headers["CacheLookups"] = str(stats["lookups"] - lookups["lookups"])
+    return str(game)
+
+
+class TournamentLog:
+    """
+    Streams finished games to a PGN file and records them in a checkpoint file.
+
+    The checkpoint holds one JSON line per game with the PGN byte offset after
+    it, written only once the game is on disk. On resume the PGN is truncated
+    back to the last checkpointed offset, dropping any half-written game, and a
+    torn last checkpoint line is cut off before new entries are appended.
+    """
+
+    def __init__(self, pgn_path):
+        self.pgn_path = pgn_path
+        self.checkpoint_path = pgn_path + ".checkpoint"
+        self.completed = {}
+        offset = 0
+        for entry in read_checkpoint(self.checkpoint_path):
+            self.completed[entry["round"]] = entry
+            offset = max(offset, entry["offset"])
+        with open(self.pgn_path, "a+") as f:
+            f.truncate(offset)
+        self._pgn = open(self.pgn_path, "a")
+        self._checkpoint = open(self.checkpoint_path, "a")
+
+    def record(self, round_number, pgn_text):
+        game = chess.pgn.read_game(io.StringIO(pgn_text))
+        self._pgn.write(pgn_text + "\n\n")
+        self._pgn.flush()
+        os.fsync(self._pgn.fileno())
+        entry = {
+            "round": round_number,
+            "offset": self._pgn.tell(),
+            "white": game.headers["White"],
+            "result": game.headers["Result"],
+            "plies": int(game.headers["PlyCount"]),
+            "move_time_ms": int(game.headers["MoveTimeMs"]),
+            "cache_hits": int(game.headers.get("CacheHits", 0)),
+            "cache_lookups": int(game.headers.get("CacheLookups", 0)),
+        }
+        self._checkpoint.write(json.dumps(entry) + "\n")
+        self._checkpoint.flush()
+        os.fsync(self._checkpoint.fileno())
+        self.completed[round_number] = entry
+
+    def close(self):
+        self._pgn.close()
+        self._checkpoint.close()
+
+
+def summarize(entries, elapsed, games_this_run):
+    """W/D/L from engine1's point of view plus throughput figures."""
+    wins = draws = losses = 0
+    plies = move_time_ms = cache_hits = cache_lookups = 0
+    for entry in entries:
+        plies += entry["plies"]
+        move_time_ms += entry["move_time_ms"]
+        cache_hits += entry.get("cache_hits", 0)
+        cache_lookups += entry.get("cache_lookups", 0)
+        if entry["result"] == "1/2-1/2":
+            draws += 1
+        elif entry["result"] == "*":
+            continue
+        elif (entry["result"] == "1-0") == (entry["white"] == "engine1"):
+            wins += 1
+        else:
+            losses += 1
+    return {
+        "games": len(entries),
+        "engine1_wins": wins,
+        "draws": draws,
+        "engine1_losses": losses,
+        "games_per_hour": games_this_run / elapsed * 3600 if elapsed else 0.0,
+        "avg_ms_per_move": move_time_ms / plies if plies else 0.0,
+        "cache_hit_rate": cache_hits / cache_lookups if cache_lookups else 0.0,
+    }
+
+
+def run_tournament(games, pgn_path="tournament.pgn", engine1=STOCKFISH_PATH, engine2=STOCKFISH_PATH,
+                   move_time=0.1, threads=1, hash_mb=16, workers=None, cache_path=None,
+                   book_path=None, book_ply=16):
+    """Play `games` rounds across a process pool, resuming from pgn_path's checkpoint if present."""
+    if workers is None:
+        # Each worker has one engine thinking at a time, so size the pool by engine threads
+        workers = max(1, (os.cpu_count() or 1) // threads)
+
+    log = TournamentLog(pgn_path)
+    pending = [(round_number, move_time) for round_number in range(1, games + 1)
+               if round_number not in log.completed]
+    if log.completed:
+        print(f"Resuming: {len(log.completed)} games already played, {len(pending)} to go.")
+
+    start = time.perf_counter()
+    played = failed = 0
+    try:
+        if pending:
+            with multiprocessing.Pool(workers, initializer=_init_worker,
+                                      initargs=({"engine1": engine1, "engine2": engine2}, threads, hash_mb, cache_path,
+                                                book_path, book_ply)) as pool:
+                for round_number, pgn_text, error in pool.imap_unordered(_play_round, pending):
+                    if error is not None:
+                        failed += 1  # Not checkpointed: the next run plays it again
+                        print(f"Round {round_number} failed after {ENGINE_ATTEMPTS} attempts: {error}")
+                        continue
+                    log.record(round_number, pgn_text)
+                    played += 1
+                    print(f"Round {round_number} finished: {log.completed[round_number]['result']} "
+                          f"({len(log.completed)}/{games})")
+                pool.close()
+                pool.join()
+    finally:
+        log.close()
+
+    stats = summarize(list(log.completed.values()), time.perf_counter() - start, played)
+    stats.update({"failed_rounds": failed, "workers": workers, "threads_per_engine": threads, "hash_mb": hash_mb})
+    with open(os.path.splitext(pgn_path)[0] + "_stats.json", "w") as f:
+        json.dump(stats, f, indent=2)
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Headless multi-core engine-vs-engine tournament.")
+    parser.add_argument("--games", type=int, default=100, help="Number of games to play")
+    parser.add_argument("--pgn", default="tournament.pgn", help="PGN file to stream games into (resumed if it exists)")
+    parser.add_argument("--engine1", default=STOCKFISH_PATH, help="Path to the first UCI engine")
+    parser.add_argument("--engine2", default=STOCKFISH_PATH, help="Path to the second UCI engine")
+    parser.add_argument("--time", type=float, default=0.1, help="Seconds per move")
+    parser.add_argument("--threads", type=int, default=1, help="Threads option for every engine")
+    parser.add_argument("--hash", type=int, default=16, help="Hash option (MB) for every engine")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: cores / threads)")
+    parser.add_argument("--cache", default=None, help="SQLite position cache shared by all workers and runs")
+    parser.add_argument("--book", default=None, help="Polyglot opening book probed before the engines")
+    parser.add_argument("--book-ply", type=int, default=16, help="Stop probing the book after this many plies")
+    args = parser.parse_args()
+
+    stats = run_tournament(args.games, args.pgn, args.engine1, args.engine2, args.time,
+                           args.threads, args.hash, args.workers, args.cache, args.book, args.book_ply)
+    print(json.dumps(stats, indent=2))
@@ -0,0 +1,294 @@
+"""
+Per-move tracing and metrics for the game loops and umpire agents.
+
+    from tracing import tracer
+
+    with tracer.span("engine_think", ply=12) as span:
+        result = engine.play(board, limit)
+        span.set(move=result.move.uci())
+    tracer.observe("queue_depth", 3, queue="snapshots")
+    tracer.count("illegal_llm_moves_total")
+
+Tracing is off until configure() is called, or until the CHESS_TRACE (JSONL
+trace file), CHESS_METRICS (Prometheus text file) or CHESS_METRICS_PORT
+(HTTP /metrics endpoint) environment variables are set. While it is off,
+span() returns a shared no-op span and observe()/count() return at once.
+
+Every span is written as one JSON line ({"ts", "span", "ms", ...attributes})
+and feeds the chess_span_seconds histogram. Metrics are exported in the
+Prometheus text format: the file is rewritten on flush() and close(), and the
+endpoint serves the live values.
+"""
+import atexit
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PREFIX = "chess_"
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+DEPTH_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+
+# name -> (type, help, buckets); unknown histograms use LATENCY_BUCKETS
+METRICS = {
+    "span_seconds": ("histogram", "Duration of traced spans (engine think, render, encode, LLM call, validation).",
+                     LATENCY_BUCKETS),
+    "queue_depth": ("histogram", "Queue depth seen when an item is queued.", DEPTH_BUCKETS),
+    "illegal_llm_moves_total": ("counter", "LLM translations that were not a legal move.", None),
+    "retries_total": ("counter", "Operations retried after a failure, by kind.", None),
+    "agent_errors_total": ("counter", "Agent move requests that failed instead of replying, by error type.", None),
+}
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Span:
+    __slots__ = ("tracer", "name", "attrs", "start")
+
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        """Add attributes known only once the work is done (the move played, a cache hit...)."""
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.tracer._end_span(self, time.perf_counter() - self.start, exc_type)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def _label_value(value):
+    """A label value escaped for the Prometheus text format: backslash, double quote and newline."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_label_value(value)}"' for key, value in labels) + "}"
+
+
+class Tracer:
+    """
+    Collects spans, histograms and counters. One module-level instance, `tracer`, is shared
+    by every instrumented module; configure() switches it on in place.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.trace_path = None
+        self.metrics_path = None
+        self._trace_file = None
+        self._server = None
+        self._lock = threading.Lock()
+        self._histograms = {}  # (name, labels) -> Histogram
+        self._counters = {}  # (name, labels) -> value
+
+    def configure(self, trace_path=None, metrics_path=None, metrics_port=None):
+        """Start tracing to a JSONL file and/or exporting metrics to a file or an HTTP port."""
+        self.close()
+        if trace_path:
+            self._trace_file = open(trace_path, "a", buffering=1 << 16)
+        self.trace_path = trace_path
+        self.metrics_path = metrics_path
+        if metrics_port is not None:
+            self._server = ThreadingHTTPServer(("0.0.0.0", metrics_port), _metrics_handler(self))
+            self._server.daemon_threads = True
+            threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        self.enabled = bool(trace_path or metrics_path or metrics_port is not None)
+        return self
+
+    def span(self, name, **attrs):
+        if not self.enabled:
+            return _NULL_SPAN
+        return Span(self, name, attrs)
+
+    def _end_span(self, span, seconds, exc_type):
+        labels = (("span", span.name),)
+        line = None
+        if self._trace_file is not None:
+            record = {"ts": round(time.time() - seconds, 6), "span": span.name, "ms": round(seconds * 1000, 3)}
+            record.update(span.attrs)
+            if exc_type is not None:
+                record["error"] = exc_type.__name__
+            line = json.dumps(record, default=str) + "\n"
+        with self._lock:
+            self._histogram("span_seconds", labels).observe(seconds)
+            if line is not None:
+                self._trace_file.write(line)
+
+    def _histogram(self, name, labels):
+        histogram = self._histograms.get((name, labels))
+        if histogram is None:
+            buckets = METRICS.get(name, (None, None, LATENCY_BUCKETS))[2] or LATENCY_BUCKETS
+            histogram = self._histograms[(name, labels)] = Histogram(buckets)
+        return histogram
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._histogram(name, tuple(sorted(labels.items()))).observe(value)
+
+    def count(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def prometheus_text(self):
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            histograms = {key: (list(h.counts), h.sum, h.count, h.buckets) for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+        lines = []
+        described = set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                help_text = METRICS.get(name, (None, name.replace("_", " ") + ".", None))[1]
+                lines.append(f"# HELP {PREFIX}{name} {help_text}")
+                lines.append(f"# TYPE {PREFIX}{name} {kind}")
+
+        for (name, labels), (counts, total, count, buckets) in sorted(histograms.items()):
+            describe(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                cumulative += bucket_count
+                lines.append(f"{PREFIX}{name}_bucket{_label_text(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{PREFIX}{name}_sum{_label_text(labels)} {total}")
+            lines.append(f"{PREFIX}{name}_count{_label_text(labels)} {count}")
+        for (name, labels), value in sorted(counters.items()):
+            describe(name, "counter")
+            lines.append(f"{PREFIX}{name}{_label_text(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+    def flush(self):
+        """Flush the trace file and rewrite the metrics file."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._trace_file is not None:
+                self._trace_file.flush()
+        if self.metrics_path:
+            tmp_path = self.metrics_path + ".tmp"
+            with open(tmp_path, "w") as f:
+                f.write(self.prometheus_text())
+            os.replace(tmp_path, self.metrics_path)  # Scrapers never see a half-written file
+
+    def close(self):
+        self.flush()
+        if self._trace_file is not None:
+            self._trace_file.close()
+            self._trace_file = None
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self.enabled = False
+
+
+def _metrics_handler(tracer):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = tracer.prometheus_text().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return MetricsHandler
+
+
+tracer = Tracer()
+
+
+def configure_from_env(environ=os.environ):
+    """Enable `tracer` from CHESS_TRACE / CHESS_METRICS / CHESS_METRICS_PORT, if any is set."""
+    port = environ.get("CHESS_METRICS_PORT")
+    if environ.get("CHESS_TRACE") or environ.get("CHESS_METRICS") or port:
+        tracer.configure(environ.get("CHESS_TRACE"), environ.get("CHESS_METRICS"), int(port) if port else None)
+
+
+configure_from_env()
+atexit.register(tracer.close)
+
+
+if __name__ == "__main__":
+    import argparse
+    import tempfile
+
+    parser = argparse.ArgumentParser(description="Measure the cost of a span with tracing off and on.")
+    parser.add_argument("--spans", type=int, default=200_000)
+    args = parser.parse_args()
+
+    def bare():
+        for ply in range(args.spans):
+            pass
+
+    def traced():
+        for ply in range(args.spans):
+            with tracer.span("engine_think", ply=ply):
+                pass
+
+    def per_span_ns(loop):
+        start = time.perf_counter()
+        loop()
+        return (time.perf_counter() - start) / args.spans * 1e9
+
+    baseline = per_span_ns(bare)
+    tracer.close()
+    disabled = per_span_ns(traced) - baseline
+    with tempfile.TemporaryDirectory() as tmp:
+        tracer.configure(metrics_path=os.path.join(tmp, "metrics.prom"))
+        metrics_only = per_span_ns(traced) - baseline
+        tracer.configure(os.path.join(tmp, "trace.jsonl"), os.path.join(tmp, "metrics.prom"))
+        full = per_span_ns(traced) - baseline
+        tracer.close()
+    print(f"per span: disabled {disabled:.0f} ns, metrics only {metrics_only:.0f} ns, "
+          f"metrics + JSONL trace {full:.0f} ns")